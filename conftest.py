@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+import pytest
+
+
+class SSHTestServer(object):
+    """
+    Local SSH server for the asyncio driver tests, emulating an sh-style shell: the lines received are echoed and
+    run with the local shell. It runs in a thread with its own event loop, so that the tests can run theirs.
+    """
+
+    def __init__(self, asyncssh):
+        self.asyncssh = asyncssh
+        """asyncssh module"""
+
+        self.sessions = 0
+        """Number of connections open"""
+
+        self.max_sessions = 0
+        """Highest number of connections open at once"""
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.acceptor = None
+        self.port = None
+
+    def start(self):
+        self.thread.start()
+        self.acceptor = asyncio.run_coroutine_threadsafe(self.listen(), self.loop).result(10)
+        self.port = self.acceptor.get_port()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.acceptor.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10)
+
+    async def listen(self):
+        test_server = self
+
+        class Server(self.asyncssh.SSHServer):
+            def connection_made(self, conn):
+                test_server.sessions += 1
+                test_server.max_sessions = max(test_server.max_sessions, test_server.sessions)
+
+            def connection_lost(self, exc):
+                test_server.sessions -= 1
+
+            def begin_auth(self, username):
+                return False  # No authentication
+
+        return await self.asyncssh.create_server(Server, '127.0.0.1', 0, line_editor=False,
+                                                 server_host_keys=[self.asyncssh.generate_private_key('ssh-ed25519')],
+                                                 process_factory=self.session)
+
+    @staticmethod
+    async def run(command):
+        process = await asyncio.create_subprocess_shell(command, stdout=asyncio.subprocess.PIPE,
+                                                        stderr=asyncio.subprocess.STDOUT)
+        output = (await process.communicate())[0]
+        return output.decode(), process.returncode
+
+    async def session(self, process):
+        if process.command is not None:
+            output, status = await self.run(process.command)
+            process.stdout.write(output)
+            process.exit(status)
+            return
+
+        prompt = '$ '
+        process.stdout.write(prompt)
+        while True:
+            line = await process.stdin.readline()
+            if not line:
+                break
+            line = line.rstrip('\n')
+            process.stdout.write(line + '\r\n')
+            if line.startswith('PS1='):
+                prompt += '[REACH]# '
+            elif line:
+                output = (await self.run(line))[0]
+                process.stdout.write(output.replace('\n', '\r\n'))
+            process.stdout.write(prompt)
+        process.exit(0)
+
+
+@pytest.fixture
+def ssh_server(monkeypatch):
+    """Local SSH server (SSHTestServer) the asyncio driver connects to, skipped without asyncssh"""
+    asyncssh = pytest.importorskip('asyncssh')
+    from reolib.REOAsyncRemoteHost import REOAsyncRemoteHost
+
+    server = SSHTestServer(asyncssh)
+    server.start()
+    monkeypatch.setattr(REOAsyncRemoteHost, 'SSH_PORT', server.port)
+    yield server
+    server.stop()
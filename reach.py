@@ -3,6 +3,7 @@
 import configparser
 import errno
 import getopt
+import io
 import os
 import re
 import sys
@@ -28,6 +29,12 @@ class Reach(REOScript):
         self.sshworker = None
         """Main worker instance"""
 
+        self.command_plan = None
+        """Commands to run on each host, parsed and checked once (CommandPlan)"""
+
+        self.hosts_file = None
+        """Hosts inventory, checked then processed by the worker (see HostsInventory)"""
+
         self.util = REOUtility()
         """Utility instance"""
 
@@ -60,7 +67,7 @@ Synopsis:
     ./reach.py -c command [-s search_string [-r report_string]] [-w wait_string -p response_string] ...
 
     Optionally, for any mode:
-    ./reach.py [--config=<config_file>] [-i inventory_file] [-k column_key] [-x] [-d]
+    ./reach.py [--config=<config_file>] [-i inventory_file] [-k column_key] [-j workers] [-P processes] [--async] [--exec] [-x] [-d]
 
 Help / Usage:
     -? : This help screen
@@ -77,9 +84,11 @@ Optional for Command (-c) Mode:
     -u : Run command as root (run 'sudo su -' first), supports password-less sudo only
     -h : Halt looping through hosts when first done string (-s) is found
     -s <search_string> : Search string in output (For example: 'Complete' or 'Nothing|Complete|$NF')
+       Prefix a string with 're:' for a regular expression (For example: 're:[0-9]+ packages|Complete')
+       Prefix a string with 'lit:' to search it as is if it starts with 're:' or 'lit:' (For example: 'lit:re:')
        -r <report_string> : [Optional with same length as -s] Matching string to print to screen when -s match
           For example: 'Installed|Not Installed'
-    -w <wait_string> : Wait string
+    -w <wait_string> : Wait string (also supports the 're:' prefix for a regular expression)
        -p <response_string> : [Required with same length as -w] Send a string when -w string is found
 
 Optional for all modes:
@@ -87,11 +96,23 @@ Optional for all modes:
     --username=<ssh_user> : Force user string instead of what is configured.
     --password=<ssh_cipher-text password> : Force cipher-text password instead of what is configured.
     --private_key=<ssh_rsa_key> : Force private RSA key file instead of what is configured.
-    -i <inventory_file> : Inventory (hosts) file (comma separated, define header key with -k)
+    -i <inventory_file> : Inventory (hosts) file (comma separated, SQLite or provider, define header key with -k)
+        '-' reads it from stdin (CSV or JSON), hosts are processed as they are read
       -k <key_column> : [Required with -i] Column header of keys
     -f <filter> : Filter hosts to process. Operators are supported: = equal, ! not equal, | or, ~ contains, & and.
-        Note: Reach does not support mixed (& and |) in this release yet.
-        Example conditions: 'Build=WHC0122' , 'Build!WHC0122', 'Build=WHC0122&Host~app, 'Build=WHC0122|Host~app|Host~dom'
+        & takes precedence over |, use parentheses to group conditions.
+        Example conditions: 'Build=WHC0122' , 'Build!WHC0122', 'Build=WHC0122&Host~app, 'Build=WHC0122|Host~app|Host~dom',
+        '(Build=WHC0122|Build=WHC0123)&Host~app'
+    -j <workers>, --workers=<workers> : Number of hosts to process at once (Default = 1, one host at a time)
+        Output of each host is displayed as it completes, the last run log is kept in inventory order.
+        With -h, hosts already in progress are completed.
+    -P <processes>, --processes=<processes> : Number of processes sharing the hosts, each processing -j hosts
+        at once (Default = 1, 0 for one per CPU core). For very large inventories on multi-core machines.
+    --async : Process hosts with asyncio in a single thread (requires asyncssh), -j hosts at once.
+        Suited to very large inventories. See SSH_HOST_DEADLINE in the config to bound the time spent per host.
+    --exec : Run commands without an interactive shell (faster, exit status reported) unless they need one
+        (-w, -u, sudo): the shell is then opened and used for the next commands of the host. Commands don't
+        share shell state (e.g. 'cd') until then. For sh-style hosts only (not network devices).
     -x : SIMULATION Mode (no connection/commands invoked)
     -d : DEBUG Mode
 
@@ -135,6 +156,8 @@ Examples:
               -------------------------------------------------------------------------------
     - Force read a different inventory file making sure to define the header key for the IP to use
     ./reach.py -i 'vga_inventory.csv' -a -k 'Public IP'
+    - Check access against hosts piped from another tool, as they come
+    list_hosts.sh | ./reach.py -i - -a -k 'IP'
               -------------------------------------------------------------------------------
     - Run a series of commands defined in a file (see template for proper format)
     ./reach.py -b 'vga_backups.csv'
@@ -160,9 +183,10 @@ Tips:
         """
         opts = None
         try:
-            opts, args = getopt.getopt(argv, 'ab:c:xdvof:i:k:uhs:w:p:r:?',
+            opts, args = getopt.getopt(argv, 'ab:c:xdvof:i:k:uhs:w:p:r:j:P:?',
                                        ["config=", "username=", "password=", "private_key=", "cipher_text",
-                                        "host_fields"])
+                                        "host_fields", "workers=", "async",
+                                        "processes=", "exec"])
         except KeyboardInterrupt:
             REOUtility.key_interrupt()
         except getopt.GetoptError as e:
@@ -255,6 +279,32 @@ Tips:
                 raise ValueError("Option(s) " + ", ".join(
                     conflicting_opts_keys) + " not allowed in access (-a) mode!")
 
+        # Number of hosts processed at once
+        if config[MAX_WORKERS] < 1 or int(config[MAX_WORKERS]) != config[MAX_WORKERS]:
+            raise ValueError("'" + SWITCH_VALUE[MAX_WORKERS] + "' (MAX_WORKERS) must be a whole number of 1 or more.")
+        if config[PROCESSES] < 0 or int(config[PROCESSES]) != config[PROCESSES]:
+            raise ValueError("'" + SWITCH_VALUE[PROCESSES] + "' (PROCESSES) must be a whole number of 0 or more.")
+        if config[LAST_RUN_ORDER_WINDOW] < 1 or int(config[LAST_RUN_ORDER_WINDOW]) != config[LAST_RUN_ORDER_WINDOW]:
+            raise ValueError("LAST_RUN_ORDER_WINDOW must be a whole number of 1 or more.")
+
+        # asyncio mode
+        if config[ASYNC_MODE] and not REOAsyncRemoteHost.is_available():
+            raise ValueError("'" + SWITCH_VALUE[ASYNC_MODE] + "' (ASYNC_MODE) requires the asyncssh module.")
+        if config[SSH_HOST_DEADLINE] < 0:
+            raise ValueError("SSH_HOST_DEADLINE must be 0 (no deadline) or more seconds.")
+
+        # Output capture
+        for key in (OUTPUT_HEAD_SIZE, OUTPUT_TAIL_SIZE):
+            if config[key] < 0 or int(config[key]) != config[key]:
+                raise ValueError(key + " must be a whole number of 0 or more bytes.")
+
+        if config[FILTER_BACKEND] not in FILTER_BACKENDS:
+            raise ValueError(FILTER_BACKEND + " must be one of: " + ', '.join(FILTER_BACKENDS) + ".")
+        if config[INVENTORY_FORMAT] and config[INVENTORY_FORMAT] not in INVENTORY_FORMATS:
+            raise ValueError(INVENTORY_FORMAT + " must be empty or one of: " + ', '.join(INVENTORY_FORMATS) + ".")
+        if config[INVENTORY_PROVIDER_TTL] < 0:
+            raise ValueError(INVENTORY_PROVIDER_TTL + " must be 0 (no cache) or more seconds.")
+
         # Check HOSTS_IMPUT_FILE
         if config[HOSTS_INVENTORY_FILE] == '':
             raise IOError("HOSTS_INPUT_FILE must be defined either in " +
@@ -267,7 +317,7 @@ Tips:
             keys_with_files = [BATCH_FILE, HOSTS_INVENTORY_FILE, CIPHER_KEY_FILE]
         else:
             keys_with_files = [BATCH_FILE, SSH_PRIVATE_KEY_FILE, HOSTS_INVENTORY_FILE, CIPHER_KEY_FILE]
-        keys_with_files = [key for key in keys_with_files if config[key]]
+        keys_with_files = [key for key in keys_with_files if config[key] and config[key] != INVENTORY_STDIN]
         for file_key in keys_with_files:
             if not os.path.isfile(config[file_key]):
                 raise IOError(config[file_key] + " doesn't exist.")
@@ -279,26 +329,20 @@ Tips:
                                  SWITCH_VALUE[IP_OR_HOST_COLUMN] + "'.")
 
         # Check hosts file
-        hosts_file = REODelimitedFile(config[HOSTS_INVENTORY_FILE], has_header=True)
-        max_column = len(hosts_file.header_list)
+        if config[HOSTS_INVENTORY_FILE] == INVENTORY_STDIN:
+            # Hosts are read from stdin, prompts are answered from the terminal
+            try:
+                REOUtility.prompt_input = open('/dev/tty')
+            except OSError:
+                REOUtility.prompt_input = io.StringIO()  # No terminal, prompts cannot be answered
+        hosts_file = self.hosts_file = HostsInventory.open(logger=self.logger)
+        header_list = hosts_file.header_list
 
         if config[IP_OR_HOST_COLUMN] not in hosts_file.header_list:
             raise ValueError("Column '" + config[IP_OR_HOST_COLUMN] + "' cannot be found in hosts file.")
         if config[FILTER_STRING]:
-            if STRINGS_MULTI_CONDITION in config[FILTER_STRING] and STRINGS_DELIMITER in config[FILTER_STRING]:
-                raise ValueError(
-                    "Filter cannot contain both '" + STRINGS_MULTI_CONDITION + "' and '" + STRINGS_DELIMITER + "'")
-            conditions = re.split("[" + STRINGS_MULTI_CONDITION + STRINGS_DELIMITER + "]",
-                                  config[FILTER_STRING])
-            conditions = [{'cond': cond, 'splits': re.split("[~=!]", cond)} for cond in conditions]
-            for cond in conditions:
-                if len(cond['splits']) != 2:
-                    raise ValueError(
-                        "Filter '" + cond['cond'] + "' invalid, please specify '~', '=', or '!' for each filter.")
-                if cond['splits'][0] not in hosts_file.header_list:
-                    raise ValueError("Column '" + cond['splits'][0] + "' cannot be found in hosts file.")
-
-        del hosts_file
+            HostFilter(config[FILTER_STRING], hosts_file.header_list)  # Raises ValueError if invalid
+
 
         # List of commands read from file
         commands = []
@@ -307,17 +351,7 @@ Tips:
         # the list of commands to be executed. Then each command will be
         # checked for validity
         if config[OPERATION] == OPERATION_BATCH:
-            commands_file = REODelimitedFile(config[BATCH_FILE])
-            row = 0
-            for command in commands_file:
-                row += 1
-                if row == 1:
-                    continue
-                temp = {}
-                for i in range(len(command)):
-                    temp[BATCH_COMMANDS_COLUMN_ORDER[i]] = command[i]
-                commands.append(temp)
-            del commands_file
+            commands = CommandPlan.read_file(config[BATCH_FILE])
         elif config[OPERATION] == OPERATION_COMMAND:
             temp = {}
             for var_name in BATCH_COMMANDS_COLUMN_ORDER:
@@ -364,12 +398,20 @@ Tips:
                     "Option '" + SWITCH_VALUE[HALT_ON_STRING] + "' must be used in conjunction with option '" +
                     SWITCH_VALUE[COMMAND_FIND_STRING] + "'.")
 
-            command_raw = ','.join(list(command.values()))
-            hvars = re.findall(re.escape(COLUMN_VARIABLE) + '\d*', command_raw)
-            for hvar in hvars:
-                if int(hvar.split("_")[1]) > max_column:
-                    raise ValueError(
-                        "Host File Column variable '" + hvar + "' must be between 1 and " + str(max_column) + ".")
+            # Check regular expressions in search and wait strings
+            for var_name in (COMMAND_FIND_STRING, COMMAND_WAIT_STRING):
+                for pattern in command[var_name].split(STRINGS_DELIMITER):
+                    if pattern.startswith(REOStringMatcher.REGEX_PREFIX):
+                        try:
+                            re.compile(pattern[len(REOStringMatcher.REGEX_PREFIX):])
+                        except re.error as e:
+                            raise ValueError("Invalid regular expression '" + pattern + "' in option '" +
+                                             SWITCH_VALUE[var_name] + "': " + str(e))
+
+        # Commands are parsed once, then run from the plan on every host. Column variables ($HF_#) are
+        # checked when compiled.
+        if commands:
+            self.command_plan = CommandPlan(commands, header_list)
 
     def run_util(self, argv):
         """
@@ -414,6 +456,11 @@ Tips:
         # Apply command line switches
         set_cli_to_config()
 
+        # The output of an inventory provider is only cached in the inventory cache
+        if INVENTORY_PROVIDER_TTL in config_defaults and config[INVENTORY_PROVIDER_TTL] > 0 and \
+                not config[INVENTORY_CACHE]:
+            print("Warning: INVENTORY_PROVIDER_TTL has no effect unless INVENTORY_CACHE is set.")
+
         # Set a slash if not already there
         if not config[LOGS_DIRECTORY].endswith('/'):
             config[LOGS_DIRECTORY] += '/'
@@ -447,20 +494,21 @@ Tips:
         if config[OPERATION] == OPERATION_ACCESS:
             print(("== | Operation: Access Check" + self.get_simulation_str() + " | ==\n"))
             self.log(logging.INFO, "Access Mode Started", False)
-            self.sshworker = CheckAccessWorker(logger=self.logger)
+            self.sshworker = CheckAccessWorker(logger=self.logger, hosts=self.hosts_file)
             self.sshworker.SHOW_HOST_DURATION = False  # Force to false, this is never needed in this mode
         if config[OPERATION] == OPERATION_BATCH:
             print(("== | Operation: Run Batch Commands from File" + self.get_simulation_str() + " | ==\n"))
-            self.sshworker = RunBatchCommandsWorker(config[BATCH_FILE], logger=self.logger)
+            self.sshworker = RunBatchCommandsWorker(config[BATCH_FILE], logger=self.logger,
+                                                    plan=self.command_plan, hosts=self.hosts_file)
             self.log(logging.INFO, "Batch Mode Started", False)
             self.log(logging.INFO, "Processing batch file: " + config[BATCH_FILE], False)
         if config[OPERATION] == OPERATION_COMMAND:
             print(("== | Operation: Run Command" + self.get_simulation_str() + " | ==\n"))
             self.log(logging.INFO, "Command Mode Started", False)
-            self.sshworker = RunCommandWorker(logger=self.logger)
+            self.sshworker = RunCommandWorker(logger=self.logger, plan=self.command_plan, hosts=self.hosts_file)
             self.sshworker.str_vars_exist = check_for_vars()
         if config[OPERATION] == HOST_FIELDS:
-            self.sshworker = CheckAccessWorker(logger=self.logger)
+            self.sshworker = CheckAccessWorker(logger=self.logger, hosts=self.hosts_file)
             print(("This is a list of the available column names in " + config[HOSTS_INVENTORY_FILE] + " along with \n"
                                                                                                        "  the corresponding $HF_# that can be used as command-line options or in the config.\n"))
             self.sshworker.display_host_fields()
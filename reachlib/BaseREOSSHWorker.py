@@ -1,11 +1,30 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import inspect
+import io
+import multiprocessing
+import os
+import queue
 import re
 import sys
+import time
 
 from reachlib.SSHWorkerConfig import *
+from reachlib.SSHWorkerContext import HostContext, LocalCall, RunSettings, remote_call
+from reachlib.SSHWorkerFilter import HostFilter
+from reachlib.SSHWorkerInventory import HostsInventory
+from reachlib.SSHWorkerPlan import ColumnTemplate, CommandPlan
+from reolib.REOAsyncRemoteHost import REOAsyncRemoteHost
+from reolib.REOColumnarInventory import REOColumnarInventory
 from reolib.REODelimitedFile import REODelimitedFile
+from reolib.REOHostCache import REOHostCache
+from reolib.REOInventoryCache import REOInventoryCache
+from reolib.REONumpyInventory import REONumpyInventory
 from reolib.REORemoteHost import REORemoteHost
-from reolib.REOUtility import REOUtility
-from functools import reduce
+from reolib.REOReorderBuffer import REOReorderBuffer
+from reolib.REOSqliteInventory import REOSqliteInventory
+from reolib.REOUtility import REOUtility, ContextStdout
 
 
 class BaseREOSSHWorker(object):
@@ -15,22 +34,16 @@ class BaseREOSSHWorker(object):
     is defined in the work() method that concrete classes need to implement.
     """
 
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, plan=None, hosts=None):
         """
         Class constructor
+        :param logger: Optional logger (from logging module)
+        :param plan: Commands to run on each host (CommandPlan), None if none
+        :param hosts: Hosts inventory already opened (see HostsInventory), opened from config if None
         """
-        self.rhost = None
-        """SSH Host"""
-
-        self.host_or_ip = ''
-        """Current Hostname or IP being processed"""
-
-        self.current_host = None
-        """Current host being processed"""
-
-        # ToDo: Implement to support CSV, JSON or even a YAML file.
-        self.hosts = REODelimitedFile(config[HOSTS_INVENTORY_FILE], ',', has_header=True)
-        """Main hosts file for processing"""
+        # ToDo: Implement to support JSON or even a YAML file.
+        self.hosts = hosts if hosts is not None else HostsInventory.open(logger)
+        """Main hosts inventory for processing (see HostsInventory)"""
 
         self.util = REOUtility(config[DEBUG_FLAG])
         """Utility instance"""
@@ -38,35 +51,29 @@ class BaseREOSSHWorker(object):
         self.last_run_log = open(config[LOGS_DIRECTORY] + config[LAST_RUN_OUTPUT], 'w')
         """File containing results strings only for the last run"""
 
-        self.command_string = ''
-        """Command string (vars replaced)"""
+        self.last_run_results = None
+        """Results strings of hosts processed concurrently, written to the last run log in inventory order"""
 
-        self.search_string = ''
-        """Search string delimited (vars replaced)"""
+        self.host_cache = None
+        """Cache of what was learned about hosts in previous runs (REOHostCache), None if disabled"""
 
-        self.report_string = ''
-        """Report (for search) delimited (vars replaced) string"""
+        self.settings = None
+        """Run settings (RunSettings), a read-only snapshot of config taken when hosts processing starts"""
 
-        self.wait_string = ''
-        """Wait string delimited (vars replaced)"""
+        self.plan = plan
+        """Commands to run on each host (CommandPlan), None if none"""
 
-        self.response_string = ''
-        """Send/put string delimited (vars replaced)"""
+        self.commands_file = ''
+        """File path containing batch commands, empty if none"""
 
-        self.search_strings = None
-        """Search strings (vars replaced) list"""
+        self.commands = ()
+        """Planned commands with their settings (see CommandPlan.bind()), set when hosts processing starts"""
 
-        self.report_strings = None
-        """Report/put strings (vars replaced) list"""
+        self.templates = {}
+        """Column templates (ColumnTemplate) of the settings with host specific values, by settings key"""
 
-        self.wait_strings = None
-        """Wait strings list (vars replaced) list"""
-
-        self.response_strings = None
-        """Send/put strings list (vars replaced) list"""
-
-        self.response_strings_display = None
-        """Send string for screen display list"""
+        self.host_filter = None
+        """Hosts filter (-f) compiled when hosts processing starts (HostFilter), None if no filter"""
 
         self.str_vars_exist = False
         """String vars existence flag"""
@@ -90,179 +97,699 @@ class BaseREOSSHWorker(object):
 
         self.show_header_confirmation()
 
+        # From here on, settings are read-only
+        self.settings = RunSettings(config)
+        if self.plan:
+            self.commands = self.plan.bind(self.settings)
+        self.__compile_templates()
+        if self.settings[FILTER_STRING]:
+            self.host_filter = HostFilter(self.settings[FILTER_STRING], self.hosts.header_list)
+
         log_str = ("# This file is only relevant/useful for a single command (-c) with a (-s or -r) defined.\n"
                    "# It is meant to be pasted in a new column spreadsheet of the hosts file.\n")
 
-        if config[FILTER_STRING]:
-            log_str += "# Filtered results: " + config[FILTER_STRING] + "\n"
-            self.log(logging.WARNING, "Filtered results: " + config[FILTER_STRING], False)
+        if self.settings[FILTER_STRING]:
+            log_str += "# Filtered results: " + self.settings[FILTER_STRING] + "\n"
+            self.log(logging.WARNING, "Filtered results: " + self.settings[FILTER_STRING], False)
 
         self.last_run_log.write(log_str)
 
-        for host in self.hosts:
-            self.current_host = host
-            self.host_or_ip = self.hosts.get_row_val(name=config[IP_OR_HOST_COLUMN])
-
-            if config[FILTER_STRING]:
-                try:
-                    # TODO: Handle complex conditions with mixed & and |
-                    if STRINGS_MULTI_CONDITION in config[FILTER_STRING]:
-                        conditions = config[FILTER_STRING].split(STRINGS_MULTI_CONDITION)
-                        alltrue = True
-                    elif STRINGS_DELIMITER in config[FILTER_STRING]:
-                        conditions = config[FILTER_STRING].split(STRINGS_DELIMITER)
-                        alltrue = False
-                    else:
-                        conditions = [config[FILTER_STRING]]
-
-                    conditions_values = [self.__eval_condition(condition) for condition in conditions]
-                    skip_host = not reduce(lambda x, y: x & y if alltrue else x | y, conditions_values)
-
-                    if skip_host:
-                        self.log(logging.DEBUG, self.host_or_ip + ' - does not meet filter: ' + config[
-                            FILTER_STRING] + ' == Skipping', False)
-                        continue  # Skipping host...
-                except KeyboardInterrupt:
-                    self.util.key_interrupt()
-
-            self.phost_count += 1
-            if not config[SIMULATION_MODE]:
-                if not self.host_worker():
+        workers = int(self.settings[MAX_WORKERS])
+        processes = int(self.settings[PROCESSES]) or os.cpu_count() or 1
+        self.last_run_results = REOReorderBuffer(self.last_run_log, limit=int(self.settings[LAST_RUN_ORDER_WINDOW]))
+        if self.settings[HOST_CACHE_FILE]:
+            self.host_cache = REOHostCache(self.settings[LOGS_DIRECTORY] + self.settings[HOST_CACHE_FILE],
+                                           logger=self.logger)
+        if self.settings[SIMULATION_MODE]:
+            for number, host in self.__selected_hosts():
+                self.phost_count += 1
+                self.__process_host_simulation(self.__host_context(host, number, self.last_run_log))
+        elif processes > 1:
+            self.log(logging.INFO, "Processing hosts with " + str(processes) + " processes of " + str(workers) +
+                     " workers", False)
+            self.__hosts_process_worker(processes, workers)
+        elif self.settings[ASYNC_MODE]:
+            self.log(logging.INFO, "Processing hosts with asyncio, " + str(workers) + " at once", False)
+            try:
+                asyncio.run(self.__async_hosts_worker(workers, self.__selected_hosts(), self.__write_result,
+                                                      self.last_run_results.accepts))
+            except KeyboardInterrupt:
+                self.util.key_interrupt()
+        elif workers > 1:
+            self.log(logging.INFO, "Processing hosts with " + str(workers) + " workers", False)
+            self.__hosts_pool_worker(workers, self.__selected_hosts(), self.__write_result,
+                                     self.last_run_results.accepts)
+        else:
+            for number, host in self.__selected_hosts():
+                self.phost_count += 1
+                ctx = self.__host_context(host, number, self.last_run_log)
+                retval = self.host_worker(ctx)
+                ctx.close()
+                if not retval:
                     break  # Stop loop if concrete method returns False
-            else:
-                # Simulated run
-                self.__process_host_simulation()
 
-            if self.phost_count % 10:  # Don't delay writing to file for every 10 hosts processed.
-                self.last_run_log.flush()
+                if self.phost_count % 10:  # Don't delay writing to file for every 10 hosts processed.
+                    self.last_run_log.flush()
 
+        self.last_run_results.close()
+        if self.host_cache:
+            self.host_cache.save()
         print("")
         self.log(logging.INFO,
                  "Script Duration: " + str(self.util.get_current_duration()) + " " + STRINGS_DELIMITER + " " + str(
                      self.phost_count) + " out of " + str(len(self.hosts)) + " hosts processed.", True)
 
-    def host_worker(self):
+    def __compile_templates(self):
+        """
+        Compile the settings with host specific values (column vars) into templates.
+        :return: None
+        """
+        for key in (SSH_USER_NAME, SSH_PASSWORD_CIPHER, SSH_PRIVATE_KEY_FILE, HOST_DISPLAY_FORMAT):
+            try:
+                self.templates[key] = ColumnTemplate(self.settings[key], self.hosts.header_list)
+            except ValueError as e:
+                self.log(logging.ERROR, "Invalid " + key + ": " + str(e), True)
+                sys.exit(2)
+
+    def __selected_hosts(self):
+        """
+        Generator of the hosts to process (filter applied).
+        :return: Tuples of: host sequence number, host row
+        """
+        number = 0
+        inventory = self.__columns_inventory() if self.host_filter else None
+        if inventory is not None:
+            row_ids = inventory.row_ids(self.host_filter.select(inventory))
+            for host in inventory.rows(row_ids):
+                number += 1
+                yield number, host
+            self.log(logging.DEBUG, str(number) + " out of " + str(len(inventory)) + " hosts meet filter: " +
+                     self.settings[FILTER_STRING], False)
+            return
+
+        for host in self.hosts:
+            if not self.__select_host(host):
+                continue  # Skipping host...
+
+            number += 1
+            yield number, host
+
+    def __columns_inventory(self):
+        """
+        Load the hosts file in columns for the filter backend (FILTER_BACKEND). A SQLite inventory is used as is,
+        the filter being resolved by the database.
+        :return: REOColumnarInventory, REONumpyInventory or REOSqliteInventory instance, None to filter the rows
+        """
+        if isinstance(self.hosts, REOSqliteInventory):
+            return self.hosts
+
+        backend = self.settings[FILTER_BACKEND]
+        columns_cache = self.__columns_cache()
+        if backend == FILTER_BACKEND_NUMPY:
+            if REONumpyInventory.is_available():
+                return REONumpyInventory.from_file(self.hosts)
+            backend = FILTER_BACKEND_COLUMNS if columns_cache else FILTER_BACKEND_ROWS
+            self.log(logging.WARNING, "The numpy module is not installed, filtering with the '" + backend +
+                     "' backend instead.", True)
+
+        if backend == FILTER_BACKEND_COLUMNS:
+            if columns_cache:
+                return REOColumnarInventory.from_file(self.hosts, columns_cache)
+            self.log(logging.WARNING, "The '" + FILTER_BACKEND_COLUMNS + "' filter backend requires a hosts file and "
+                     "INVENTORY_CACHE (its indexes are built once and cached), filtering with the '" +
+                     FILTER_BACKEND_ROWS + "' backend instead.", True)
+        return None
+
+    def __columns_cache(self):
+        """
+        Get the cache of the hosts file loaded in columns with its indexes (see REOColumnarInventory).
+        :return: REOInventoryCache instance, None if there is no inventory cache (INVENTORY_CACHE) or hosts file
+        """
+        if self.settings[INVENTORY_CACHE] and isinstance(self.hosts, REODelimitedFile):
+            return REOInventoryCache(self.settings[LOGS_DIRECTORY] + self.settings[INVENTORY_CACHE] + '_columns',
+                                     logger=self.logger)
+        return None
+
+    def __select_host(self, host):
+        """
+        Check a host against the filter (-f) if any.
+        :param host: Host row
+        :return: True if the host is to be processed, False to skip it.
+        """
+        if self.host_filter:
+            try:
+                if not self.host_filter.matches(host):
+                    self.log(logging.DEBUG, self.hosts.get_row_val(host, name=self.settings[IP_OR_HOST_COLUMN]) +
+                             ' - does not meet filter: ' + self.settings[FILTER_STRING] + ' == Skipping', False)
+                    return False
+            except KeyboardInterrupt:
+                self.util.key_interrupt()
+
+        return True
+
+    def __host_context(self, host, number, last_run_log):
+        """
+        Create the execution context of a host about to be processed.
+        :param host: Host row
+        :param number: Sequence number of the host among processed hosts
+        :param last_run_log: File-like object receiving the host's results strings
+        :return: HostContext instance
+        """
+        return HostContext(host, self.hosts.get_row_val(host, name=self.settings[IP_OR_HOST_COLUMN]),
+                           number, self.settings, last_run_log, REOUtility(self.settings[DEBUG_FLAG]))
+
+    def __write_result(self, result):
+        """
+        Write the output of a host processed concurrently to the screen (as it completes) and the
+        last run log (in inventory order, so it can still be pasted as a column of the hosts file).
+        :param result: Tuple of: host sequence number, continuation flag, screen output, last run log output
+        :return: True if the hosts loop is to halt, False otherwise.
+        """
+        number, retval, output, last_run_output = result
+        self.phost_count += 1
+        sys.stdout.write(output)
+        sys.stdout.flush()
+        self.last_run_results.put(number, last_run_output)
+        return not retval
+
+    def __hosts_process_worker(self, processes, workers):
+        """
+        Process the selected hosts with a pool of worker processes. Hosts are dealt to the processes in shards
+        (round-robin so that slow sites or host types are spread), each process runs its own pool of workers
+        (threads or asyncio) and sends back the host results which are written here as they come.
+        :param processes: Number of worker processes
+        :param workers: Maximum number of hosts processed at once per process
+        :return: None
+        """
+        hosts = list(self.__selected_hosts())
+        processes = max(min(processes, len(hosts)), 1)
+        shards = [hosts[i::processes] for i in range(processes)]
+
+        with multiprocessing.Manager() as manager:
+            results = manager.Queue()
+            halt = manager.Event()
+            next_number = manager.Value('i', self.last_run_results.next_index)
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=processes)
+            try:
+                futures = [executor.submit(self.shard_worker, shard, workers, results, halt, next_number)
+                           for shard in shards]
+                while True:
+                    finished = all(future.done() for future in futures)
+                    try:
+                        result = results.get(timeout=0.1)
+                    except queue.Empty:
+                        if finished:
+                            break
+                        continue
+
+                    if self.__write_result(result):
+                        halt.set()
+                    if next_number.value != self.last_run_results.next_index:
+                        next_number.value = self.last_run_results.next_index
+
+                for future in futures:
+                    future.result()  # Raise any error of the worker process
+            except KeyboardInterrupt:
+                halt.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.util.key_interrupt()
+            finally:
+                executor.shutdown(wait=True)
+
+    def shard_worker(self, shard, workers, results, halt, next_number):
+        """
+        Process a shard of hosts in a worker process (see __hosts_process_worker()).
+        :param shard: List of tuples of: host sequence number, host row
+        :param workers: Maximum number of hosts processed at once
+        :param results: Queue receiving the host results
+        :param halt: Event set when the hosts loop is to halt, by any process
+        :param next_number: Shared value, sequence number of the next host result to write to the last run log
+        :return: None
+        """
+        if self.logger and not self.logger.handlers:
+            # The logger is not carried over to processes that are not forked
+            self.logger = REOUtility.get_logger(self.settings[LOGS_DIRECTORY] + self.settings[LOG_FILE],
+                                                LOG_LEVELS[self.settings[LOG_LEVEL]])
+
+        def shard_hosts():
+            for number, host in shard:
+                if halt.is_set():
+                    break
+                yield number, host
+
+        def write_result(result):
+            results.put(result)
+            return halt.is_set()
+
+        def accepts_host(number):
+            return number < next_number.value + int(self.settings[LAST_RUN_ORDER_WINDOW])
+
+        try:
+            if self.settings[ASYNC_MODE]:
+                asyncio.run(self.__async_hosts_worker(workers, shard_hosts(), write_result, accepts_host))
+            else:
+                self.__hosts_pool_worker(workers, shard_hosts(), write_result, accepts_host)
+        except KeyboardInterrupt:
+            pass  # The main process handles it
+        finally:
+            if self.host_cache:
+                self.host_cache.save()
+
+    def __hosts_pool_worker(self, workers, hosts, write_result, accepts_host):
+        """
+        Process hosts with a bounded pool of worker threads. Each host has its own context
+        (remote host, settings and output buffers). Results are written as each host completes, whether or not
+        the next host is read yet.
+        :param workers: Maximum number of hosts processed at once
+        :param hosts: Iterable of tuples of: host sequence number, host row
+        :param write_result: Callable writing a host result (see __write_result())
+        :param accepts_host: Callable checking if a host (sequence number) can be started without holding
+            too many results (see REOReorderBuffer.accepts())
+        :return: None
+        """
+        stdout = ContextStdout(sys.stdout)
+        sys.stdout = stdout
+        halted = False
+        exhausted = False
+        pending = set()
+        next_host = None  # Host read, not started yet
+        reading = None  # Future reading the next host
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        reader = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        hosts = iter(hosts)
+        try:
+            while True:
+                if reading is not None and reading.done():
+                    next_host, reading = reading.result(), None
+                    exhausted = next_host is None
+                if halted:
+                    next_host = None
+
+                # Start the host read once it doesn't hold back too many results written in order, keeping a
+                # bounded number of hosts queued so a halt (-h) stops dispatching quickly
+                if next_host is not None and accepts_host(next_host[0]) and len(pending) < workers * 2:
+                    ctx = self.__host_context(next_host[1], next_host[0], io.StringIO())
+                    pending.add(executor.submit(self.__pool_host_worker, ctx, stdout))
+                    next_host = None
+
+                # The next host is read in another thread, as it may be slow to come (inventory provider or stdin)
+                # while the results of the hosts done are written
+                if next_host is None and reading is None and not halted and not exhausted:
+                    reading = reader.submit(next, hosts, None)
+
+                if not pending and (halted or exhausted):
+                    break
+                if reading is None and not pending:
+                    time.sleep(0.1)  # Hosts held back are in other processes
+                    continue
+
+                waited = set(pending)
+                if reading is not None:
+                    waited.add(reading)
+                done = concurrent.futures.wait(waited, timeout=0.1, return_when=concurrent.futures.FIRST_COMPLETED)[0]
+                done.discard(reading)
+                pending -= done
+                halted = self.__pool_results(done, write_result) or halted
+        except KeyboardInterrupt:
+            for future in pending:
+                future.cancel()
+            sys.stdout = stdout.stream
+            self.util.key_interrupt()
+        finally:
+            reader.shutdown(wait=False)  # Not waiting for a host that may never come
+            executor.shutdown(wait=True)
+            sys.stdout = stdout.stream
+
+    def __pool_host_worker(self, ctx, stdout):
+        """
+        Process a host in a pool thread, buffering the screen output.
+        :param ctx: Host context
+        :param stdout: Context-aware stdout replacement
+        :return: Tuple of: host sequence number, continuation flag, screen output, last run log output
+        """
+        output = io.StringIO()
+        stdout.redirect(output)
+        try:
+            retval = self.host_worker(ctx)
+        except Exception as e:
+            self.log(logging.ERROR, ctx.host_or_ip + " - " + str(e), True)
+            retval = True
+        finally:
+            ctx.close()
+            stdout.redirect(None)
+        return ctx.number, retval, output.getvalue(), ctx.last_run_log.getvalue()
+
+    def __pool_results(self, futures, write_result):
+        """
+        Write the results of completed pool hosts.
+        :param futures: Completed futures (or asyncio tasks)
+        :param write_result: Callable writing a host result (see __write_result())
+        :return: True if a host signaled the hosts loop to halt, False otherwise.
+        """
+        halted = False
+        for future in futures:
+            if future.cancelled():
+                continue
+            halted = write_result(future.result()) or halted
+        return halted
+
+    async def __async_hosts_worker(self, workers, hosts, write_result, accepts_host):
+        """
+        Process hosts as asyncio tasks in a single thread, at most workers hosts at once.
+        Results are written as each host completes. The hosts are read in another thread, as the next host may be
+        slow to come (inventory provider or stdin) while the hosts started keep running.
+        :param workers: Maximum number of hosts processed at once
+        :param hosts: Iterable of tuples of: host sequence number, host row
+        :param write_result: Callable writing a host result (see __write_result())
+        :param accepts_host: Callable checking if a host (sequence number) can be started without holding
+            too many results (see REOReorderBuffer.accepts())
+        :return: None
+        """
+        stdout = ContextStdout(sys.stdout)
+        sys.stdout = stdout
+        semaphore = asyncio.Semaphore(workers)
+        tasks = set()
+        halted = False
+        loop = asyncio.get_running_loop()
+        reader = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        hosts = iter(hosts)
+
+        def host_done(task):
+            nonlocal halted
+            tasks.discard(task)
+            semaphore.release()
+            halted = self.__pool_results([task], write_result) or halted
+
+        try:
+            while True:
+                await semaphore.acquire()
+                if halted:
+                    break
+                next_host = await loop.run_in_executor(reader, next, hosts, None)
+                if next_host is None:
+                    break
+                number, host = next_host
+
+                # Wait for the hosts holding back the results written in order
+                while not accepts_host(number) and not halted:
+                    await asyncio.sleep(0.1)
+                if halted:
+                    break
+
+                ctx = self.__host_context(host, number, io.StringIO())
+                task = asyncio.ensure_future(self.__async_pool_host_worker(ctx, stdout))
+                task.add_done_callback(host_done)
+                tasks.add(task)
+
+            if tasks:
+                await asyncio.wait(set(tasks))
+        finally:
+            reader.shutdown(wait=False)  # Not waiting for a host that may never come
+            sys.stdout = stdout.stream
+
+    async def __async_pool_host_worker(self, ctx, stdout):
+        """
+        Process a host as an asyncio task, buffering the screen output.
+        :param ctx: Host context
+        :param stdout: Context-aware stdout replacement
+        :return: Tuple of: host sequence number, continuation flag, screen output, last run log output
+        """
+        output = io.StringIO()
+        stdout.redirect(output)
+        deadline = self.settings[SSH_HOST_DEADLINE] or None
+        try:
+            retval = await asyncio.wait_for(self.async_host_worker(ctx), deadline)
+        except asyncio.TimeoutError:
+            print("  - Host deadline reached (" + str(deadline) + " seconds). No more commands will be sent.")
+            self.log(logging.ERROR, ctx.host_or_ip + " - Host deadline reached", False)
+            ctx.last_run_log.write("Host deadline reached\n")
+            retval = True
+        except Exception as e:
+            self.log(logging.ERROR, ctx.host_or_ip + " - " + str(e), True)
+            retval = True
+        finally:
+            ctx.close()
+        return ctx.number, retval, output.getvalue(), ctx.last_run_log.getvalue()
+
+    def host_worker(self, ctx):
+        """
+        Process a host with the blocking remote host driver (REORemoteHost).
+        :param ctx: Host context
+        :return: True signal continuation of hosts iteration, False otherwise.
+        """
+        return self.run_steps(ctx, self.host_steps(ctx))
+
+    async def async_host_worker(self, ctx):
+        """
+        Process a host with the asyncio remote host driver (REOAsyncRemoteHost).
+        :param ctx: Host context
+        :return: True signal continuation of hosts iteration, False otherwise.
+        """
+        steps = self.host_steps(ctx)
+        loop = asyncio.get_running_loop()
+        try:
+            call = next(steps)
+            while True:
+                if isinstance(call, LocalCall):
+                    # In a thread, with the task's context (screen output buffer)
+                    result = await loop.run_in_executor(None, contextvars.copy_context().run, call.function,
+                                                        *call.args)
+                else:
+                    result = await getattr(ctx.rhost, call.method)(*call.args, **call.kwargs)
+                call = steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+
+    @classmethod
+    def run_steps(cls, ctx, steps):
+        """
+        Run host processing steps, making the remote host (and local) calls they yield with the blocking driver.
+        :param ctx: Host context
+        :param steps: Generator (see host_steps())
+        :return: Value returned by the steps
+        """
+        try:
+            call = next(steps)
+            while True:
+                if isinstance(call, LocalCall):
+                    result = call.function(*call.args)
+                else:
+                    result = getattr(ctx.rhost, call.method)(*call.args, **call.kwargs)
+                call = steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+
+    def host_steps(self, ctx):
         """
         Common code defining prerequisite actions per host like making the remote connection.
+        This is a generator: calls to the remote host are yielded (see remote_call()) and their results sent back
+        by the driver, so that the same steps run with the blocking or the asyncio remote host. Blocking local
+        work is yielded as well (see local_call()) so that the asyncio driver runs it in a thread.
+        :param ctx: Host context
         :return: True signal continuation of hosts iteration, False otherwise.
         """
         retval = True
-        self.util.start_timer()
+        settings = self.settings
+        ctx.util.start_timer()
 
-        self.rhost = REORemoteHost(self.host_or_ip, config[PROMPT_REGEX], config[NEW_PROMPT_REGEX],
-                                   config[NEW_PROMPT], logger=self.logger)
+        rhost_class = REOAsyncRemoteHost if settings[ASYNC_MODE] else REORemoteHost
+        ctx.rhost = rhost_class(ctx.host_or_ip, settings[PROMPT_REGEX], settings[NEW_PROMPT_REGEX],
+                                settings[NEW_PROMPT], logger=self.logger)
 
-        if config[CIPHER_KEY_FILE]:
-            self.rhost.cipher_key = REOUtility.get_string_from_file(config[CIPHER_KEY_FILE])
+        if settings[CIPHER_KEY_FILE]:
+            ctx.rhost.cipher_key = REOUtility.get_string_from_file(settings[CIPHER_KEY_FILE])
         else:
-            self.rhost.cipher_key = REOUtility.CIPHER_KEY
+            ctx.rhost.cipher_key = REOUtility.CIPHER_KEY
 
-        self.rhost.ssh_lib_log = config[LOGS_DIRECTORY] + config[SSH_LOG_FILE]
-        self.rhost.util.toggle_debug(config[DEBUG_FLAG])
-        self.rhost.usr = self.replace_column_vars(config[SSH_USER_NAME])
+        ctx.rhost.ssh_lib_log = settings[LOGS_DIRECTORY] + settings[SSH_LOG_FILE]
+        ctx.rhost.util.toggle_debug(settings[DEBUG_FLAG])
+        ctx.rhost.usr = self.templates[SSH_USER_NAME].render(ctx.row)
 
-        if config[SSH_PASSWORD_CIPHER]:
-            self.rhost.pwd = REOUtility.decrypt_str(self.replace_column_vars(config[SSH_PASSWORD_CIPHER]),
-                                                    self.rhost.cipher_key)
+        if settings[SSH_PASSWORD_CIPHER]:
+            ctx.rhost.pwd = REOUtility.decrypt_str(self.templates[SSH_PASSWORD_CIPHER].render(ctx.row),
+                                                   ctx.rhost.cipher_key)
         else:
-            self.rhost.pwd = config[SSH_PASSWORD]
-
-        self.rhost.key_file = self.replace_column_vars(config[SSH_PRIVATE_KEY_FILE])
-        self.rhost.str_vars_exist = self.str_vars_exist
-
-        if config[HOST_DISPLAY_FORMAT]:
-            print(self.__get_process_str() + self.replace_column_vars(config[HOST_DISPLAY_FORMAT]) + " ...", end=' ')
-            self.log(logging.INFO, "Processing host: " + self.replace_column_vars(config[HOST_DISPLAY_FORMAT]))
+            ctx.rhost.pwd = settings[SSH_PASSWORD]
+
+        ctx.rhost.key_file = self.templates[SSH_PRIVATE_KEY_FILE].render(ctx.row)
+        ctx.rhost.str_vars_exist = self.str_vars_exist
+        ctx.rhost.host_cache = self.host_cache
+        ctx.rhost.sentinel_mode = settings[SENTINEL_MODE]
+        ctx.rhost.output_head_size = int(settings[OUTPUT_HEAD_SIZE])
+        ctx.rhost.output_tail_size = int(settings[OUTPUT_TAIL_SIZE])
+        if settings[OUTPUT_SPILL]:
+            ctx.rhost.output_spill_file = self.__spill_file(ctx)
+
+        if settings[HOST_DISPLAY_FORMAT]:
+            host_display = self.templates[HOST_DISPLAY_FORMAT].render(ctx.row)
+            print(self.__get_process_str(ctx) + host_display + " ...", end=' ')
+            self.log(logging.INFO, "Processing host: " + host_display)
         else:
-            print(self.__get_process_str() + self.host_or_ip + " ...", end=' ')
-            self.log(logging.INFO, "Processing host: " + self.host_or_ip)
+            print(self.__get_process_str(ctx) + ctx.host_or_ip + " ...", end=' ')
+            self.log(logging.INFO, "Processing host: " + ctx.host_or_ip)
         sys.stdout.flush()
 
-        connected = self.rhost.connect_host(set_prompt=config[OPERATION] != OPERATION_ACCESS,
-                                            conn_timeout=config[SSH_CONNECTION_TIMEOUT],
-                                            cmd_timeout=config[SSH_COMMAND_TIMEOUT],
-                                            trust_hosts=config[SSH_TRUST_HOSTS], agent_only=config[SSH_AGENT_ONLY])
+        connected = yield remote_call('connect_host', set_prompt=settings[OPERATION] != OPERATION_ACCESS,
+                                      conn_timeout=settings[SSH_CONNECTION_TIMEOUT],
+                                      cmd_timeout=settings[SSH_COMMAND_TIMEOUT],
+                                      trust_hosts=settings[SSH_TRUST_HOSTS], agent_only=settings[SSH_AGENT_ONLY],
+                                      exec_mode=settings[EXEC_MODE])
 
-        self.log(logging.INFO, self.rhost.connect_status_string, True)
-        if config[OPERATION] == OPERATION_ACCESS:
-            self.last_run_log.write(self.rhost.connect_status_string + "\n")
+        self.log(logging.INFO, ctx.rhost.connect_status_string, True)
+        if settings[OPERATION] == OPERATION_ACCESS:
+            ctx.last_run_log.write(ctx.rhost.connect_status_string + "\n")
         else:
-            if self.rhost.connect_status_string != self.rhost.SERVER_STATUS_CONNECTED:
-                self.last_run_log.write(self.rhost.connect_status_string + "\n")
+            if ctx.rhost.connect_status_string != ctx.rhost.SERVER_STATUS_CONNECTED:
+                ctx.last_run_log.write(ctx.rhost.connect_status_string + "\n")
 
         if connected:
             # Implemented in different ways by concrete classes
-            retval = self.host_work()
-            if config[SHOW_HOST_DURATION] and config[OPERATION] != OPERATION_ACCESS:
-                print(("  Host Duration: " + str(self.util.stop_timer())))
+            retval = self.host_work(ctx)
+            if inspect.isgenerator(retval):
+                retval = yield from retval
+            if settings[SHOW_HOST_DURATION] and settings[OPERATION] != OPERATION_ACCESS:
+                print(("  Host Duration: " + str(ctx.util.stop_timer())))
 
         return retval
 
-    def host_work(self):
+    def host_work(self, ctx):
         """
         Abstract method to be implemented by concrete class
-        This method defines how the hosts are processed
+        This method defines how the hosts are processed. It may be a generator yielding remote host and local
+        calls (see host_steps()).
+        :param ctx: Host context
         """
         raise NotImplementedError
 
-    def run_command(self):
+    def __spill_file(self, ctx):
+        """
+        Get the file receiving the full output of a host's commands (OUTPUT_SPILL), emptied for this run.
+        Named after the host sequence number as well, as a host may be listed more than once.
+        :param ctx: Host context
+        :return: File name
         """
-        Process a single command with its options stored in the config[] dict.
+        spill_file = (self.settings[LOGS_DIRECTORY] + 'reach_output_' + str(ctx.number) + '_' +
+                      re.sub(r'[^\w.-]', '_', ctx.host_or_ip) + '.log')
+        open(spill_file, 'wb').close()
+        return spill_file
+
+    def run_command(self, ctx):
+        """
+        Process a single command, the host context command with its options in the host context settings.
+        This is a generator yielding remote host calls (see host_steps()).
+        :param ctx: Host context
         :return: True signal continuation of hosts iteration, False otherwise (halt).
         """
         retval = True
+        settings = ctx.settings
 
-        self.__replace_vars_in_strings()
+        self.__replace_vars_in_strings(ctx)
 
-        if config[RUN_SUDO_FIRST]:
+        if settings[RUN_SUDO_FIRST]:
             sudo_cmd = 'sudo su -'
             if self.str_vars_exist:
                 print(("  Switching to root user with: \'" + sudo_cmd + "\'"))
                 self.log(logging.INFO, 'Sudo switch to root user', False)
-            output, error_msg = self.rhost.send_cmd_wait_respond(sudo_cmd, last_run_log=self.last_run_log)
+            output, error_msg = yield remote_call('send_cmd_wait_respond', sudo_cmd, last_run_log=ctx.last_run_log)
 
             if error_msg:
-                if config[SHOW_CONSOLE_OUTPUT]:
+                if settings[SHOW_CONSOLE_OUTPUT]:
                     print(("  - Console Output: \n" + output))
                 return retval, error_msg
 
         if self.str_vars_exist:
-            print(("  Running command: \'" + self.command_string + "\'"))
-            self.log(logging.INFO, "Running command: \'" + self.command_string + "\'", False)
+            print(("  Running command: \'" + ctx.command_string + "\'"))
+            self.log(logging.INFO, "Running command: \'" + ctx.command_string + "\'", False)
 
-        if self.search_string or self.wait_string:
+        if ctx.search_string or ctx.wait_string:
             # Send the command to the server and wait for a string
-            output, error_msg = self.rhost.send_cmd_wait_respond(self.command_string, self.search_string,
-                                                                 self.wait_string, self.response_string,
-                                                                 self.last_run_log)
-            # skip the rest of the if statement if error_msg != '' ?
-            w = self.rhost.search_string_isfound
+            output, error_msg = yield remote_call('send_cmd_wait_respond', ctx.command_string, ctx.search_string,
+                                                  ctx.wait_string, ctx.response_string, ctx.last_run_log)
+        else:
+            # Send the command to the server and wait for a string
+            output, error_msg = yield remote_call('send_cmd_wait_respond', ctx.command_string,
+                                                  last_run_log=ctx.last_run_log)
+
+        retval = self.__report_command(ctx, output, ctx.rhost.search_string_isfound, ctx.rhost.exit_status)
+        return retval, error_msg
 
-            if self.report_string and (w != ''):
-                result = self.report_strings[self.search_strings.index(w)]
+    def run_commands(self, ctx, planned_commands):
+        """
+        Process commands in sequence, with their options in settings. They are pipelined (sent at once, see
+        REORemoteHost.send_cmds_pipelined()) if the host supports it, processed one by one otherwise.
+        Commands pipelined must not need interaction (wait strings) nor halt (see PlannedCommand.pipelined).
+        This is a generator yielding remote host calls (see host_steps()).
+        :param ctx: Host context
+        :param planned_commands: List of (PlannedCommand, RunSettings) pairs
+        :return: Tuple of: continuation flag, error_msg of the command that failed (or '')
+        """
+        retval = True
+        commands = []
+        for ctx.command, ctx.settings in planned_commands:
+            self.__replace_vars_in_strings(ctx)
+            commands.append((ctx.command_string, ctx.search_string))
+
+        if len(commands) < 2 or not ctx.rhost.can_pipeline([command for command, search_string in commands]):
+            for ctx.command, ctx.settings in planned_commands:
+                new_retval, error_msg = yield from self.run_command(ctx)
+                retval &= new_retval
+                if error_msg:
+                    return retval, error_msg
+            return retval, ''
+
+        self.log(logging.DEBUG, "Pipelining " + str(len(commands)) + " commands", False)
+        results = yield remote_call('send_cmds_pipelined', commands)
+        for (ctx.command, ctx.settings), (output, error_msg, found, exit_status, last_run_output) in \
+                zip(planned_commands, results):
+            self.__replace_vars_in_strings(ctx)
+            if self.str_vars_exist:
+                print(("  Running command: \'" + ctx.command_string + "\'"))
+                self.log(logging.INFO, "Running command: \'" + ctx.command_string + "\'", False)
+            ctx.last_run_log.write(last_run_output)
+            retval &= self.__report_command(ctx, output, found, exit_status)
+            if error_msg:
+                return retval, error_msg
+        return retval, ''
+
+    def __report_command(self, ctx, output, w, exit_status):
+        """
+        Report the result of a command (search/report strings, halt, exit status, console output).
+        :param ctx: Host context
+        :param output: Console output of the command
+        :param w: Search string found ('' if none)
+        :param exit_status: Exit status of the command (None if unknown)
+        :return: True signal continuation of hosts iteration, False otherwise (halt).
+        """
+        retval = True
+        settings = ctx.settings
+
+        if ctx.search_string or ctx.wait_string:
+            # skip the rest of the if statement if error_msg != '' ?
+            if ctx.report_string and (w != ''):
+                result = ctx.report_strings[ctx.search_strings.index(w)]
                 print(("  - " + result))
                 self.log(logging.INFO, "Report String: " + result, False)
-                self.last_run_log.write(result + "\n")
+                ctx.last_run_log.write(result + "\n")
                 self.log(logging.DEBUG, "Command Wait String Found: " + w, False)
             else:
                 if w != '':
                     self.log(logging.INFO, "  - Found: " + w, True)
-                    self.last_run_log.write("Found: " + w + "\n")
+                    ctx.last_run_log.write("Found: " + w + "\n")
 
-            if config[HALT_ON_STRING]:
-                if w == self.search_strings[0]:
+            if settings[HALT_ON_STRING]:
+                if w == ctx.search_strings[0]:
                     print(("  - Found: \'" + w + "\' halting as requested."))
                     self.log(logging.INFO, "Found \'" + w + "\' halting as requested.", True)
                     retval = False  # Stop hosts loop, we found what we are looking for
 
-        else:
-            # Send the command to the server and wait for a string
-            output, error_msg = self.rhost.send_cmd_wait_respond(self.command_string, last_run_log=self.last_run_log)
+        if exit_status:
+            print(("  - Exit status: " + str(exit_status)))
+            self.log(logging.INFO, "Exit status: " + str(exit_status), False)
 
-        if config[SHOW_CONSOLE_OUTPUT]:
+        if settings[SHOW_CONSOLE_OUTPUT]:
             print(("  - Console Output: \n" + output))
 
-        return retval, error_msg
+        return retval
 
     def show_header_confirmation(self):
         """
@@ -293,8 +820,7 @@ class BaseREOSSHWorker(object):
 
             if config[COMMAND_SEND_STRING]:
                 tmp_list = config[COMMAND_SEND_STRING].split(STRINGS_DELIMITER)
-                tmp_list = STRINGS_DELIMITER.join(
-                    self.__replace_vars_in_list(tmp_list, replace_column=False, display_only=True))
+                tmp_list = STRINGS_DELIMITER.join([CommandPlan.display_string(s) for s in tmp_list])
                 print("  - Send/Response String: '" + tmp_list + "'")
 
             if config[SHOW_CONSOLE_OUTPUT]:
@@ -308,7 +834,7 @@ class BaseREOSSHWorker(object):
 
         # Display the rest for specific modes
         if config[OPERATION] == OPERATION_BATCH:
-            print("- Commands File: " + config[BATCH_FILE])
+            print("- Commands File: " + self.commands_file)
         if config[FILTER_STRING]:
             print(("Filter found. Filtering processing to: '" + config[FILTER_STRING]) + "'")
 
@@ -339,60 +865,64 @@ class BaseREOSSHWorker(object):
                 elif not config[SSH_PASSWORD_CIPHER]:
                     none, config[SSH_PASSWORD] = self.util.prompt_user_password(user_prompt=False, desc="SSH")
 
-    def simulate_command(self):
+    def simulate_command(self, ctx):
         """
         Display simulation confirmation per host
+        :param ctx: Host context
         :return: None
         """
         if not self.str_vars_exist:
             return
 
-        self.__replace_vars_in_strings()
+        settings = ctx.settings
+        self.__replace_vars_in_strings(ctx)
 
-        if config[RUN_SUDO_FIRST]:
+        if settings[RUN_SUDO_FIRST]:
             print ("  Switch to root user with: \'sudo su -\'")
 
-        if config[LOCAL_COMMAND]:
-            print(("  Run command locally: \'" + self.command_string + "\'"))
+        if settings[LOCAL_COMMAND]:
+            print(("  Run command locally: \'" + ctx.command_string + "\'"))
         else:
-            print(("  Run command: \'" + self.command_string + "\'"))
+            print(("  Run command: \'" + ctx.command_string + "\'"))
 
-        if self.search_string:
-            print(("  - Search for string(s): " + self.search_string))
+        if ctx.search_string:
+            print(("  - Search for string(s): " + ctx.search_string))
 
-            if self.report_string:
-                print("    - Display string(s): '" + self.report_string + "'")
+            if ctx.report_string:
+                print("    - Display string(s): '" + ctx.report_string + "'")
 
-        if self.wait_string:
-            print(("  - Wait for string(s) in sequence: " + self.wait_string))
-            print(("    - Send string(s) in sequence: " + self.response_string_display))
+        if ctx.wait_string:
+            print(("  - Wait for string(s) in sequence: " + ctx.wait_string))
+            print(("    - Send string(s) in sequence: " + ctx.response_string_display))
 
-        if config[HALT_ON_STRING] and self.search_string:
-            print(("  - If '" + self.search_string + "' is found, hosts loop will halt."))
+        if settings[HALT_ON_STRING] and ctx.search_string:
+            print(("  - If '" + ctx.search_string + "' is found, hosts loop will halt."))
 
-        if config[SHOW_CONSOLE_OUTPUT]:
+        if settings[SHOW_CONSOLE_OUTPUT]:
             print ("  - Print console output")
 
-        if config[SHOW_HOST_DURATION] and config[OPERATION] != OPERATION_ACCESS:
+        if settings[SHOW_HOST_DURATION] and settings[OPERATION] != OPERATION_ACCESS:
             print ("  - Calculate and show host processing duration")
 
-    def __process_host_simulation(self):
+    def __process_host_simulation(self, ctx):
         """
         Display per-host progress to screen.
+        :param ctx: Host context
         :return: True signal continuation of hosts iteration, False otherwise (halt).
         """  # Running in simulation mode
-        if config[HOST_DISPLAY_FORMAT]:
-            print((self.__get_process_str() + self.replace_column_vars(config[HOST_DISPLAY_FORMAT])))
+        if self.settings[HOST_DISPLAY_FORMAT]:
+            print((self.__get_process_str(ctx) + self.templates[HOST_DISPLAY_FORMAT].render(ctx.row)))
         else:
-            print((self.__get_process_str() + self.host_or_ip))
+            print((self.__get_process_str(ctx) + ctx.host_or_ip))
 
         # Implemented in different ways by concrete classes
-        self.run_simulation()
+        self.run_simulation(ctx)
 
-    def run_simulation(self):
+    def run_simulation(self, ctx):
         """
         Abstract method to be implemented by concrete class
         This method defines how the hosts are simulated
+        :param ctx: Host context
         """
         raise NotImplementedError
 
@@ -406,91 +936,28 @@ class BaseREOSSHWorker(object):
                 col = col + " (Key Column)"
             print('$HF_%s = %s' % (str(i + 1), col))
 
-    def __eval_condition(self, filter):
-        """
-        Evaluate a single filter string. For example: 'Build=WHC058' or 'Hostname~app'
-        :param filter: filter to be evaluated
-        :return: True if filter is met, False otherwise.
+    def __replace_vars_in_strings(self, ctx):
         """
-        ret_val = False
-        t_cond = re.split("[~=!]", filter)
-        if len(t_cond) != 2:
-            raise KeyError('Invalid filter: ' + filter)
-        field = t_cond[0]
-        fvalue = t_cond[1]
-        try:
-            rvalue = self.current_host[field]
-        except KeyError:
-            # shouldn't happen, filter is already checked
-            raise KeyError('Invalid field "' + field + '" in filter ' + filter)
-
-        if STRINGS_CONTAINS in filter:
-            ret_val = (fvalue in rvalue)
-        elif STRINGS_NOT_EQUAL in filter:
-            ret_val = (fvalue != rvalue)
-        else:
-            ret_val = (fvalue == rvalue)
-
-        return ret_val
-        # return (fvalue in rvalue) if '~' in filter else (fvalue == rvalue)
-
-    def __replace_vars_in_list(self, l, replace_column=True, display_only=False):
-        """
-        Replace and column vars ($HF_#) with real values.
-        :param l: List potentially containing vars.
-        :return: New list with vars replaced with real values.
-        """
-        new_list = l
-        for i, r in enumerate(new_list):
-            x = r
-            if replace_column:
-                x = self.replace_column_vars(r)
-            # Replace key strokes for display if exists
-            if display_only:
-                for k_str in REORemoteHost.KEY_STROKE_DISPLAY:
-                    x = x.replace(k_str, REORemoteHost.KEY_STROKE_DISPLAY[k_str])
-                cipher_text = re.search(re.escape(CIPHER_TEXT_MARKER) + '[^|]*', x)
-                if cipher_text is not None:
-                    x = x.replace(cipher_text.group(0), '**********')
-            new_list[i] = x
-        return new_list
-
-    def __replace_vars_in_strings(self):
-        """
-        Replace vars ($HF_#) in switch strings
+        Replace vars ($HF_#) in the strings of the host context command (templates compiled by the plan)
+        :param ctx: Host context
         :return: None
         """
-        # Turn strings into list delimited by |
-        self.command_string = [self.util.trim_quotes(config[COMMAND_STRING])]
-        self.search_strings = config[COMMAND_FIND_STRING].split(STRINGS_DELIMITER)
-        self.report_strings = config[COMMAND_REPORT_STRING].split(STRINGS_DELIMITER)
-        self.wait_strings = config[COMMAND_WAIT_STRING].split(STRINGS_DELIMITER)
-        self.response_strings = config[COMMAND_SEND_STRING].split(STRINGS_DELIMITER)
-
-        # Replace column/string and key stroke variables
-        self.command_string = STRINGS_DELIMITER.join(self.__replace_vars_in_list(self.command_string))
-        self.report_string = STRINGS_DELIMITER.join(self.__replace_vars_in_list(self.report_strings))
-        self.wait_string = STRINGS_DELIMITER.join(self.__replace_vars_in_list(self.wait_strings))
-        self.search_string = STRINGS_DELIMITER.join(self.__replace_vars_in_list(self.search_strings))
-        self.response_string = STRINGS_DELIMITER.join(self.__replace_vars_in_list(self.response_strings))
-
-        # Special case for showing response_strings with key stroke variables
-        self.response_string_display = STRINGS_DELIMITER.join(
-            self.__replace_vars_in_list(self.response_strings, display_only=True))
-
-    def replace_column_vars(self, s):
-        """
-        Replace a column var with its corresponding value.
-        :param s: Column variable
-        :return: Column value
-        """
-        cmd_str = s
-        if COLUMN_VARIABLE in cmd_str:
-            hvars = re.findall(re.escape(COLUMN_VARIABLE) + '\d*', cmd_str)
-            for hvar in hvars:  # Replace all variables found
-                col_num = int(hvar.split("_")[1])  # Read integer after $HF_
-                cmd_str = cmd_str.replace(hvar, self.hosts.get_row_val(self.hosts.current_row, col_idx=col_num - 1))
-        return cmd_str
+        command = ctx.command
+        row = ctx.row
+
+        ctx.command_string = command.command.render(row)
+        ctx.search_strings = [t.render(row) for t in command.search_strings]
+        ctx.report_strings = [t.render(row) for t in command.report_strings]
+        ctx.wait_strings = [t.render(row) for t in command.wait_strings]
+        ctx.response_strings = [t.render(row) for t in command.response_strings]
+
+        ctx.search_string = STRINGS_DELIMITER.join(ctx.search_strings)
+        ctx.report_string = STRINGS_DELIMITER.join(ctx.report_strings)
+        ctx.wait_string = STRINGS_DELIMITER.join(ctx.wait_strings)
+        ctx.response_string = STRINGS_DELIMITER.join(ctx.response_strings)
+
+        # Special case for showing response_strings with key stroke variables (resolved by the plan)
+        ctx.response_string_display = STRINGS_DELIMITER.join([t.render(row) for t in command.response_display])
 
     def log(self, level, message, print_to_screen=False):
         """
@@ -509,24 +976,36 @@ class BaseREOSSHWorker(object):
         if self.logger:
             self.logger.log(level, message)
 
-    def __get_process_str(self):
+    def __get_process_str(self, ctx):
         """
         Add new-lines to string depending on conditions for better reporting output
+        :param ctx: Host context
         :return: Proper string to display
         """
         p_str = 'Processing host: '
-        if config[OPERATION] in (OPERATION_COMMAND, OPERATION_ACCESS):
-            if self.phost_count == 1 or self.str_vars_exist:
+        if self.settings[OPERATION] in (OPERATION_COMMAND, OPERATION_ACCESS):
+            if ctx.number == 1 or self.str_vars_exist:
                 p_str = "\n" + p_str
-        if config[OPERATION] == OPERATION_BATCH:
-            if not self.destr_cmds_exist or self.phost_count > 1:
+        if self.settings[OPERATION] == OPERATION_BATCH:
+            if not self.destr_cmds_exist or ctx.number > 1:
                 p_str = "\n" + p_str
 
         return p_str
 
+    def __getstate__(self):
+        """
+        Pickle support (see shard_worker()): the last run log stays with the main process.
+        :return: State dict
+        """
+        state = self.__dict__.copy()
+        state['last_run_log'] = None
+        state['last_run_results'] = None
+        return state
+
     def __del__(self):
         """
         Class destructor. Close log file.
         :return:
         """
-        self.last_run_log.close()
+        if self.last_run_log:
+            self.last_run_log.close()
@@ -1,6 +1,7 @@
 from reachlib.BaseREOSSHWorker import BaseREOSSHWorker
 from reachlib.SSHWorkerConfig import *
-from reolib.REODelimitedFile import REODelimitedFile
+from reachlib.SSHWorkerContext import local_call
+from reachlib.SSHWorkerPlan import CommandPlan
 
 
 class CheckAccessWorker(BaseREOSSHWorker):
@@ -8,10 +9,10 @@ class CheckAccessWorker(BaseREOSSHWorker):
     Concrete class to process access (-a) checks.
     """
 
-    def host_work(self):
+    def host_work(self, ctx):
         return True  # Don't stop at 1 host
 
-    def run_simulation(self):
+    def run_simulation(self, ctx):
         pass
 
 
@@ -20,14 +21,16 @@ class RunCommandWorker(BaseREOSSHWorker):
     Concrete class to process individual commands (-c).
     """
 
-    def host_work(self):
-        retval, error_msg = self.run_command()
+    def host_work(self, ctx):
+        ctx.command, ctx.settings = self.commands[0]
+        retval, error_msg = yield from self.run_command(ctx)
         if error_msg:
             print(("  - Error: " + error_msg))
         return retval
 
-    def run_simulation(self):
-        self.simulate_command()
+    def run_simulation(self, ctx):
+        ctx.command, ctx.settings = self.commands[0]
+        self.simulate_command(ctx)
 
 
 class RunBatchCommandsWorker(BaseREOSSHWorker):
@@ -35,115 +38,72 @@ class RunBatchCommandsWorker(BaseREOSSHWorker):
     Concrete class to process batch commands (-b).
     """
 
-    def __init__(self, commands_file='', logger=None):
+    def __init__(self, commands_file='', logger=None, plan=None, hosts=None):
         """
         Class Constructor
         :param commands_file: Commands file to process.
+        :param plan: Commands of the file already read (CommandPlan), read from the file if None
+        :param hosts: Hosts inventory already opened (see HostsInventory), opened from config if None
         """
-        super(self.__class__, self).__init__(logger)
+        super(self.__class__, self).__init__(logger, plan, hosts)
+        if self.plan is None:
+            self.plan = CommandPlan(CommandPlan.read_file(commands_file), self.hosts.header_list)
 
-        self.commands_file = commands_file  # Future use
-        """File path containing batch commands"""
-
-        self.commands = REODelimitedFile(self.commands_file, ',')
-        """File containing batch commands"""
+        self.commands_file = commands_file
 
         self.str_vars_exist = True  # Assume true no matter what
-        config[BATCH_FILE] = commands_file
-        self.process_commands(check_only=True)  # Check for destructive commands, and wait time
+        self.check_commands()  # Check for destructive commands
 
-    def run_simulation(self):
-        self.process_commands(False, True)
+    def run_simulation(self, ctx):
+        self.run_steps(ctx, self.process_commands(ctx, True))
 
-    def process_commands(self, check_only=False, simulation=False):
+    def check_commands(self):
         """
-        Loop through commands file for simulation
-        :param simulation: True if running in simulation, False otherwise
-        :param check_only: True if only checking for destructive commands, False otherwise
+        Check the commands file for destructive commands.
         :return: None
         """
-        retval = True
-        row_num = 0
-        for cmd in self.commands:
-            row_num += 1
-
-            if row_num == 1:
-                continue
-
-            """
-            Keys for cmd[X]
-            0 - Command
-            1 - Show Output Flag
-            2 - Local Command
-            3 - Wait String(s)
-            4 - Send String
-            5 - Done String
-            6 - Report String(s)
-            7 - Halt Loop Flag
-            """
-
-            # Trim any Excel generated quotes
-            for i, s in enumerate(cmd):
-                cmd[i] = self.util.trim_quotes(cmd[i])
-
-            cmd_str = cmd[0]
-            if check_only:
-                # Check for destructive commands
-                config[COMMAND_STRING] = cmd_str
-
-                # Check for destructive commands in the command string or if running sudo
-                if True in [(s in config[COMMAND_STRING]) for s in DESTRUCTIVE_COMMANDS]:
-                    self.destr_cmds_exist = True  # Once true, always true
-
-                continue
-
-            # 0 - Command: Check/replace if command has vars to replace
-            cmd_str = self.replace_column_vars(cmd_str)
-
-            config[COMMAND_STRING] = cmd_str
-
-            # 1 - Show Output Flag
-            if cmd[1].lower() in VALID_YES:
-                config[SHOW_CONSOLE_OUTPUT] = True
-            else:
-                config[SHOW_CONSOLE_OUTPUT] = False
-
-            # 2 - Show Output Flag
-            if str(cmd[2]).lower() in VALID_YES:
-                config[LOCAL_COMMAND] = True
-            else:
-                config[LOCAL_COMMAND] = False
-
-            # 3 - Wait String(s)
-            config[COMMAND_WAIT_STRING] = cmd[3]
-
-            # 4 - Send String
-            config[COMMAND_SEND_STRING] = cmd[4]
-
-            # 5 - Done String
-            config[COMMAND_FIND_STRING] = cmd[5]
-
-            # 6 - Report String(s)
-            config[COMMAND_REPORT_STRING] = cmd[6]
+        for command in self.plan:
+            # Check for destructive commands in the command string or if running sudo
+            if True in [(s in command.command.text) for s in DESTRUCTIVE_COMMANDS]:
+                self.destr_cmds_exist = True  # Once true, always true
 
-            # 7 - Halt Loop Flag
-            if str(cmd[7]).lower() in VALID_YES:
-                config[HALT_ON_STRING] = True
-            else:
-                config[HALT_ON_STRING] = False
+    def process_commands(self, ctx, simulation=False):
+        """
+        Loop through commands file for a host. This is a generator yielding remote host and local calls
+        (see host_steps()).
+        :param ctx: Host context
+        :param simulation: True if running in simulation, False otherwise
+        :return: True signal continuation of hosts iteration, False otherwise (halt).
+        """
+        retval = True
+        pipeline = []  # Consecutive commands that can be sent at once
+        for command, settings in self.commands:
+            ctx.command, ctx.settings = command, settings
 
             if simulation:
-                self.simulate_command()
+                self.simulate_command(ctx)
+            elif self.settings[BATCH_PIPELINE] and command.pipelined:
+                pipeline.append((command, settings))
             else:
-                if config[LOCAL_COMMAND]:
-                    print(("    Running command locally: " + config[COMMAND_STRING]))
-                    cmd_output = self.util.run_os_command(config[COMMAND_STRING])
-                    if config[HALT_ON_STRING]:
+                if pipeline:
+                    new_retval, error_msg = yield from self.run_commands(ctx, pipeline)
+                    retval &= new_retval
+                    pipeline = []
+                    if error_msg:
+                        print(("  - Error: " + error_msg))
+                        return retval
+                    ctx.command, ctx.settings = command, settings
+
+                if settings[LOCAL_COMMAND]:
+                    command_string = command.command.render(ctx.row)
+                    print(("    Running command locally: " + command_string))
+                    cmd_output = yield local_call(ctx.util.run_os_command, command_string)
+                    if settings[HALT_ON_STRING]:
                         retval = False
-                    if config[SHOW_CONSOLE_OUTPUT]:
+                    if settings[SHOW_CONSOLE_OUTPUT]:
                         print(("  Console Output: \n" + cmd_output))
                 else:
-                    new_retval, error_msg = self.run_command()
+                    new_retval, error_msg = yield from self.run_command(ctx)
                     retval &= new_retval
                     # If not continue_commands (ie a command timed out), end
                     # this host and move on to the next
@@ -151,7 +111,13 @@ class RunBatchCommandsWorker(BaseREOSSHWorker):
                     if error_msg:
                         print(("  - Error: " + error_msg))
                         break
+
+        if pipeline:
+            new_retval, error_msg = yield from self.run_commands(ctx, pipeline)
+            retval &= new_retval
+            if error_msg:
+                print(("  - Error: " + error_msg))
         return retval
 
-    def host_work(self):
-        return self.process_commands(False, config[SIMULATION_MODE])
+    def host_work(self, ctx):
+        return self.process_commands(ctx, self.settings[SIMULATION_MODE])
@@ -45,6 +45,22 @@ STRINGS_NOT_EQUAL = '!'
 STRINGS_CONTAINS = '~'
 STRINGS_MULTI_CONDITION = '&'
 
+# Filter backends
+FILTER_BACKEND_ROWS = 'rows'
+FILTER_BACKEND_COLUMNS = 'columns'
+FILTER_BACKEND_NUMPY = 'numpy'
+
+FILTER_BACKENDS = (FILTER_BACKEND_ROWS, FILTER_BACKEND_COLUMNS, FILTER_BACKEND_NUMPY)
+
+# Inventory formats
+INVENTORY_FORMAT_CSV = 'csv'
+INVENTORY_FORMAT_SQLITE = 'sqlite'
+INVENTORY_FORMAT_PROVIDER = 'provider'
+
+INVENTORY_FORMATS = (INVENTORY_FORMAT_CSV, INVENTORY_FORMAT_SQLITE, INVENTORY_FORMAT_PROVIDER)
+
+INVENTORY_STDIN = '-'
+
 # Markers / Variables
 COLUMN_VARIABLE = '$HF_'
 NOT_FOUND_MARKER = '$NF'
@@ -71,6 +87,11 @@ DEBUG_FLAG = 'DEBUG_FLAG'
 SIMULATION_MODE = 'RUN_IN_SIMULATION_MODE'
 SHOW_CONSOLE_OUTPUT = 'SHOW_CONSOLE_OUTPUT'
 LAST_RUN_OUTPUT = 'LAST_RUN_OUTPUT'
+HOST_CACHE_FILE = 'HOST_CACHE_FILE'
+INVENTORY_CACHE = 'INVENTORY_CACHE'
+INVENTORY_FORMAT = 'INVENTORY_FORMAT'
+INVENTORY_TABLE = 'INVENTORY_TABLE'
+INVENTORY_PROVIDER_TTL = 'INVENTORY_PROVIDER_TTL'
 NO_DESTRUCTIVE_PROMPT = 'NO_DESTRUCTIVE_PROMPT'
 SSH_TRUST_HOSTS = 'SSH_TRUST_HOSTS'
 LOGS_DIRECTORY = 'LOGS_DIRECTORY'
@@ -80,16 +101,28 @@ LOG_LEVEL = 'LOG_LEVEL'
 PROMPT_REGEX = 'PROMPT_REGEX'
 NEW_PROMPT_REGEX = 'NEW_PROMPT_REGEX'
 NEW_PROMPT = 'NEW_PROMPT'
+MAX_WORKERS = 'MAX_WORKERS'
+ASYNC_MODE = 'ASYNC_MODE'
+EXEC_MODE = 'EXEC_MODE'
+SENTINEL_MODE = 'SENTINEL_MODE'
+BATCH_PIPELINE = 'BATCH_PIPELINE'
+SSH_HOST_DEADLINE = 'SSH_HOST_DEADLINE'
+PROCESSES = 'PROCESSES'
+LAST_RUN_ORDER_WINDOW = 'LAST_RUN_ORDER_WINDOW'
+OUTPUT_HEAD_SIZE = 'OUTPUT_HEAD_SIZE'
+OUTPUT_TAIL_SIZE = 'OUTPUT_TAIL_SIZE'
+OUTPUT_SPILL = 'OUTPUT_SPILL'
+FILTER_BACKEND = 'FILTER_BACKEND'
 
 # Destructive commands
 DESTRUCTIVE_COMMANDS = ('rm -rf', 'sudo')
 
 # Options type
-BOOL_OPTS = ('-o', '-u', '-h', '-d', '-x', '-a', '-v', '-?')
+BOOL_OPTS = ('-o', '-u', '-h', '-d', '-x', '-a', '-v', '-?', '--async', '--exec')
 STRING_OPTS = (
     '-b', '-c', '-w', '-i', '-k', '-f', '-r', '-p', '-s', '--config', '--username', '--password', '--private_key',
     '--cipher_text', '--host_fields')
-NUM_OPTS = ()
+NUM_OPTS = ('-j', '--workers', '-P', '--processes')
 COMMAND_OPTS = ('-c', '-w', '-r', '-p', '-s')
 
 # Options dependencies
@@ -128,6 +161,8 @@ SWITCH_KEYS['-p'] = COMMAND_SEND_STRING
 SWITCH_KEYS['-f'] = FILTER_STRING
 SWITCH_KEYS['-r'] = COMMAND_REPORT_STRING
 SWITCH_KEYS['-d'] = DEBUG_FLAG
+SWITCH_KEYS['-j'] = MAX_WORKERS
+SWITCH_KEYS['-P'] = PROCESSES
 SWITCH_KEYS['-v'] = SHOW_AUTHOR
 SWITCH_KEYS['-?'] = SHOW_USAGE
 SWITCH_KEYS['--config'] = CONFIG_FILE
@@ -136,6 +171,10 @@ SWITCH_KEYS['--password'] = SSH_PASSWORD_CIPHER
 SWITCH_KEYS['--private_key'] = SSH_PRIVATE_KEY_FILE
 SWITCH_KEYS['--cipher_text'] = CIPHER
 SWITCH_KEYS['--host_fields'] = HOST_FIELDS
+SWITCH_KEYS['--workers'] = MAX_WORKERS
+SWITCH_KEYS['--processes'] = PROCESSES
+SWITCH_KEYS['--async'] = ASYNC_MODE
+SWITCH_KEYS['--exec'] = EXEC_MODE
 
 # Reverse of above
 SWITCH_VALUE = {}
@@ -147,12 +186,15 @@ user_opts = collections.OrderedDict()
 # String defaults
 STRING_DEFAULTS = (
 CIPHER_KEY_FILE, LOGS_DIRECTORY, HOSTS_INVENTORY_FILE, IP_OR_HOST_COLUMN, HOST_DISPLAY_FORMAT, SSH_USER_NAME,
-SSH_PASSWORD_CIPHER, SSH_PRIVATE_KEY_FILE, LAST_RUN_OUTPUT, PROMPT_REGEX, LOG_LEVEL)
+SSH_PASSWORD_CIPHER, SSH_PRIVATE_KEY_FILE, LAST_RUN_OUTPUT, PROMPT_REGEX, LOG_LEVEL, HOST_CACHE_FILE,
+FILTER_BACKEND, INVENTORY_CACHE, INVENTORY_FORMAT, INVENTORY_TABLE)
 
 BOOLEAN_DEFAULTS = (SSH_AGENT_ONLY, SHOW_HOST_DURATION, SHOW_CONSOLE_OUTPUT, SIMULATION_MODE, DEBUG_FLAG,
-                    NO_DESTRUCTIVE_PROMPT, SSH_TRUST_HOSTS)
+                    NO_DESTRUCTIVE_PROMPT, SSH_TRUST_HOSTS, ASYNC_MODE, OUTPUT_SPILL, EXEC_MODE,
+                    SENTINEL_MODE, BATCH_PIPELINE)
 
-NUMBER_DEFAULTS = (SSH_CONNECTION_TIMEOUT, SSH_COMMAND_TIMEOUT)
+NUMBER_DEFAULTS = (SSH_CONNECTION_TIMEOUT, SSH_COMMAND_TIMEOUT, MAX_WORKERS, SSH_HOST_DEADLINE,
+                   PROCESSES, LAST_RUN_ORDER_WINDOW, OUTPUT_HEAD_SIZE, OUTPUT_TAIL_SIZE, INVENTORY_PROVIDER_TTL)
 
 # System user-defined defaults
 defaults = collections.OrderedDict()
@@ -160,6 +202,8 @@ defaults[LOGS_DIRECTORY] = 'logs'
 defaults[SSH_LOG_FILE] = 'reach_ssh_lib.log'
 defaults[LOG_FILE] = 'reach_main.log'
 defaults[LAST_RUN_OUTPUT] = 'reach_last_run.log'
+defaults[HOST_CACHE_FILE] = ''
+defaults[INVENTORY_CACHE] = ''
 defaults[LOG_LEVEL] = INFO
 defaults[SSH_CONNECTION_TIMEOUT] = 10
 defaults[SSH_COMMAND_TIMEOUT] = 20
@@ -168,6 +212,9 @@ defaults[SSH_PASSWORD_CIPHER] = ''
 defaults[SSH_PRIVATE_KEY_FILE] = ''
 defaults[CONFIG_FILE] = 'configs/config.ini'
 defaults[HOSTS_INVENTORY_FILE] = ''
+defaults[INVENTORY_FORMAT] = ''
+defaults[INVENTORY_TABLE] = ''
+defaults[INVENTORY_PROVIDER_TTL] = 300
 defaults[IP_OR_HOST_COLUMN] = ''
 defaults[SSH_AGENT_ONLY] = False
 defaults[SHOW_HOST_DURATION] = False
@@ -180,6 +227,18 @@ defaults[SSH_TRUST_HOSTS] = False
 defaults[PROMPT_REGEX] = '[$#>]( )?$'
 defaults[NEW_PROMPT_REGEX] = '\[REACH\]# $'
 defaults[NEW_PROMPT] = '[REACH]# '
+defaults[MAX_WORKERS] = 1
+defaults[ASYNC_MODE] = False
+defaults[EXEC_MODE] = False
+defaults[SENTINEL_MODE] = False
+defaults[BATCH_PIPELINE] = False
+defaults[SSH_HOST_DEADLINE] = 0
+defaults[PROCESSES] = 1
+defaults[LAST_RUN_ORDER_WINDOW] = 1000
+defaults[OUTPUT_HEAD_SIZE] = 0
+defaults[OUTPUT_TAIL_SIZE] = 0
+defaults[OUTPUT_SPILL] = False
+defaults[FILTER_BACKEND] = FILTER_BACKEND_ROWS
 
 config = collections.OrderedDict()
 # Pre-define configs so they are ordered
@@ -188,6 +247,8 @@ config[SSH_LOG_FILE] = defaults[SSH_LOG_FILE]
 config[LOG_FILE] = defaults[LOG_FILE]
 config[LOG_LEVEL] = defaults[LOG_LEVEL]
 config[LAST_RUN_OUTPUT] = defaults[LAST_RUN_OUTPUT]
+config[HOST_CACHE_FILE] = defaults[HOST_CACHE_FILE]
+config[INVENTORY_CACHE] = defaults[INVENTORY_CACHE]
 config[CONFIG_FILE] = defaults[CONFIG_FILE]
 config[CIPHER_KEY_FILE] = ''
 config[OPERATION] = ''
@@ -214,6 +275,9 @@ config[SSH_PASSWORD_CIPHER] = defaults[SSH_PASSWORD_CIPHER]
 config[SSH_PASSWORD] = ''
 config[SSH_PRIVATE_KEY_FILE] = defaults[SSH_PRIVATE_KEY_FILE]
 config[HOSTS_INVENTORY_FILE] = defaults[HOSTS_INVENTORY_FILE]
+config[INVENTORY_FORMAT] = defaults[INVENTORY_FORMAT]
+config[INVENTORY_TABLE] = defaults[INVENTORY_TABLE]
+config[INVENTORY_PROVIDER_TTL] = defaults[INVENTORY_PROVIDER_TTL]
 config[IP_OR_HOST_COLUMN] = defaults[IP_OR_HOST_COLUMN]
 config[SHOW_HOST_DURATION] = defaults[SHOW_HOST_DURATION]
 config[NO_DESTRUCTIVE_PROMPT] = defaults[NO_DESTRUCTIVE_PROMPT]
@@ -221,6 +285,18 @@ config[SSH_TRUST_HOSTS] = defaults[SSH_TRUST_HOSTS]
 config[PROMPT_REGEX] = defaults[PROMPT_REGEX]
 config[NEW_PROMPT_REGEX] = defaults[NEW_PROMPT_REGEX]
 config[NEW_PROMPT] = defaults[NEW_PROMPT]
+config[MAX_WORKERS] = defaults[MAX_WORKERS]
+config[ASYNC_MODE] = defaults[ASYNC_MODE]
+config[EXEC_MODE] = defaults[EXEC_MODE]
+config[SENTINEL_MODE] = defaults[SENTINEL_MODE]
+config[BATCH_PIPELINE] = defaults[BATCH_PIPELINE]
+config[SSH_HOST_DEADLINE] = defaults[SSH_HOST_DEADLINE]
+config[PROCESSES] = defaults[PROCESSES]
+config[LAST_RUN_ORDER_WINDOW] = defaults[LAST_RUN_ORDER_WINDOW]
+config[OUTPUT_HEAD_SIZE] = defaults[OUTPUT_HEAD_SIZE]
+config[OUTPUT_TAIL_SIZE] = defaults[OUTPUT_TAIL_SIZE]
+config[OUTPUT_SPILL] = defaults[OUTPUT_SPILL]
+config[FILTER_BACKEND] = defaults[FILTER_BACKEND]
 
 cli_config = collections.OrderedDict()
 
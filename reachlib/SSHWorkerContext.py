@@ -0,0 +1,159 @@
+import collections
+from collections.abc import Mapping
+
+from reachlib.SSHWorkerConfig import *
+
+
+RemoteCall = collections.namedtuple('RemoteCall', ['method', 'args', 'kwargs'])
+"""Call of a remote host method, yielded by the worker host processing steps to the host driver"""
+
+
+def remote_call(method, *args, **kwargs):
+    """
+    Describe a call of a remote host (REORemoteHost or REOAsyncRemoteHost) method.
+    :param method: Method name
+    :return: RemoteCall instance
+    """
+    return RemoteCall(method, args, kwargs)
+
+
+LocalCall = collections.namedtuple('LocalCall', ['function', 'args'])
+"""Call of a blocking local function, yielded by the worker host processing steps to the host driver"""
+
+
+def local_call(function, *args):
+    """
+    Describe a call of a blocking local function (e.g. a local command), run by the asyncio driver in a thread
+    so that the other hosts aren't held.
+    :param function: Function
+    :return: LocalCall instance
+    """
+    return LocalCall(function, args)
+
+
+class RunSettings(Mapping):
+    """
+    Read-only snapshot of the run configuration, keyed the same way as the config dict.
+    Command settings (e.g. a batch row) are layered on top of the run settings with derive() so
+    that nothing is ever written back into the shared config while hosts are processed.
+    """
+
+    def __init__(self, values, parent=None):
+        """
+        Class constructor
+        :param values: Dict of setting values (copied)
+        :param parent: Settings to fall back to for keys not in values
+        """
+        self.__values = collections.OrderedDict(values)
+        """Settings defined at this level"""
+
+        self.__parent = parent
+        """Settings this instance derives from"""
+
+    def derive(self, values):
+        """
+        Create new settings overriding some values of these.
+        :param values: Dict of values to override
+        :return: RunSettings instance
+        """
+        return RunSettings(values, parent=self)
+
+    def __getitem__(self, key):
+        if key in self.__values:
+            return self.__values[key]
+        if self.__parent is not None:
+            return self.__parent[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        keys = list(self.__values)
+        if self.__parent is not None:
+            keys += [key for key in self.__parent if key not in self.__values]
+        return iter(keys)
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def __reduce__(self):
+        # Flatten when pickled (e.g. sent to another process)
+        return RunSettings, (collections.OrderedDict(self.items()),)
+
+
+class HostContext(object):
+    """
+    Everything specific to a single host being processed: its inventory row, remote host connection,
+    timer, result output and the strings (vars replaced) of the command currently being run.
+    One context exists per host so hosts can be processed concurrently.
+    """
+
+    def __init__(self, row, host_or_ip, number, settings, last_run_log, util):
+        """
+        Class constructor
+        :param row: Inventory row of the host
+        :param host_or_ip: Hostname or IP used to connect
+        :param number: Sequence number of the host among processed hosts
+        :param settings: Run settings (RunSettings)
+        :param last_run_log: File-like object receiving results strings for this host
+        :param util: Utility instance (timer) for this host
+        """
+        self.row = row
+        """Inventory row of the host"""
+
+        self.host_or_ip = host_or_ip
+        """Hostname or IP being processed"""
+
+        self.number = number
+        """Sequence number of the host among processed hosts"""
+
+        self.settings = settings
+        """Settings of the command currently being run (RunSettings)"""
+
+        self.command = None
+        """Command currently being run (PlannedCommand)"""
+
+        self.last_run_log = last_run_log
+        """Results strings output for this host"""
+
+        self.util = util
+        """Utility instance"""
+
+        self.rhost = None
+        """SSH Host"""
+
+        self.command_string = ''
+        """Command string (vars replaced)"""
+
+        self.search_string = ''
+        """Search string delimited (vars replaced)"""
+
+        self.report_string = ''
+        """Report (for search) delimited (vars replaced) string"""
+
+        self.wait_string = ''
+        """Wait string delimited (vars replaced)"""
+
+        self.response_string = ''
+        """Send/put string delimited (vars replaced)"""
+
+        self.response_string_display = ''
+        """Send/put string delimited for screen display"""
+
+        self.search_strings = None
+        """Search strings (vars replaced) list"""
+
+        self.report_strings = None
+        """Report/put strings (vars replaced) list"""
+
+        self.wait_strings = None
+        """Wait strings list (vars replaced) list"""
+
+        self.response_strings = None
+        """Send/put strings list (vars replaced) list"""
+
+    def close(self):
+        """
+        Close the connection to the host if open.
+        :return: None
+        """
+        if self.rhost:
+            self.rhost.close()
@@ -0,0 +1,182 @@
+import re
+
+from reachlib.SSHWorkerConfig import *
+
+
+class HostFilter(object):
+    """
+    Hosts filter (-f) compiled once: the expression is parsed into a tree of conditions ('=' equal, '!' not equal,
+    '~' contains) combined with '&' (and) and '|' (or), '&' taking precedence over '|', with parentheses to group.
+    The tree is then turned into a function of the host row, so that no string is parsed per host, or resolved
+    at once against a column oriented inventory (see select()).
+    Tree nodes are tuples: (FILTER_CONDITION, column, operator, value), (FILTER_AND, nodes) or (FILTER_OR, nodes).
+    """
+    FILTER_CONDITION = 'condition'
+    """Node of a single condition"""
+
+    FILTER_AND = STRINGS_MULTI_CONDITION
+    """Node of conditions all met"""
+
+    FILTER_OR = STRINGS_DELIMITER
+    """Node of conditions any met"""
+
+    OPERATORS_REGEX = re.compile('[' + re.escape(STRINGS_CONTAINS + STRINGS_NOT_EQUAL + STRINGS_EQUAL) + ']')
+    """Condition operators"""
+
+    def __init__(self, filter_string, header_list):
+        """
+        Class constructor
+        :param filter_string: Filter expression, for example: '(Build=WHC058|Build=WHC059)&Hostname~app'
+        :param header_list: Header (column names) of the hosts file
+        """
+        self.filter_string = filter_string
+        """Filter expression"""
+
+        self.header_list = header_list
+        """Header (column names) of the hosts file"""
+
+        self.pos = 0
+        """Position in the expression while parsed"""
+
+        self.depth = 0
+        """Number of parentheses open while parsed"""
+
+        self.tree = self.__parse_or()
+        """Parsed filter"""
+        if self.pos < len(filter_string):
+            raise ValueError("Filter '" + filter_string + "' invalid, unexpected '" + filter_string[self.pos] +
+                             "' at position " + str(self.pos + 1) + ".")
+
+        self.matches = self.compile(self.tree)
+        """Function of a host row returning True if the host meets the filter"""
+
+    def __parse_or(self):
+        """
+        Parse conditions separated by '|'.
+        :return: Tree node
+        """
+        nodes = [self.__parse_and()]
+        while self.__next_char() == STRINGS_DELIMITER:
+            self.pos += 1
+            nodes.append(self.__parse_and())
+        return nodes[0] if len(nodes) == 1 else (self.FILTER_OR, tuple(nodes))
+
+    def __parse_and(self):
+        """
+        Parse conditions separated by '&'.
+        :return: Tree node
+        """
+        nodes = [self.__parse_operand()]
+        while self.__next_char() == STRINGS_MULTI_CONDITION:
+            self.pos += 1
+            nodes.append(self.__parse_operand())
+        return nodes[0] if len(nodes) == 1 else (self.FILTER_AND, tuple(nodes))
+
+    def __parse_operand(self):
+        """
+        Parse a condition or a parenthesized expression.
+        :return: Tree node
+        """
+        if self.__next_char() == '(':
+            self.pos += 1
+            self.depth += 1
+            node = self.__parse_or()
+            if self.__next_char() != ')':
+                raise ValueError("Filter '" + self.filter_string + "' invalid, missing ')'.")
+            self.pos += 1
+            self.depth -= 1
+            return node
+
+        # A condition ends at the next '&' or '|', or ')' closing a group: parentheses are part of values otherwise
+        ends = STRINGS_MULTI_CONDITION + STRINGS_DELIMITER + (')' if self.depth else '')
+        start = self.pos
+        while self.pos < len(self.filter_string) and self.filter_string[self.pos] not in ends:
+            self.pos += 1
+        condition = self.filter_string[start:self.pos].strip()
+
+        splits = self.OPERATORS_REGEX.split(condition)
+        if len(splits) != 2:
+            raise ValueError("Filter '" + condition + "' invalid, please specify '~', '=', or '!' for each filter.")
+        column, value = splits[0].strip(), splits[1].strip()
+        if column not in self.header_list:
+            raise ValueError("Column '" + column + "' cannot be found in hosts file.")
+        return self.FILTER_CONDITION, column, condition[len(splits[0])], value
+
+    def __next_char(self):
+        """
+        Skip spaces and get the next character of the expression being parsed.
+        :return: Character ('' at the end)
+        """
+        while self.pos < len(self.filter_string) and self.filter_string[self.pos].isspace():
+            self.pos += 1
+        return self.filter_string[self.pos:self.pos + 1]
+
+    @classmethod
+    def compile(cls, node):
+        """
+        Turn a tree node into a function of the host row.
+        :param node: Tree node
+        :return: Function returning True if the host row meets the node conditions
+        """
+        if node[0] == cls.FILTER_CONDITION:
+            none, column, operator, value = node
+            if operator == STRINGS_CONTAINS:
+                return lambda row: value in row.get(column, '')
+            if operator == STRINGS_NOT_EQUAL:
+                return lambda row: row.get(column, '') != value
+            return lambda row: row.get(column, '') == value
+
+        functions = [cls.compile(child) for child in node[1]]
+        matches = functions[0]
+        for function in functions[1:]:
+            matches = cls.__and(matches, function) if node[0] == cls.FILTER_AND else cls.__or(matches, function)
+        return matches
+
+    def select(self, inventory, node=None):
+        """
+        Resolve the filter against a column oriented inventory (REOColumnarInventory or REONumpyInventory):
+        each condition gives a selection of rows (set of row ids, boolean mask...) and selections are combined
+        by the inventory.
+        :param inventory: Inventory instance
+        :param node: Tree node (None for the whole filter)
+        :return: Selection of the rows meeting the filter (see the inventory row_ids())
+        """
+        node = node or self.tree
+        if node[0] == self.FILTER_CONDITION:
+            none, column, operator, value = node
+            if operator == STRINGS_CONTAINS:
+                return inventory.contains(column, value)
+            if operator == STRINGS_NOT_EQUAL:
+                return inventory.not_equal(column, value)
+            return inventory.equal(column, value)
+
+        selections = [self.select(inventory, child) for child in node[1]]
+        if node[0] == self.FILTER_AND:
+            return inventory.intersection(selections)
+        return inventory.union(selections)
+
+    @staticmethod
+    def __and(first, second):
+        return lambda row: first(row) and second(row)
+
+    @staticmethod
+    def __or(first, second):
+        return lambda row: first(row) or second(row)
+
+    def __getstate__(self):
+        """
+        Pickle support (e.g. sent to another process): the function is compiled again when unpickled.
+        :return: State dict
+        """
+        state = self.__dict__.copy()
+        del state['matches']
+        return state
+
+    def __setstate__(self, state):
+        """
+        Unpickle support.
+        :param state: State dict
+        :return: None
+        """
+        self.__dict__.update(state)
+        self.matches = self.compile(self.tree)
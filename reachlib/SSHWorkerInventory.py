@@ -0,0 +1,57 @@
+import os
+
+from reachlib.SSHWorkerConfig import *
+from reolib.REODelimitedFile import REODelimitedFile
+from reolib.REOInventoryCache import REOInventoryCache
+from reolib.REOProviderInventory import REOProviderInventory
+from reolib.REOSqliteInventory import REOSqliteInventory
+from reolib.REOStdinInventory import REOStdinInventory
+
+
+class HostsInventory(object):
+    """
+    Opens the hosts inventory (HOSTS_INVENTORY_FILE) in its format: a delimited file (REODelimitedFile), a
+    table of a SQLite database (REOSqliteInventory) or the output of an executable (REOProviderInventory), as set
+    by INVENTORY_FORMAT or else by the file extension. '-' reads it from stdin (REOStdinInventory).
+    An inventory is never run as a provider unless INVENTORY_FORMAT says so.
+    """
+    SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+    """File extensions of SQLite databases"""
+
+    @classmethod
+    def get_format(cls, file_name, inventory_format=''):
+        """
+        Get the format of an inventory.
+        :param file_name: Inventory file
+        :param inventory_format: Format configured (INVENTORY_FORMAT), told by the file extension if empty
+        (never a provider)
+        :return: One of INVENTORY_FORMATS
+        """
+        if inventory_format:
+            return inventory_format
+        if os.path.splitext(file_name)[1].lower() in cls.SQLITE_EXTENSIONS:
+            return INVENTORY_FORMAT_SQLITE
+        return INVENTORY_FORMAT_CSV
+
+    @classmethod
+    def open(cls, logger=None):
+        """
+        Open the hosts inventory as configured.
+        :param logger: Optional logger (from logging module)
+        :return: REODelimitedFile, REOSqliteInventory, REOProviderInventory or REOStdinInventory instance
+        """
+        file_name = config[HOSTS_INVENTORY_FILE]
+        if file_name == INVENTORY_STDIN:
+            return REOStdinInventory(logger=logger)
+
+        inventory_format = cls.get_format(file_name, config[INVENTORY_FORMAT])
+        if inventory_format == INVENTORY_FORMAT_SQLITE:
+            return REOSqliteInventory(file_name, table=config[INVENTORY_TABLE], logger=logger)
+
+        inventory_cache = None
+        if config[INVENTORY_CACHE]:
+            inventory_cache = REOInventoryCache(config[LOGS_DIRECTORY] + config[INVENTORY_CACHE], logger=logger)
+        if inventory_format == INVENTORY_FORMAT_PROVIDER:
+            return REOProviderInventory(file_name, cache=inventory_cache, ttl=config[INVENTORY_PROVIDER_TTL],
+                                        logger=logger)
+        return REODelimitedFile(file_name, ',', has_header=True, logger=logger, cache=inventory_cache)
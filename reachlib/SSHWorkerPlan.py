@@ -0,0 +1,150 @@
+import collections
+import re
+
+from reachlib.SSHWorkerConfig import *
+from reolib.REODelimitedFile import REODelimitedFile
+from reolib.REORemoteHost import REORemoteHost
+from reolib.REOUtility import REOUtility
+
+
+PlannedCommand = collections.namedtuple('PlannedCommand', ['settings', 'command', 'search_strings', 'report_strings',
+                                                           'wait_strings', 'response_strings', 'response_display',
+                                                           'pipelined'])
+"""Command of a plan: settings layered over the run settings (tuple of key/value pairs), command and strings split
+on STRINGS_DELIMITER (ColumnTemplate tuples), send strings for screen display and pipelining flag"""
+
+
+class ColumnTemplate(object):
+    """
+    String with column vars ($HF_#) compiled once: the literal parts and, between them, the inventory columns
+    to insert. Rendering it for a host row is a single join, whatever the number of columns.
+    """
+    VARIABLE_REGEX = re.compile(re.escape(COLUMN_VARIABLE) + r'(\d+)')
+    """Column variable with its column number (from 1)"""
+
+    def __init__(self, s, header_list):
+        """
+        Class constructor
+        :param s: String potentially containing column vars
+        :param header_list: Header (column names) of the hosts file
+        """
+        self.text = s
+        """Original string"""
+
+        parts = []
+        fields = []
+        pos = 0
+        for match in self.VARIABLE_REGEX.finditer(s):
+            col_num = int(match.group(1))
+            if not 1 <= col_num <= len(header_list):
+                raise ValueError("Host File Column variable '" + match.group(0) + "' must be between 1 and " +
+                                 str(len(header_list)) + ".")
+            parts.append(s[pos:match.start()])
+            fields.append((len(parts), header_list[col_num - 1]))
+            parts.append('')
+            pos = match.end()
+        parts.append(s[pos:])
+
+        self.parts = tuple(parts)
+        """Literal parts, with empty parts where column values go"""
+
+        self.fields = tuple(fields)
+        """Tuples of: index in parts, column name"""
+
+    def render(self, row):
+        """
+        Replace the column vars with the values of a host row.
+        :param row: Host row (dict)
+        :return: String with vars replaced
+        """
+        if not self.fields:
+            return self.text
+        parts = list(self.parts)
+        for i, column in self.fields:
+            parts[i] = row[column]
+        return ''.join(parts)
+
+
+class CommandPlan(object):
+    """
+    Commands to run on every host (the batch commands file rows, or the single command), parsed once when
+    the run starts. Each command is kept with its strings already split, compiled into column templates,
+    and its send strings already resolved for display, so that hosts only have to render the templates.
+    """
+
+    def __init__(self, commands, header_list):
+        """
+        Class constructor
+        :param commands: List of commands, dicts of strings keyed as in BATCH_COMMANDS_COLUMN_ORDER
+        :param header_list: Header (column names) of the hosts file
+        """
+        self.commands = tuple(self.compile_command(command, header_list) for command in commands)
+        """Planned commands (PlannedCommand)"""
+
+    @classmethod
+    def read_file(cls, file_name):
+        """
+        Read the commands of a batch commands file.
+        :param file_name: Batch commands file
+        :return: List of commands, dicts of strings keyed as in BATCH_COMMANDS_COLUMN_ORDER (Excel quotes trimmed,
+        missing columns empty)
+        """
+        rows = list(REODelimitedFile(file_name, ','))[1:]  # Skip header row
+        return [dict((key, REOUtility.trim_quotes(row[i]) if i < len(row) else '')
+                     for i, key in enumerate(BATCH_COMMANDS_COLUMN_ORDER)) for row in rows]
+
+    @classmethod
+    def compile_command(cls, command, header_list):
+        """
+        Compile a command.
+        :param command: Dict of strings keyed as in BATCH_COMMANDS_COLUMN_ORDER
+        :param header_list: Header (column names) of the hosts file
+        :return: PlannedCommand instance
+        """
+        def templates(key):
+            return tuple(ColumnTemplate(s, header_list) for s in settings[key].split(STRINGS_DELIMITER))
+
+        settings = collections.OrderedDict()
+        for key in BATCH_COMMANDS_COLUMN_ORDER:
+            settings[key] = command.get(key, '')
+        for key in (SHOW_CONSOLE_OUTPUT, LOCAL_COMMAND, HALT_ON_STRING):
+            settings[key] = str(settings[key]).lower() in VALID_YES
+
+        return PlannedCommand(settings=tuple(settings.items()),
+                              command=ColumnTemplate(REOUtility.trim_quotes(settings[COMMAND_STRING]), header_list),
+                              search_strings=templates(COMMAND_FIND_STRING),
+                              report_strings=templates(COMMAND_REPORT_STRING),
+                              wait_strings=templates(COMMAND_WAIT_STRING),
+                              response_strings=templates(COMMAND_SEND_STRING),
+                              response_display=tuple(ColumnTemplate(cls.display_string(s), header_list)
+                                                     for s in settings[COMMAND_SEND_STRING].split(STRINGS_DELIMITER)),
+                              pipelined=not (settings[LOCAL_COMMAND] or settings[COMMAND_WAIT_STRING] or
+                                             settings[HALT_ON_STRING]))
+
+    @staticmethod
+    def display_string(s):
+        """
+        Get a send string for screen display: key strokes named and cipher text masked.
+        :param s: Send string
+        :return: Display string
+        """
+        for k_str in REORemoteHost.KEY_STROKE_DISPLAY:
+            s = s.replace(k_str, REORemoteHost.KEY_STROKE_DISPLAY[k_str])
+        cipher_text = re.search(re.escape(CIPHER_TEXT_MARKER) + '[^|]*', s)
+        if cipher_text is not None:
+            s = s.replace(cipher_text.group(0), '**********')
+        return s
+
+    def bind(self, settings):
+        """
+        Layer the settings of each command over the run settings.
+        :param settings: Run settings (RunSettings)
+        :return: Tuple of (PlannedCommand, RunSettings) pairs
+        """
+        return tuple((command, settings.derive(command.settings)) for command in self.commands)
+
+    def __iter__(self):
+        return iter(self.commands)
+
+    def __len__(self):
+        return len(self.commands)
@@ -2,4 +2,7 @@ from .SSHWorkerClasses import CheckAccessWorker
 from .SSHWorkerClasses import RunBatchCommandsWorker
 from .SSHWorkerClasses import RunCommandWorker
 from .SSHWorkerConfig import *
+from .SSHWorkerFilter import HostFilter
+from .SSHWorkerInventory import HostsInventory
+from .SSHWorkerPlan import CommandPlan
 from reachlib import BaseREOSSHWorker
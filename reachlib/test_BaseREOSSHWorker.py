@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+from reachlib.BaseREOSSHWorker import BaseREOSSHWorker
+from reachlib.SSHWorkerClasses import RunBatchCommandsWorker
+from reachlib.SSHWorkerConfig import *
+from reolib.REODelimitedFile import REODelimitedFile
+
+SITES = ['DAL', 'NYC', 'DAL', 'SIN']
+
+
+class StubWorker(BaseREOSSHWorker):
+    """
+    Worker recording the hosts it is given instead of connecting to them.
+    """
+
+    def __init__(self, hosts, halt_host=None):
+        super(self.__class__, self).__init__(hosts=hosts)
+        self.halt_host = halt_host
+        self.contexts = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def host_worker(self, ctx):
+        ctx.command_string = 'echo ' + ctx.host_or_ip
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+            self.contexts.append(ctx)
+        return ctx.host_or_ip != self.halt_host
+
+
+@pytest.fixture
+def hosts(tmp_path, monkeypatch):
+    hosts_file = tmp_path / 'hosts.csv'
+    hosts_file.write_text('Name,Site\n' + ''.join('host' + str(i) + ',' + SITES[i % len(SITES)] + '\n'
+                                                  for i in range(1, 21)))
+    for key, value in ((LOGS_DIRECTORY, str(tmp_path) + '/'), (HOSTS_INVENTORY_FILE, str(hosts_file)),
+                       (IP_OR_HOST_COLUMN, 'Name'), (MAX_WORKERS, 3), (SSH_AGENT_ONLY, True),
+                       (NO_DESTRUCTIVE_PROMPT, True), (FILTER_STRING, ''), (HOST_DISPLAY_FORMAT, '')):
+        monkeypatch.setitem(config, key, value)
+    return REODelimitedFile(str(hosts_file), ',', has_header=True)
+
+
+def run(hosts, halt_host=None):
+    worker = StubWorker(hosts, halt_host)
+    worker.hosts_worker()
+    worker.last_run_log.close()
+    return worker
+
+
+def test_pool(hosts):
+    worker = run(hosts)
+    assert sorted(ctx.number for ctx in worker.contexts) == list(range(1, 21))
+    assert 1 < worker.max_running <= 3
+    assert worker.phost_count == 20
+
+
+def test_pool_filter(hosts):
+    config[FILTER_STRING] = 'Site=DAL | Site=SIN'
+    worker = run(hosts)
+    names = [ctx.host_or_ip for ctx in sorted(worker.contexts, key=lambda ctx: ctx.number)]
+    assert names == ['host' + str(i) for i in range(1, 21) if i % 4 != 1]
+
+
+def test_pool_halt(hosts):
+    worker = run(hosts, halt_host='host1')
+    # Hosts already started complete, no more are started
+    assert 1 <= len(worker.contexts) <= 3 * 2 + 1
+    assert 'host1' in [ctx.host_or_ip for ctx in worker.contexts]
+
+
+def test_pool_host_contexts(hosts):
+    config_values = dict(config)
+    worker = run(hosts)
+    assert len(set(map(id, worker.contexts))) == 20
+    assert not [ctx for ctx in worker.contexts if ctx.command_string != 'echo ' + ctx.host_or_ip]
+
+    # Hosts share the run settings, read-only, config isn't written to
+    assert {id(ctx.settings) for ctx in worker.contexts} == {id(worker.settings)}
+    with pytest.raises(TypeError):
+        worker.settings[COMMAND_STRING] = 'reboot'
+    assert config == config_values
+
+
+@pytest.fixture
+def async_run(hosts, tmp_path, monkeypatch, ssh_server):
+    """Run batch commands on hosts of the test SSH server with the asyncio driver, return the last run log lines"""
+    def run_batch(batch, host_count, workers=2, **settings):
+        hosts_file = tmp_path / 'async_hosts.csv'
+        hosts_file.write_text('Name,IP\n' + ''.join('host' + str(i) + ',127.0.0.1\n' for i in range(1, host_count + 1)))
+        batch_file = tmp_path / 'batch.csv'
+        batch_file.write_text('Command,Show,Local,Wait,Send,Search,Report,Halt\n' + batch)
+        for key, value in ((HOSTS_INVENTORY_FILE, str(hosts_file)), (IP_OR_HOST_COLUMN, 'IP'), (ASYNC_MODE, True),
+                           (MAX_WORKERS, workers), (OPERATION, OPERATION_BATCH), (BATCH_FILE, str(batch_file)),
+                           (SSH_USER_NAME, 'user'), (SSH_TRUST_HOSTS, True)):
+            monkeypatch.setitem(config, key, value)
+        for key, value in settings.items():
+            monkeypatch.setitem(config, globals()[key], value)
+
+        worker = RunBatchCommandsWorker(str(batch_file), hosts=REODelimitedFile(str(hosts_file), ',', has_header=True))
+        worker.hosts_worker()
+        worker.last_run_log.close()
+        with open(config[LOGS_DIRECTORY] + config[LAST_RUN_OUTPUT]) as last_run_log:
+            return [line.strip() for line in last_run_log if not line.startswith('#')]
+
+    return run_batch
+
+
+def test_async_pool(async_run, ssh_server):
+    assert async_run('echo hi,no,,,,hi,,\n', 6) == ['Found: hi'] * 6
+    assert ssh_server.max_sessions == 2  # Hosts processed at once bounded by the workers
+
+
+def test_async_deadline(async_run):
+    start = time.time()
+    assert async_run('sleep 5,no,,,,,,\n', 2, SSH_HOST_DEADLINE=1, SSH_COMMAND_TIMEOUT=10) == \
+        ['Host deadline reached'] * 2
+    assert time.time() - start < 4
+
+
+def test_async_local_command(async_run):
+    # Local commands run in threads, the other hosts aren't held
+    start = time.time()
+    async_run('sleep 1,no,yes,,,,,\n', 4, workers=4)
+    assert time.time() - start < 3
@@ -0,0 +1,57 @@
+import re
+
+import pytest
+
+from reachlib.SSHWorkerFilter import HostFilter
+from reolib.REOColumnarInventory import REOColumnarInventory
+
+HEADER = ['Name', 'Type', 'Site']
+ROWS = [
+    ['app1', 'Linux', 'DAL'],
+    ['app2', 'AIX', 'DAL'],
+    ['db1', 'Linux', 'NYC'],
+    ['db2', 'AIX', 'NYC'],
+    ['web(1)', 'Linux', 'SIN'],
+]
+
+
+def matching(filter_string):
+    host_filter = HostFilter(filter_string, HEADER)
+    return [row[0] for row in ROWS if host_filter.matches(dict(zip(HEADER, row)))]
+
+
+def selected(filter_string):
+    inventory = REOColumnarInventory(HEADER, ROWS)
+    host_filter = HostFilter(filter_string, HEADER)
+    return [row['Name'] for row in inventory.rows(inventory.row_ids(host_filter.select(inventory)))]
+
+
+@pytest.mark.parametrize('filter_string, names', [
+    ('Name=app1', ['app1']),
+    ('Type!Linux', ['app2', 'db2']),
+    ('Name~db', ['db1', 'db2']),
+    ('Name~app & Type=Linux', ['app1']),
+    ('Site=DAL | Site=SIN', ['app1', 'app2', 'web(1)']),
+    # '&' takes precedence over '|'
+    ('Site=SIN | Name~db & Type=AIX', ['db2', 'web(1)']),
+    ('Name~db & Type=AIX | Site=SIN', ['db2', 'web(1)']),
+    ('(Site=SIN | Name~db) & Type=Linux', ['db1', 'web(1)']),
+    ('((Site=DAL))', ['app1', 'app2']),
+    # Parentheses are part of values outside groups
+    ('Name=web(1)', ['web(1)']),
+])
+def test_filter(filter_string, names):
+    assert matching(filter_string) == names
+    assert selected(filter_string) == names
+
+
+@pytest.mark.parametrize('filter_string, message', [
+    ('Name', "please specify"),
+    ('Name=a=b', "please specify"),
+    ('Rack=1', "cannot be found"),
+    ('(Name=app1', "missing ')'"),
+    ('(Name=app1))', "unexpected ')'"),
+])
+def test_invalid_filter(filter_string, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        HostFilter(filter_string, HEADER)
@@ -0,0 +1,276 @@
+import asyncio
+import logging
+import os
+import re
+import socket
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None  # Optional, only needed for asyncio mode
+
+from .REORemoteHost import REORemoteHost, _PendingPipeline
+
+
+class REOAsyncRemoteHost(REORemoteHost):
+    """
+    asyncio flavor of REORemoteHost (currently implemented using asyncssh) so that a single process can keep
+    thousands of host sessions in flight. It has the same contract as REORemoteHost except that connect_host(),
+    open_shell(), detect_initial_prompt(), set_prompt(), send_cmd_wait_respond(), send_cmds_pipelined() and exec_cmd()
+    are coroutines.
+    """
+    SERVER_STATUS_ASYNC_MISSING = 'The asyncssh module is required for asyncio mode.'
+
+    @classmethod
+    def is_available(cls):
+        """
+        Check if the asyncio driver can be used.
+        :return: True if asyncssh is installed, False otherwise
+        """
+        return asyncssh is not None
+
+    async def connect_host(self, set_prompt=True, u=None, p=None, f=None, conn_timeout=10, cmd_timeout=5,
+                           trust_hosts=False, agent_only=False, exec_mode=False):
+        """
+        Establish connection with host. All authentication methods (agent, private key, user/password) are tried
+        over a single connection.
+        :param set_prompt: Set a personalized prompt
+        :param u: User name
+        :param p: Password
+        :param f: File containing password
+        :param conn_timeout: Connection time-out
+        :param cmd_timeout: Command time-out
+        :param trust_hosts: True to blindly trust hosts, False to use system known_hosts
+        :param agent_only: True to only use agent authentication
+        :param exec_mode: True to run commands over exec channels, the interactive shell is then only opened
+            when needed
+        :return: True if successfully connected, False otherwise
+        """
+        self.connected = False
+        self.exec_mode = exec_mode
+        self.shell_prompt = set_prompt
+        if u: self.usr = u
+        if f: self.key_file = f
+        if p: self.pwd = p
+        self.cmd_timeout = cmd_timeout
+
+        if asyncssh is None:
+            self.connect_status_string = self.SERVER_STATUS_ASYNC_MISSING
+            return False
+
+        self.log(logging.DEBUG, "Connecting to: " + self.host, False)
+        self.log(logging.DEBUG, "CONNECTION_TIMEOUT " + str(conn_timeout), False)
+        self.log(logging.DEBUG, "COMMAND_TIMEOUT " + str(cmd_timeout), False)
+        self.log(logging.DEBUG, "User Name: " + str(self.usr), False)
+
+        # known_hosts=None disables host key checking, () uses the system known_hosts file
+        options = {'port': self.SSH_PORT, 'username': self.usr, 'known_hosts': None if trust_hosts else ()}
+        if agent_only:
+            options['client_keys'] = None
+        else:
+            if self.key_file:
+                if os.path.isfile(self.key_file):
+                    self.log(logging.DEBUG, "Key File: " + self.key_file, False)
+                    options['client_keys'] = [self.key_file]
+                    options['passphrase'] = self.pwd
+                else:
+                    self.log(logging.DEBUG, self.SERVER_STATUS_SSH_KEY_MISSING, False)
+            options['password'] = self.pwd
+
+        try:
+            self.client = await asyncio.wait_for(asyncssh.connect(self.host, **options), conn_timeout)
+            self.connected = True
+            self.log(logging.DEBUG, "Success", False)
+        except asyncssh.PermissionDenied as e:
+            self.connect_status_string = self.SERVER_STATUS_NO_ACCESS
+            self.log(logging.DEBUG, str(e), False)
+        except asyncssh.HostKeyNotVerifiable as e:
+            self.connect_status_string = self.SERVER_STATUS_UNKNOWN_HOST
+            self.log(logging.DEBUG, str(e), False)
+        except asyncssh.Error as e:
+            self.connect_status_string = str(e)
+            self.log(logging.DEBUG, self.connect_status_string, False)
+        except (OSError, asyncio.TimeoutError) as e:
+            self.connect_status_string = self.SERVER_STATUS_UNABLE_TO_REACH
+            self.log(logging.DEBUG, str(e), False)
+
+        if self.connected:
+            self.connect_status_string = self.SERVER_STATUS_CONNECTED
+            if not exec_mode and not await self.open_shell():
+                return False
+            self.log(logging.DEBUG, self.connect_status_string, False)
+
+        return self.connected
+
+    async def open_shell(self):
+        """
+        Open the interactive shell and detect its prompt (set a personalized one if requested).
+        :return: True if the shell is ready, False otherwise (see connect_status_string)
+        """
+        self.shell = await self.client.create_process(term_type='vt100', encoding=None)
+        if not await self.detect_initial_prompt():
+            self.connect_status_string = self.SERVER_STATUS_ERROR_PROMPT
+            self.log(logging.DEBUG, self.connect_status_string, False)
+            return False
+        if self.shell_prompt and self.check_prompt_profile() is not False:
+            prompt_set, output = await self.set_prompt()
+            self.learn_prompt_profile(prompt_set)
+            if not prompt_set:
+                # Continue with old prompt for now and not fail
+                self.connect_status_string = self.SERVER_STATUS_CONNECTED
+        return True
+
+    async def recv(self, timeout):
+        """
+        Read the next output available from the shell.
+        :param timeout: Seconds to wait for output
+        :return: Bytes received
+        """
+        try:
+            data = await asyncio.wait_for(self.shell.stdout.read(self.recv_size), timeout)
+        except asyncio.TimeoutError:
+            raise socket.timeout()
+        if not data:
+            raise socket.timeout('Shell closed')  # EOF, nothing more will come
+        self.adapt_recv_size(len(data))
+        return data
+
+    def send(self, data):
+        """
+        Send a string to the shell.
+        :param data: String to send
+        :return: None
+        """
+        self.shell.stdin.write(data.encode("utf-8"))
+
+    async def detect_initial_prompt(self):
+        """
+        Detect initial prompt
+        :return: True/False for success/failure
+        """
+        self.log(logging.DEBUG, "Detect initial prompt start", False)
+        match = None
+        output = ''
+        decoder = self.new_decoder()
+        while match is None:
+            try:
+                output += decoder.decode(await self.recv(self.PROMPT_DETECTION_TIMEOUT))
+                match = re.search(self.original_prompt_regex, output)
+            except socket.timeout:
+                return False
+            except Exception as e:
+                self.log(logging.DEBUG, str(e), False)
+                return False
+        self.initial_prompt = self.prompt_line(output)
+        self.log(logging.DEBUG, "Detect initial prompt success", False)
+        return True
+
+    async def set_prompt(self):
+        """
+        Try to set the prompt to a personalized one.
+        :return: True/False for success/failure, output
+        """
+        self.log(logging.DEBUG, "Set prompt start", False)
+        self.send("PS1=$PS1'" + self.new_prompt + "'\n")  # In case of sh-style
+        output = ''
+        decoder = self.new_decoder()
+        matches = []
+        while len(matches) != 2:
+            try:
+                output += decoder.decode(await self.recv(self.PROMPT_SET_TIMEOUT))
+                matches = re.findall(self.new_prompt_regex[:-1], output)
+            except socket.timeout:
+                self.expected_prompt_regex = self.original_prompt_regex
+                return False, output
+        self.expected_prompt_regex = self.new_prompt_regex
+        self.log(logging.DEBUG, "Set prompt success", False)
+
+        return True, output
+
+    async def send_cmd_wait_respond(self, command, search_string='', wait_string='', response_string='',
+                                    last_run_log=None):
+        """
+        This method will send a command to the server and search for a "search" string.
+        It can optionally, wait for subsequent strings and send a response string.
+        :param last_run_log: Log file for results of the last run
+        :param command: Command to send
+        :param search_string: Search string(s)
+        :param wait_string: String(s) to expect
+        :param response_string: String(s) to use as a response for wait_strings
+        :return: Output of command, error_msg (or '')
+        """
+        if self.use_exec(command, wait_string):
+            return await self.exec_cmd(command, search_string, last_run_log)
+        if self.shell is None and not await self.open_shell():
+            return '', self.connect_status_string
+
+        pending = self.start_command(command, search_string, wait_string, response_string)
+
+        # Send the command to the host
+        self.send(pending.command_line + "\n")
+
+        while not pending.completed:
+            # Continuously read output until wait strings are found or timeout reached
+            try:
+                response = pending.feed(await self.recv(self.cmd_timeout))
+                if response is not None:
+                    self.send(response)
+            except socket.timeout:
+                pending.timeout(last_run_log)
+                break
+
+        pending.finish(last_run_log)
+
+        if pending.is_sudo:
+            await self.set_prompt()
+
+        return pending.output(), pending.error_msg
+
+    async def send_cmds_pipelined(self, commands):
+        """
+        Send commands at once, each followed by a sentinel delimiting its output (see REORemoteHost).
+        :param commands: List of tuples of: command, search string(s)
+        :return: List of tuples of: output, error_msg (or ''), search string found, exit status, last run log output
+            for each command processed (up to the one that timed out)
+        """
+        pipeline = _PendingPipeline(self, commands)
+
+        # Send the commands to the host
+        self.send(pipeline.command_line + "\n")
+
+        while not pipeline.completed:
+            try:
+                pipeline.feed(await self.recv(self.cmd_timeout))
+            except socket.timeout:
+                pipeline.timeout()
+                break
+
+        return pipeline.results()
+
+    async def exec_cmd(self, command, search_string='', last_run_log=None):
+        """
+        Run a command over an exec channel: no echo, no prompt, the output (stdout and stderr) is read to the end
+        and the exit status is kept (see exit_status). Search strings are evaluated as in send_cmd_wait_respond().
+        :param command: Command to run
+        :param search_string: Search string(s)
+        :param last_run_log: Log file for results of the last run
+        :return: Output of command, error_msg (or '')
+        """
+        pending = self.start_command(command, search_string, interactive=False)
+        process = await self.client.create_process(command, encoding=None, stderr=asyncssh.STDOUT)
+        try:
+            while not pending.completed:
+                data = await asyncio.wait_for(process.stdout.read(self.recv_size), self.cmd_timeout)
+                if data:
+                    self.adapt_recv_size(len(data))
+                    pending.feed(data)
+                else:
+                    pending.completed = True  # EOF
+            self.exit_status = (await asyncio.wait_for(process.wait(), self.cmd_timeout)).exit_status
+        except asyncio.TimeoutError:
+            pending.timeout(last_run_log)
+        finally:
+            process.close()
+
+        pending.finish(last_run_log)
+        return pending.output(), pending.error_msg
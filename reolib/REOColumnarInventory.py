@@ -0,0 +1,242 @@
+import bisect
+import collections
+import itertools
+from array import array
+
+
+class REOColumnarInventory(object):
+    """
+    Read-only, column oriented and indexed copy of a delimited hosts file (see REODelimitedFile) for large
+    inventories. A row is identified by its position (row id) and only turned into a dict when iterated, so
+    conditions resolve to sets of row ids combined by intersection and union.
+    Each column is indexed: its distinct values are sorted (the position of a value being its code), the code of
+    each row is kept in an array and the row ids are grouped by code (hash index, for '=' and '!'), and the codes
+    of the values containing each n-gram are kept (n-gram index, for '~'). Building the indexes costs more than
+    scanning the columns once, so they are built once and kept in a cache (see from_file()).
+    Arrays are stored as bytes in the cache, which makes it fast to load.
+    """
+    NGRAM_SIZE = 3
+    """Length of the n-grams indexed for substring search"""
+
+    CODE_TYPE = 'I'
+    """Array type code of the value codes and row ids"""
+
+    def __init__(self, header_list, rows_values=(), records=None):
+        """
+        Class constructor
+        :param header_list: Header (column names)
+        :param rows_values: Iterable of rows, lists of values in the header order
+        :param records: Columns and indexes already built (see records()), rows_values is ignored if given
+        """
+        self.header_list = list(header_list)
+        """Header (column names)"""
+
+        self.row_count = 0
+        """Number of rows"""
+
+        self.values = {}
+        """Sorted distinct values of each column by column name"""
+
+        self.codes = {}
+        """Code of the value of each row (array) by column name"""
+
+        self.postings = {}
+        """Row ids grouped by code, in inventory order for each code (array), by column name"""
+
+        self.offsets = {}
+        """Start of the row ids of each code in the postings, and their end (array), by column name"""
+
+        self.ngram_indexes = {}
+        """N-gram indexes (dict of n-gram -> codes of the values containing it, as array bytes) by column name"""
+
+        if records is not None:
+            self.row_count, columns = records
+            for name, (values, codes, postings, offsets, ngram_index) in zip(self.header_list, columns):
+                self.values[name] = values
+                self.codes[name] = array(self.CODE_TYPE, codes)
+                self.postings[name] = array(self.CODE_TYPE, postings)
+                self.offsets[name] = array(self.CODE_TYPE, offsets)
+                self.ngram_indexes[name] = ngram_index
+            return
+
+        columns = [[] for name in self.header_list]
+        positions = list(enumerate(columns))
+        for values in rows_values:
+            for i, column in positions:
+                column.append(values[i] if i < len(values) else '')
+            self.row_count += 1
+
+        for name, column in zip(self.header_list, columns):
+            self.build_indexes(name, column)
+
+    @classmethod
+    def from_file(cls, delimited_file, cache=None):
+        """
+        Load a delimited file, from the cache if the file didn't change since cached (the cache is updated
+        otherwise).
+        :param delimited_file: REODelimitedFile instance (with a header)
+        :param cache: Optional cache of the columns and indexes (REOInventoryCache, not the one of the parsed rows)
+        :return: REOColumnarInventory instance
+        """
+        if cache is None:
+            return cls(delimited_file.header_list, delimited_file.rows_values())
+
+        key = cache.key(delimited_file.file_name, delimited_file.delimiter, delimited_file.has_header)
+        records = cache.load(delimited_file.file_name, key)
+        if records is not None:
+            return cls(delimited_file.header_list, records=records)
+
+        inventory = cls(delimited_file.header_list, delimited_file.rows_values())
+        cache.save(delimited_file.file_name, key, inventory.records())
+        return inventory
+
+    def records(self):
+        """
+        Get the columns and indexes in a form that can be cached (marshal).
+        :return: Tuple of: number of rows, list of tuples per column of: values, codes, postings, offsets (bytes),
+            n-gram index
+        """
+        return self.row_count, [(self.values[name], self.codes[name].tobytes(), self.postings[name].tobytes(),
+                                 self.offsets[name].tobytes(), self.ngram_indexes[name])
+                                for name in self.header_list]
+
+    def build_indexes(self, name, column):
+        """
+        Build the indexes of a column.
+        :param name: Column name
+        :param column: Values of the column (list, in inventory order)
+        :return: None
+        """
+        values = self.values[name] = sorted(set(column))
+        codes = self.codes[name] = array(self.CODE_TYPE, map(dict(zip(values, itertools.count())).__getitem__,
+                                                             column))
+
+        # Row ids sorted by code (stable: in inventory order for each code)
+        self.postings[name] = array(self.CODE_TYPE, sorted(range(len(codes)), key=codes.__getitem__))
+        counts = collections.Counter(codes)
+        counts = [counts[code] for code in range(len(values))]
+        self.offsets[name] = array(self.CODE_TYPE, itertools.accumulate(counts, initial=0))
+
+        ngram_index = collections.defaultdict(list)
+        for code, value in enumerate(values):
+            for ngram in self.ngrams(value):
+                ngram_index[ngram].append(code)
+        self.ngram_indexes[name] = dict((ngram, array(self.CODE_TYPE, ngram_codes).tobytes())
+                                        for ngram, ngram_codes in ngram_index.items())
+
+    @classmethod
+    def ngrams(cls, value):
+        """
+        Get the n-grams of a value.
+        :param value: Value
+        :return: Set of n-grams
+        """
+        return set(map(''.join, zip(*[value[i:] for i in range(cls.NGRAM_SIZE)])))
+
+    def __len__(self):
+        return self.row_count
+
+    def row(self, row_id):
+        """
+        Get a row.
+        :param row_id: Row id
+        :return: Row as a dict keyed by column name
+        """
+        return dict((name, self.values[name][self.codes[name][row_id]]) for name in self.header_list)
+
+    def rows(self, row_ids):
+        """
+        Generator of rows, built as iterated.
+        :param row_ids: Row ids, in the order rows are wanted
+        :return: Rows as dicts keyed by column name
+        """
+        for row_id in row_ids:
+            yield self.row(row_id)
+
+    def all_ids(self):
+        """
+        Get all row ids.
+        :return: Set of row ids
+        """
+        return set(range(self.row_count))
+
+    def code_rows(self, name, code):
+        """
+        Get the rows of a value code (hash index).
+        :param name: Column name
+        :param code: Value code
+        :return: Array of row ids
+        """
+        offsets = self.offsets[name]
+        return self.postings[name][offsets[code]:offsets[code + 1]]
+
+    def equal(self, name, value):
+        """
+        Get the rows with a column equal to a value.
+        :param name: Column name
+        :param value: Value
+        :return: Set of row ids
+        """
+        values = self.values[name]
+        code = bisect.bisect_left(values, value)
+        if code < len(values) and values[code] == value:
+            return set(self.code_rows(name, code))
+        return set()
+
+    def not_equal(self, name, value):
+        """
+        Get the rows with a column not equal to a value.
+        :param name: Column name
+        :param value: Value
+        :return: Set of row ids
+        """
+        return self.all_ids() - self.equal(name, value)
+
+    def contains(self, name, value):
+        """
+        Get the rows with a column containing a value.
+        :param name: Column name
+        :param value: Value
+        :return: Set of row ids
+        """
+        values = self.values[name]
+        if len(value) < self.NGRAM_SIZE:
+            candidates = range(len(values))  # Too short for the n-gram index, all distinct values are checked
+        else:
+            # The values containing the least common n-gram of the value, checked next
+            ngram_index = self.ngram_indexes[name]
+            candidates = array(self.CODE_TYPE, min((ngram_index.get(ngram, b'') for ngram in self.ngrams(value)),
+                                                   key=len))
+
+        row_ids = set()
+        for code in candidates:
+            if value in values[code]:
+                row_ids.update(self.code_rows(name, code))
+        return row_ids
+
+    @staticmethod
+    def intersection(selections):
+        """
+        Get the rows in all selections.
+        :param selections: List of sets of row ids
+        :return: Set of row ids
+        """
+        return set.intersection(*sorted(selections, key=len))
+
+    @staticmethod
+    def union(selections):
+        """
+        Get the rows in any selection.
+        :param selections: List of sets of row ids
+        :return: Set of row ids
+        """
+        return set.union(*selections)
+
+    @staticmethod
+    def row_ids(selection):
+        """
+        Get the row ids of a selection in inventory order.
+        :param selection: Set of row ids
+        :return: List of row ids
+        """
+        return sorted(selection)
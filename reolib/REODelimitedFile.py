@@ -1,3 +1,4 @@
+import csv
 import logging
 import sys
 
@@ -6,17 +7,22 @@ from .REOUtility import REOUtility
 
 class REODelimitedFile(object):
     """
-    This class is an abstraction of a delimited file and implements and iterator.
-    Iterator automatically ignores white spaces as well as return a dict if headers
-    are defined, or a list of values otherwise.
+    This class is an abstraction of a delimited file and implements an iterator.
+    Fields are parsed with the csv module (quoted fields may contain the delimiter), white spaces around
+    values are ignored, as well as blank lines. Iteration returns a dict per row if headers are defined,
+    or a list of values otherwise. The file is parsed once, on first use, and its rows kept for the next
+    iterations; the number of rows is known once parsed. With a cache (REOInventoryCache), the rows are
+    loaded from the cache instead, unless the file changed since cached.
     """
 
-    def __init__(self, file_src='', delimiter=",", has_header=False, logger=None):
+    def __init__(self, file_src='', delimiter=",", has_header=False, logger=None, cache=None):
         """
         Class constructor
         :param file_src: Source file
-        :param delimiter: Delimiter character(s)
+        :param delimiter: Delimiter character
         :param has_header: True if headers exist, False otherwise
+        :param logger: Optional logger (from logging module)
+        :param cache: Optional cache of the parsed rows (REOInventoryCache)
         """
         self.delimiter = delimiter
         """Delimiter character used. Default is a comma."""
@@ -24,17 +30,20 @@ class REODelimitedFile(object):
         self.file_name = file_src
         """File path of delimited file"""
 
-        self.infile = None
-        """File handle for delimited file"""
-
         self.current_row = None
         """Current row (list of dict) being processed"""
 
         self.has_header = has_header
         """Header existence indicator flag"""
 
-        self.row_count = 0
-        """Number of rows in file"""
+        self.rows = None
+        """Rows parsed (lists of values), None until parsed"""
+
+        self.parsed = False
+        """True once the whole file is parsed into rows"""
+
+        self.row_count = None
+        """Number of rows in file (None until parsed)"""
 
         self.header_list = None
         """Header row as a list"""
@@ -42,62 +51,99 @@ class REODelimitedFile(object):
         self.logger = logger
         """Optional logger (from logging module) for this class """
 
+        self.cache = cache
+        """Optional cache of the parsed rows (REOInventoryCache)"""
+
+        if self.has_header:
+            for values in self.__read():
+                self.header_list = values
+                break
+            else:
+                self.header_list = []
+        else:
+            self.__open().close()  # Check the file can be read
+
+    def __open(self):
+        """
+        Open the file.
+        :return: File object
+        """
         try:
-            self.infile = open(self.file_name, 'r')
+            return open(self.file_name, 'r', newline='')
         except KeyboardInterrupt:
             REOUtility.key_interrupt()
         except:
             self.log(logging.ERROR, "Aborting...File: " + self.file_name + " not found.", True)
             sys.exit(1)
 
-        if self.has_header:
-            self.header_list = self.infile.readline().split(self.delimiter)
-            # Strip any leading/trailing spaces from headers
-            self.header_list = [header.strip() for header in self.header_list]
+    def __read(self):
+        """
+        Generator of the records of the file (header included), blank lines skipped.
+        :return: Lists of values (leading/trailing spaces stripped)
+        """
+        with self.__open() as infile:
+            for record in csv.reader(infile, delimiter=self.delimiter, skipinitialspace=True):
+                if not record or (len(record) == 1 and not record[0].strip()):
+                    continue
+                yield [val.strip() for val in record]
 
-        # Count hosts once right away
-        self.row_count = 1 if not self.header_list else 0
-        for i in self.infile:
-            self.row_count += 1
+    def rows_values(self):
+        """
+        Generator of the rows as lists of values, in the column order of the header (no dict created).
+        The file is parsed as rows are consumed the first time, the rows parsed are kept for the next times.
+        :return: Lists of values
+        """
+        if self.parsed:
+            for values in self.rows:
+                yield values
+            return
+
+        key = None
+        if self.cache:
+            key = self.cache.key(self.file_name, self.delimiter, self.has_header)
+            rows = self.cache.load(self.file_name, key)
+            if rows is not None:
+                self.rows, self.parsed, self.row_count = rows, True, len(rows)
+                for values in rows:
+                    yield values
+                return
+
+        rows = self.rows = []
+        records = self.__read()
+        if self.has_header:
+            next(records, None)
+        for values in records:
+            rows.append(values)
+            yield values
+        self.parsed = True
+        self.row_count = len(rows)
+        if self.cache:
+            self.cache.save(self.file_name, key, rows)
 
     def __iter__(self):
         """
-        Iterator over lines in the file
-        :return: self instance
+        Iterator over rows in the file
+        :return: Rows: if headers exist, dicts, lists otherwise.
         """
-        self.infile.seek(0)
-        if self.header_list:
-            next(self.infile)
-        return self
+        for values in self.rows_values():
+            if self.header_list:
+                # Headers found return row as a dict
+                self.current_row = dict(list(zip(self.header_list, values)))
+            else:
+                # No headers found, return row as a list
+                self.current_row = values
+            yield self.current_row
 
     def __len__(self):
         """
-        Return the number of rows
+        Return the number of rows (the file is parsed if not done yet)
         :return: Number of rows
         """
+        if self.row_count is None:
+            for values in self.rows_values():
+                pass
         return self.row_count
 
-    def __next__(self):
-        """
-        Get the next row in the file.
-        :return:  If headers exist, a dict, a list otherwise.
-        """
-        # Move read head past blank lines and implicitly stops iteration when EOL is reached.
-        rowdata = next(self.infile)
-        while not rowdata.strip():
-            rowdata = next(self.infile)
-
-        # Strip any leading/trailing spaces from data fields
-        host_values = [val.strip() for val in rowdata.split(self.delimiter)]
-
-        if self.header_list:
-            # Headers found return row as a dict
-            self.current_row = dict(list(zip(self.header_list, host_values)))
-        else:
-            # No headers found, return row as a list
-            self.current_row = host_values
-        return self.current_row
-
     def get_row_val(self, row=None, col_idx=0, name=''):
         """
         Get host row value by index or name
@@ -122,6 +168,18 @@ class REODelimitedFile(object):
 
         return row[col_name]
 
+    def __getstate__(self):
+        """
+        Pickle support (e.g. sent to another process): rows parsed are not carried over (parsed again if
+        iterated), only their number.
+        :return: State dict
+        """
+        state = self.__dict__.copy()
+        state['rows'] = None
+        state['parsed'] = False
+        state['current_row'] = None
+        return state
+
     def log(self, level, message, print_to_screen=False):
         """
         Logging mechanism if defined.
@@ -134,11 +192,3 @@ class REODelimitedFile(object):
             print(message)
         if self.logger:
             self.logger.log(level, message)
-
-    def __del__(self):
-        """
-        Class destructor. Close the file.
-        :return:
-        """
-        if self.infile:
-            self.infile.close()
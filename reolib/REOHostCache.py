@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import threading
+
+
+class REOHostCache(object):
+    """
+    Small persistent (JSON file) cache of what was learned about hosts in previous runs, like the
+    authentication method accepted. Entries are dicts of fields keyed by a host key (e.g. user@host).
+    The file is read once when first needed; changes are merged into the file when saved, so that several
+    processes sharing the file only overwrite the entries they changed.
+    """
+
+    def __init__(self, file_name, logger=None):
+        """
+        Class constructor
+        :param file_name: Cache file
+        :param logger: Optional logger (from logging module)
+        """
+        self.file_name = file_name
+        """Cache file"""
+
+        self.logger = logger
+        """Optional logger (from logging module) for this class"""
+
+        self.entries = None
+        """Cached entries by key (None until loaded)"""
+
+        self.changed = set()
+        """Keys of entries changed since loaded"""
+
+        self.lock = threading.Lock()
+        """Lock for entries, hosts may be processed concurrently"""
+
+    def get(self, key, field, default=None):
+        """
+        Get a field of an entry.
+        :param key: Entry key
+        :param field: Field name
+        :param default: Value returned if not cached
+        :return: Field value
+        """
+        with self.lock:
+            self.__load()
+            return self.entries.get(key, {}).get(field, default)
+
+    def update(self, key, **fields):
+        """
+        Set fields of an entry.
+        :param key: Entry key
+        :param fields: Field values
+        :return: None
+        """
+        with self.lock:
+            self.__load()
+            entry = self.entries.setdefault(key, {})
+            if any(entry.get(field) != value for field, value in fields.items()):
+                entry.update(fields)
+                self.changed.add(key)
+
+    def discard(self, key, *fields):
+        """
+        Remove fields of an entry (e.g. no longer valid).
+        :param key: Entry key
+        :param fields: Field names
+        :return: None
+        """
+        with self.lock:
+            self.__load()
+            entry = self.entries.get(key, {})
+            for field in fields:
+                if field in entry:
+                    del entry[field]
+                    self.changed.add(key)
+
+    def save(self):
+        """
+        Merge changed entries into the cache file.
+        :return: None
+        """
+        with self.lock:
+            if not self.changed:
+                return
+            entries = self.__read()
+            for key in self.changed:
+                if self.entries.get(key):
+                    entries[key] = self.entries[key]
+                else:
+                    entries.pop(key, None)
+            temp_file = self.file_name + '.' + str(os.getpid())
+            try:
+                with open(temp_file, 'w') as outfile:
+                    json.dump(entries, outfile, indent=1, sort_keys=True)
+                os.replace(temp_file, self.file_name)
+                self.changed.clear()
+            except (IOError, OSError) as e:
+                self.log(logging.WARNING, "Unable to save host cache " + self.file_name + ": " + str(e))
+
+    def __load(self):
+        """
+        Read the cache file if not done yet (lock held).
+        :return: None
+        """
+        if self.entries is None:
+            self.entries = self.__read()
+
+    def __read(self):
+        """
+        Read the cache file.
+        :return: Entries dict (empty if no valid file)
+        """
+        try:
+            with open(self.file_name, 'r') as infile:
+                entries = json.load(infile)
+            if isinstance(entries, dict):
+                return entries
+        except (IOError, OSError, ValueError) as e:
+            if os.path.exists(self.file_name):
+                self.log(logging.WARNING, "Ignoring invalid host cache " + self.file_name + ": " + str(e))
+        return {}
+
+    def __getstate__(self):
+        """
+        Pickle support (e.g. sent to another process): the lock is not carried over.
+        :return: State dict
+        """
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        """
+        Unpickle support.
+        :param state: State dict
+        :return: None
+        """
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def log(self, level, message):
+        """
+        Logging mechanism if defined.
+        :param level: Log level
+        :param message: Message
+        :return: None
+        """
+        if self.logger:
+            self.logger.log(level, message)
@@ -0,0 +1,136 @@
+import gc
+import hashlib
+import logging
+import marshal
+import mmap
+import os
+import struct
+import time
+
+
+class REOInventoryCache(object):
+    """
+    Binary (marshal) cache of parsed delimited files, so that a large inventory is only parsed again when it
+    changes. Each file is cached in its own cache file, named after its path, along with the key it was parsed
+    with: path, size, modification time and delimiter. A cache file not matching the key is ignored and
+    replaced by the next save.
+    Cache files are the length of the marshaled key, the key, then the marshaled records: the file is memory
+    mapped and the records only unmarshaled if the key matches.
+    """
+    FORMAT_VERSION = 1
+    """Version of the cache file content, cache files of other versions are ignored"""
+
+    KEY_SIZE = struct.Struct('<I')
+    """Length of the marshaled key at the start of cache files"""
+
+    def __init__(self, prefix, logger=None):
+        """
+        Class constructor
+        :param prefix: Cache files path prefix (e.g. logs/reach_inventory_cache), completed per cached file
+        :param logger: Optional logger (from logging module)
+        """
+        self.prefix = prefix
+        """Cache files path prefix"""
+
+        self.logger = logger
+        """Optional logger (from logging module) for this class"""
+
+    def cache_file(self, file_name):
+        """
+        Get the cache file of a file.
+        :param file_name: Cached file
+        :return: Cache file path
+        """
+        return self.prefix + '_' + hashlib.sha1(os.path.abspath(file_name).encode()).hexdigest()[:16] + '.bin'
+
+    def key(self, file_name, delimiter, has_header):
+        """
+        Get the key a file is cached with, to be taken before the file is parsed: if it changes while parsed,
+        the key saved no longer matches.
+        :param file_name: Cached file
+        :param delimiter: Delimiter character
+        :param has_header: True if the file has a header (not part of the records cached)
+        :return: Key tuple (None if the file cannot be read)
+        """
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            return None
+        return (self.FORMAT_VERSION, os.path.abspath(file_name), stat.st_size, stat.st_mtime_ns, delimiter,
+                has_header)
+
+    def age(self, file_name):
+        """
+        Get the age of the cache of a file.
+        :param file_name: Cached file
+        :return: Seconds since cached, None if not cached
+        """
+        try:
+            return time.time() - os.path.getmtime(self.cache_file(file_name))
+        except OSError:
+            return None
+
+    def load(self, file_name, key):
+        """
+        Get the cached records of a file.
+        :param file_name: Cached file
+        :param key: Key of the file as it is now (see key())
+        :return: List of records (lists of values), None if not cached or the file changed
+        """
+        if key is None:
+            return None
+        try:
+            with open(self.cache_file(file_name), 'rb') as fin, \
+                    mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as data, memoryview(data) as view:
+                start = self.KEY_SIZE.size + self.KEY_SIZE.unpack_from(data)[0]
+                if marshal.loads(view[self.KEY_SIZE.size:start]) != key:
+                    self.log(logging.DEBUG, "Inventory cache of " + file_name + " outdated, parsing the file again.")
+                    return None
+                # Garbage collection is triggered by the many lists created, but they are not collectable
+                gc_enabled = gc.isenabled()
+                gc.disable()
+                try:
+                    records = marshal.loads(view[start:])
+                finally:
+                    if gc_enabled:
+                        gc.enable()
+        except (OSError, EOFError, ValueError, TypeError, struct.error):
+            return None
+        self.log(logging.DEBUG, "Inventory " + file_name + " loaded from cache: " + self.cache_file(file_name))
+        return records
+
+    def save(self, file_name, key, records):
+        """
+        Cache the records of a file (written to a temporary file then renamed, as other runs may read it).
+        :param file_name: Cached file
+        :param key: Key of the file taken before it was parsed (see key())
+        :param records: List of records (lists of values)
+        :return: None
+        """
+        if key is None:
+            return
+        cache_file = self.cache_file(file_name)
+        temp_file = cache_file + '.' + str(os.getpid())
+        try:
+            with open(temp_file, 'wb') as fout:
+                key_data = marshal.dumps(key)
+                fout.write(self.KEY_SIZE.pack(len(key_data)))
+                fout.write(key_data)
+                marshal.dump(records, fout)
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            self.log(logging.WARNING, "Unable to write inventory cache " + cache_file + ": " + str(e))
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+
+    def log(self, level, message):
+        """
+        Logging mechanism if defined.
+        :param level: Log level
+        :param message: Message
+        :return: None
+        """
+        if self.logger:
+            self.logger.log(level, message)
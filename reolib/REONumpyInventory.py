@@ -0,0 +1,145 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None  # Optional, only needed for the numpy filter backend
+
+
+class REONumpyInventory(object):
+    """
+    NumPy flavor of REOColumnarInventory for very large inventories (millions of rows): each column is stored
+    as a categorical array (distinct values and an array of value codes per row), so that conditions are
+    evaluated as boolean masks over all rows at once and combined with '&' and '|' in vectorized passes.
+    It has the same contract as REOColumnarInventory, selections being boolean masks instead of sets of row ids.
+    """
+
+    @classmethod
+    def is_available(cls):
+        """
+        Check if the numpy backend can be used.
+        :return: True if numpy is installed, False otherwise
+        """
+        return numpy is not None
+
+    def __init__(self, header_list, rows_values):
+        """
+        Class constructor
+        :param header_list: Header (column names)
+        :param rows_values: Iterable of rows, lists of values in the header order
+        """
+        self.header_list = list(header_list)
+        """Header (column names)"""
+
+        positions = dict((name, i) for i, name in enumerate(self.header_list))
+        values_lists = dict((name, []) for name in positions)
+        columns = [(values_lists[name], i) for name, i in positions.items()]
+        for values in rows_values:
+            for column, i in columns:
+                column.append(values[i] if i < len(values) else '')
+
+        self.row_count = len(values_lists[self.header_list[0]]) if self.header_list else 0
+        """Number of rows"""
+
+        self.categories = {}
+        """Distinct values (numpy array) of each column by column name"""
+
+        self.codes = {}
+        """Code (index in the column categories) of the value of each row (numpy array) by column name"""
+
+        self.category_codes = {}
+        """Dict of value -> code of each column by column name"""
+
+        for name, values in values_lists.items():
+            category_codes = self.category_codes[name] = {}
+            self.codes[name] = numpy.fromiter((category_codes.setdefault(value, len(category_codes))
+                                               for value in values), dtype=numpy.int32, count=len(values))
+            self.categories[name] = numpy.array(list(category_codes), dtype=str)
+
+    @classmethod
+    def from_file(cls, delimited_file):
+        """
+        Load a delimited file.
+        :param delimited_file: REODelimitedFile instance (with a header)
+        :return: REONumpyInventory instance
+        """
+        return cls(delimited_file.header_list, delimited_file.rows_values())
+
+    def __len__(self):
+        return self.row_count
+
+    def row(self, row_id):
+        """
+        Get a row.
+        :param row_id: Row id
+        :return: Row as a dict keyed by column name
+        """
+        return dict((name, str(self.categories[name][self.codes[name][row_id]])) for name in self.header_list)
+
+    def rows(self, row_ids):
+        """
+        Generator of rows, built as iterated.
+        :param row_ids: Row ids, in the order rows are wanted
+        :return: Rows as dicts keyed by column name
+        """
+        for row_id in row_ids:
+            yield self.row(row_id)
+
+    def equal(self, name, value):
+        """
+        Get the rows with a column equal to a value.
+        :param name: Column name
+        :param value: Value
+        :return: Boolean mask of the rows
+        """
+        code = self.category_codes[name].get(value)
+        if code is None:
+            return numpy.zeros(self.row_count, dtype=bool)
+        return self.codes[name] == code
+
+    def not_equal(self, name, value):
+        """
+        Get the rows with a column not equal to a value.
+        :param name: Column name
+        :param value: Value
+        :return: Boolean mask of the rows
+        """
+        return ~self.equal(name, value)
+
+    def contains(self, name, value):
+        """
+        Get the rows with a column containing a value: the distinct values are searched, then mapped to the rows.
+        :param name: Column name
+        :param value: Value
+        :return: Boolean mask of the rows
+        """
+        categories = self.categories[name]
+        if not len(categories):
+            return numpy.zeros(self.row_count, dtype=bool)
+        matching = numpy.char.find(categories, value) >= 0
+        return matching[self.codes[name]]
+
+    @staticmethod
+    def intersection(selections):
+        """
+        Get the rows in all selections.
+        :param selections: List of boolean masks
+        :return: Boolean mask
+        """
+        return numpy.logical_and.reduce(selections)
+
+    @staticmethod
+    def union(selections):
+        """
+        Get the rows in any selection.
+        :param selections: List of boolean masks
+        :return: Boolean mask
+        """
+        return numpy.logical_or.reduce(selections)
+
+    @staticmethod
+    def row_ids(selection):
+        """
+        Get the row ids of a selection in inventory order.
+        :param selection: Boolean mask
+        :return: List of row ids
+        """
+        return numpy.flatnonzero(selection).tolist()
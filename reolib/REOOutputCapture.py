@@ -0,0 +1,94 @@
+class REOOutputCapture(object):
+    """
+    Bounded capture of a command's output: the first and the last bytes are kept in memory (head and tail),
+    what is between is dropped, so memory stays flat whatever the output size. The full output can optionally
+    be spilled (appended as received) to a file.
+    """
+    SKIPPED_MARKER = '\n... [{0} bytes not kept{1}] ...\n'
+    """Marker replacing the output dropped between head and tail"""
+
+    def __init__(self, head_size=0, tail_size=0, spill_file=None):
+        """
+        Class constructor
+        :param head_size: Number of first bytes kept (0 with tail_size 0 to keep everything)
+        :param tail_size: Number of last bytes kept
+        :param spill_file: Optional file the full output is appended to
+        """
+        self.head_size = head_size
+        """Number of first bytes kept"""
+
+        self.tail_size = tail_size
+        """Number of last bytes kept"""
+
+        self.bounded = bool(head_size or tail_size)
+        """True if the capture is bounded, False to keep everything"""
+
+        self.spill_file = spill_file
+        """File the full output is appended to (None for no spill)"""
+
+        self.head = bytearray()
+        """First bytes of the output (or all of it if not bounded)"""
+
+        self.tail = bytearray()
+        """Last bytes of the output (possibly a little more than tail_size, trimmed when read)"""
+
+        self.size = 0
+        """Total number of bytes captured"""
+
+        self.spill = None
+        """Spill file object, opened with the first bytes"""
+
+    def write(self, data):
+        """
+        Capture output.
+        :param data: Bytes received
+        :return: None
+        """
+        self.size += len(data)
+        if self.spill_file:
+            if self.spill is None:
+                self.spill = open(self.spill_file, 'ab')
+            self.spill.write(data)
+
+        if not self.bounded:
+            self.head += data
+            return
+
+        if len(self.head) < self.head_size:
+            room = self.head_size - len(self.head)
+            self.head += data[:room]
+            data = data[room:]
+        if data and self.tail_size:
+            self.tail += data
+            if len(self.tail) > self.tail_size * 2:  # Trim once in a while, not for every chunk
+                del self.tail[:-self.tail_size]
+
+    def skipped(self):
+        """
+        Get the number of bytes dropped between head and tail.
+        :return: Number of bytes
+        """
+        return max(self.size - len(self.head) - self.tail_size, 0) if self.bounded else 0
+
+    def getvalue(self):
+        """
+        Get the output kept, decoded. Output dropped is replaced with a marker.
+        :return: Output string
+        """
+        if self.tail_size:
+            del self.tail[:-self.tail_size]
+        skipped = self.skipped()
+        if not skipped:
+            return (self.head + self.tail).decode('utf-8', errors='replace')
+        spilled = ', full output in ' + self.spill_file if self.spill_file else ''
+        return (self.head.decode('utf-8', errors='replace') + self.SKIPPED_MARKER.format(skipped, spilled) +
+                self.tail.decode('utf-8', errors='replace'))
+
+    def close(self):
+        """
+        Close the spill file if open.
+        :return: None
+        """
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
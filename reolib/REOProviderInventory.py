@@ -0,0 +1,278 @@
+import csv
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+
+from .REOUtility import REOUtility
+
+
+class REOProviderInventory(object):
+    """
+    Hosts inventory printed by an executable (inventory provider), with the interface of REODelimitedFile.
+    The provider prints either CSV (header row first), JSON lines (one object per host) or a JSON array of
+    objects; the header of JSON output is the keys of the first object, values missing from other objects are
+    empty. Rows are read as the provider prints them, so that hosts are processed before it finishes.
+    With a cache (REOInventoryCache) and a TTL, the output is cached: a cache younger than the TTL is used as is,
+    an older one is used as well while the provider is run again in the background to refresh it (abandoned if
+    still running when the run ends).
+    """
+    CACHE_OPTIONS = 'provider'
+    """Delimiter part of the cache key, telling cached provider output from cached files"""
+
+    def __init__(self, file_src, cache=None, ttl=0, logger=None):
+        """
+        Class constructor
+        :param file_src: Inventory provider (executable)
+        :param cache: Optional cache of the provider output (REOInventoryCache)
+        :param ttl: Seconds the cached output is used without being refreshed (0 to not cache)
+        :param logger: Optional logger (from logging module)
+        """
+        self.file_name = file_src
+        """Inventory provider (executable)"""
+
+        self.cache = cache if ttl > 0 else None
+        """Optional cache of the provider output (REOInventoryCache), None if not cached"""
+
+        self.ttl = ttl
+        """Seconds the cached output is used without being refreshed"""
+
+        self.logger = logger
+        """Optional logger (from logging module) for this class"""
+
+        self.current_row = None
+        """Current row (dict) being processed"""
+
+        self.rows = None
+        """Rows read (lists of values), None until read"""
+
+        self.parsed = False
+        """True once the whole output is read into rows"""
+
+        self.row_count = None
+        """Number of rows (None until the whole output is read)"""
+
+        self.records = None
+        """Generator of the provider output being read (see read_records()), None if not running"""
+
+        self.refresh_thread = None
+        """Thread refreshing the cache in the background, None if not refreshing"""
+
+        self.header_list = None
+        """Header row as a list"""
+
+        cached = None
+        if self.cache:
+            cached = self.cache.load(self.file_name, self.__cache_key())
+        if cached:
+            self.header_list, self.rows = cached[0], cached[1:]
+            self.parsed, self.row_count = True, len(self.rows)
+            age = self.cache.age(self.file_name)
+            if age is not None and age > self.ttl:
+                self.log(logging.DEBUG, "Inventory provider output cached " + str(int(age)) +
+                         " seconds ago, refreshing it in the background.")
+                # Not waited for at exit: a slow provider doesn't hold the run, the cache is refreshed next time
+                self.refresh_thread = threading.Thread(target=self.refresh, name='inventory-refresh', daemon=True)
+                self.refresh_thread.start()
+        else:
+            self.records = self.read_records()
+            try:
+                self.header_list = next(self.records, [])
+            except IOError as e:
+                self.log(logging.ERROR, "Aborting..." + str(e), True)
+                sys.exit(1)
+
+    def __cache_key(self):
+        """
+        Get the key of the provider output in the cache (the provider changing invalidates the output cached).
+        :return: Key tuple
+        """
+        return self.cache.key(self.file_name, self.CACHE_OPTIONS, True)
+
+    def read_records(self):
+        """
+        Generator running the provider and reading its output as printed (see read_output()).
+        Raises IOError if the output is not valid, or once read if the provider exited with an error status.
+        :return: Lists of values (strings): the header first, then the rows
+        """
+        self.log(logging.DEBUG, "Running inventory provider: " + self.file_name)
+        try:
+            process = subprocess.Popen([os.path.abspath(self.file_name)], stdout=subprocess.PIPE,
+                                       universal_newlines=True)
+        except KeyboardInterrupt:
+            REOUtility.key_interrupt()
+        except OSError as e:
+            self.log(logging.ERROR, "Aborting...Unable to run inventory provider " + self.file_name + ": " + str(e),
+                     True)
+            sys.exit(1)
+
+        with process:
+            try:
+                for values in self.read_output(process.stdout):
+                    yield values
+            except IOError:
+                process.kill()
+                raise
+
+        if process.returncode:
+            raise IOError("Inventory provider " + self.file_name + " exited with status " +
+                          str(process.returncode) + ".")
+
+    def read_output(self, stream):
+        """
+        Generator of the records of an inventory output (CSV, JSON lines or JSON array), read as it comes.
+        Raises IOError if the output is not valid.
+        :param stream: Text stream of the output
+        :return: Lists of values (strings): the header first, then the rows
+        """
+        lines = iter(stream)
+        first_line = ''
+        for first_line in lines:
+            if first_line.strip():
+                break
+
+        if first_line.lstrip().startswith('['):
+            try:
+                objects = json.loads(first_line + stream.read())
+            except ValueError as e:
+                raise IOError("Inventory " + self.file_name + " output is not valid JSON: " + str(e))
+        elif first_line.lstrip().startswith('{'):
+            objects = (json.loads(line) for line in self.__chain(first_line, lines) if line.strip())
+        else:
+            for record in csv.reader(self.__chain(first_line, lines), skipinitialspace=True):
+                if record and (len(record) > 1 or record[0].strip()):
+                    yield [val.strip() for val in record]
+            return
+
+        header_list = None
+        try:
+            for obj in objects:
+                if header_list is None:
+                    header_list = list(obj)
+                    yield header_list
+                yield ['' if obj.get(name) is None else str(obj.get(name)) for name in header_list]
+        except (ValueError, AttributeError) as e:
+            raise IOError("Inventory " + self.file_name + " output is not valid JSON objects: " + str(e))
+
+    @staticmethod
+    def __chain(first_line, lines):
+        yield first_line
+        for line in lines:
+            yield line
+
+    def refresh(self):
+        """
+        Run the provider and cache its whole output.
+        :return: None
+        """
+        key = self.__cache_key()
+        try:
+            records = list(self.read_records())
+        except IOError as e:
+            self.log(logging.WARNING, "Inventory cache not refreshed: " + str(e))
+            return
+        if records:
+            self.cache.save(self.file_name, key, records)
+
+    def rows_values(self):
+        """
+        Generator of the rows as lists of values, in the column order of the header (no dict created).
+        The provider output is read as rows are consumed the first time, the rows read are kept for the next times.
+        :return: Lists of values
+        """
+        if self.parsed:
+            for values in self.rows:
+                yield values
+            return
+
+        key = self.__cache_key() if self.cache else None
+        if self.records is None:
+            self.records = self.read_records()
+            next(self.records, None)  # Header already known
+
+        rows = self.rows = []
+        try:
+            for values in self.records:
+                rows.append(values)
+                yield values
+        except IOError as e:
+            # Rows read so far are processed, not cached
+            self.log(logging.ERROR, str(e), True)
+            self.records = None
+            self.row_count = len(rows)
+            return
+        self.records = None
+        self.parsed = True
+        self.row_count = len(rows)
+        if self.cache:
+            self.cache.save(self.file_name, key, [self.header_list] + rows)
+
+    def __iter__(self):
+        """
+        Iterator over rows printed by the provider
+        :return: Rows as dicts
+        """
+        for values in self.rows_values():
+            self.current_row = dict(zip(self.header_list, values))
+            yield self.current_row
+
+    def __len__(self):
+        """
+        Return the number of rows (the whole output is read if not done yet)
+        :return: Number of rows
+        """
+        if self.row_count is None:
+            for values in self.rows_values():
+                pass
+        return self.row_count or 0
+
+    def get_row_val(self, row=None, col_idx=0, name=''):
+        """
+        Get host row value by index or name
+        :param row: Row being affected
+        :param col_idx: index
+        :param name: column name
+        :return: row value
+        """
+        col_name = ''
+
+        try:
+            if name == '':
+                col_name = self.header_list[col_idx]
+            else:
+                col_name = name
+            if not row:
+                row = self.current_row
+        except:
+            self.log(logging.ERROR, "Invalid file key column: \'" + col_name + "\' or column index: " + str(
+                col_idx) + ". Check input file.", True)
+            sys.exit(2)
+
+        return row[col_name]
+
+    def __getstate__(self):
+        """
+        Pickle support (e.g. sent to another process): the provider output being read or refreshed is not
+        carried over, the rows already read are.
+        :return: State dict
+        """
+        state = self.__dict__.copy()
+        state['records'] = None
+        state['refresh_thread'] = None
+        state['current_row'] = None
+        return state
+
+    def log(self, level, message, print_to_screen=False):
+        """
+        Logging mechanism if defined.
+        :param print_to_screen: True to print message to screen as well
+        :param level: Log level
+        :param message: Message
+        :return:
+        """
+        if print_to_screen:
+            print(message)
+        if self.logger:
+            self.logger.log(level, message)
@@ -1,11 +1,17 @@
+import codecs
+import io
 import logging
 import os
 import re
+import socket
+import threading
 import time
 
 import paramiko
 from paramiko.ssh_exception import *
 
+from .REOOutputCapture import REOOutputCapture
+from .REOStringMatcher import REOStringMatcher
 from .REOUtility import REOUtility
 
 
@@ -25,11 +31,41 @@ class REORemoteHost(object):
     SERVER_STATUS_ERROR_PROMPT = 'Unable to detect initial prompt'
     STRINGS_DELIMITER = '|'
     NOT_FOUND_MARKER = '$NF'
+    SENTINEL_PREFIX = '__REACH_'
     DEFAULT_PROMPT_REGEX = '[$#>]( )?$'
     DEFAULT_NEW_PROMPT_REGEX = '\[REACH\]# $'
     DEFAULT_NEW_PROMPT = '[REACH]# '
     PROMPT_DETECTION_TIMEOUT = 10
     PROMPT_SET_TIMEOUT = 5
+    SSH_PORT = 22
+
+    RECV_SIZE_MIN = 1024
+    """Minimum number of bytes read from the shell at once"""
+    RECV_SIZE_MAX = 65536
+    """Maximum number of bytes read from the shell at once"""
+
+    PIPELINE_MAX_LINE = 2048
+    """Maximum length of a command line sending commands at once (see send_cmds_pipelined())"""
+
+    # Authentication methods
+    AUTH_AGENT = 'agent'
+    AUTH_KEY_FILE = 'key'
+    AUTH_PASSWORD = 'password'
+
+    # Device types (learned)
+    DEVICE_TYPE_SHELL = 'sh'
+    """sh-style shell, a personalized prompt can be set (PS1)"""
+    DEVICE_TYPE_OTHER = 'other'
+    """Other CLI (network devices, F5 tmsh...), the prompt can't be changed"""
+
+    DEFAULT_KEY_FILES = (('id_rsa', paramiko.RSAKey), ('id_ecdsa', paramiko.ECDSAKey),
+                         ('id_ed25519', paramiko.Ed25519Key))
+    """Default private key files (in ~/.ssh) tried when no key file is defined, with their key classes"""
+
+    SSH_LIB_LOGS = set()
+    """Paramiko log files already set up (shared by all hosts)"""
+
+    SSH_LIB_LOGS_LOCK = threading.Lock()
 
     # Key markers
     ENTER_KEY = '$ENTER_KEY'
@@ -63,7 +99,7 @@ class REORemoteHost(object):
         """Password"""
 
         self.client = None
-        """Virtual SSH client connection"""
+        """SSH connection (paramiko Transport)"""
 
         self.util = REOUtility()
         """Utility instance"""
@@ -86,6 +122,30 @@ class REORemoteHost(object):
         self.console_output_buffer = ''
         """String container of console output buffer being processed"""
 
+        self.recv_size = self.RECV_SIZE_MIN
+        """Number of bytes read from the shell at once (adapts to the output rate)"""
+
+        self.output_head_size = 0
+        """Number of first bytes of a command's output kept in memory (0 with output_tail_size 0 for all)"""
+
+        self.output_tail_size = 0
+        """Number of last bytes of a command's output kept in memory"""
+
+        self.output_spill_file = None
+        """Optional file the full output of commands is appended to"""
+
+        self.exec_mode = False
+        """True to run commands over exec channels until one needs the interactive shell"""
+
+        self.shell_prompt = True
+        """True to set a personalized prompt when the interactive shell is opened"""
+
+        self.sentinel_mode = False
+        """True to detect the completion of commands sent to sh-style shells with a sentinel instead of the prompt"""
+
+        self.exit_status = None
+        """Exit status of the last command (None if unknown: run in the shell without sentinel)"""
+
         self.search_string_isfound = ''
         """Search string found flag"""
 
@@ -113,8 +173,17 @@ class REORemoteHost(object):
         self.expected_prompt_regex = prompt_regex
         """Regex of the prompt used to detect command completion"""
 
+        self.host_cache = None
+        """Optional cache (REOHostCache) of what was learned about hosts in previous runs"""
+
+        self.initial_prompt = ''
+        """Prompt detected at login"""
+
+        self.device_type = None
+        """Device type (see DEVICE_TYPE_*), None until known"""
+
     def connect_host(self, set_prompt=True, u=None, p=None, f=None, conn_timeout=10, cmd_timeout=5, trust_hosts=False,
-                     agent_only=False):
+                     agent_only=False, exec_mode=False):
         """
         Establish connection with host
         :param set_prompt: Set a personalized prompt
@@ -124,9 +193,13 @@ class REORemoteHost(object):
         :param conn_timeout: Connection time-out
         :param cmd_timeout: Command time-out
         :param trust_hosts: True to blindly trust hosts, False to use system known_hosts
+        :param exec_mode: True to run commands over exec channels (see send_cmd_wait_respond()), the interactive
+            shell is then only opened when needed
         :return: True if successfully connected, False otherwise
         """
         self.connected = False
+        self.exec_mode = exec_mode
+        self.shell_prompt = set_prompt
         if self.util.debug:
             print(' ')
         self.log(logging.DEBUG, "Connecting to: " + self.host, False)
@@ -135,16 +208,12 @@ class REORemoteHost(object):
         if p: self.pwd = p
 
         self.cmd_timeout = cmd_timeout
-        self.client = paramiko.SSHClient()
 
-        if trust_hosts:
-            # Blindly trust hosts
-            self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        else:
-            # Load system "known_hosts" file
-            self.client.load_system_host_keys()
-
-        paramiko.util.log_to_file(self.ssh_lib_log)
+        # Only add the paramiko log handler once, hosts may be connecting concurrently
+        with self.SSH_LIB_LOGS_LOCK:
+            if self.ssh_lib_log not in self.SSH_LIB_LOGS:
+                self.SSH_LIB_LOGS.add(self.ssh_lib_log)
+                paramiko.util.log_to_file(self.ssh_lib_log)
 
         self.log(logging.DEBUG, "CONNECTION_TIMEOUT " + str(conn_timeout), False)
 
@@ -152,87 +221,214 @@ class REORemoteHost(object):
 
         self.log(logging.DEBUG, "User Name: " + self.usr, False)
 
-        # Try agent authentication
-        self.connected = self.__connect("Trying agent (and default key) authentication.", self.host, self.usr,
-                                        timeout=conn_timeout,
-                                        allow_agent=True, look_for_keys=False)
-
+        # A single connection (and key exchange) for all authentication methods
+        auth_methods = [(self.AUTH_AGENT, "Trying agent authentication.", self.__auth_agent)]
         if not agent_only:
+            auth_methods.append((self.AUTH_KEY_FILE, "Trying private key file: " + self.key_file if self.key_file else
+                                 "Trying default private key files.", self.__auth_key_file))
+            auth_methods.append((self.AUTH_PASSWORD, "Trying user('%s')/password(********): " % self.usr,
+                                 self.__auth_password))
+
+        # Try the method accepted last time first
+        cached_auth = self.host_cache.get(self.cache_key(), 'auth') if self.host_cache else None
+        auth_methods.sort(key=lambda auth: auth[0] != cached_auth)
+
+        for auth, msg, auth_method in auth_methods:
+            # Some servers drop the connection after failed attempts, reconnect if needed
+            if not (self.client and self.client.is_active()):
+                if not self.__connect(conn_timeout, trust_hosts):
+                    break
+            if self.__authenticate(msg, auth_method):
+                self.connected = True
+                if self.host_cache:
+                    self.host_cache.update(self.cache_key(), auth=auth)
+                break
 
-            # Try user-defined private-key authentication
-            if not self.connected:
-                self.connected = self.__connect("Trying private key file: " + self.key_file, self.host, self.usr,
-                                                timeout=conn_timeout, private_key_file=self.key_file,
-                                                allow_agent=False, look_for_keys=True)
-                if self.key_file:
-                    self.log(logging.DEBUG, "Key File: " + self.key_file, False)
-                else:
-                    if self.connected:
-                        self.log(logging.DEBUG, "Used default id_rsa key.", False)
-
-            # Try user/password authentication
-            if not self.connected:
-                self.connected = self.__connect("Trying user('%s')/password(********): " % self.usr, self.host,
-                                                self.usr, password=self.pwd, timeout=conn_timeout,
-                                                allow_agent=False, look_for_keys=False)
+        if not self.connected and self.client:
+            self.client.close()
 
         if self.connected:
-            self.shell = self.client.invoke_shell()
-            self.shell.settimeout(cmd_timeout)
             self.connect_status_string = self.SERVER_STATUS_CONNECTED
-            if not self.detect_initial_prompt():
-                self.connect_status_string = self.SERVER_STATUS_ERROR_PROMPT
-                self.log(logging.DEBUG, self.connect_status_string, False)
+            if not exec_mode and not self.open_shell():
                 return False
-            if set_prompt:
-                # Variable output not used, but may be in the future
-                prompt_set, output = self.set_prompt()
-                if not prompt_set:
-                    # Continue with old prompt for now and not fail
-                    self.connect_status_string = self.SERVER_STATUS_CONNECTED
             self.log(logging.DEBUG, self.connect_status_string, False)
 
         return self.connected
 
-    def __connect(self, msg, host, username, password=None, timeout=5, private_key_file=None, allow_agent=False,
-                  look_for_keys=False):
+    def open_shell(self):
+        """
+        Open the interactive shell and detect its prompt (set a personalized one if requested).
+        :return: True if the shell is ready, False otherwise (see connect_status_string)
+        """
+        self.shell = self.client.open_session()
+        self.shell.get_pty()
+        self.shell.invoke_shell()
+        self.shell.settimeout(self.cmd_timeout)
+        if not self.detect_initial_prompt():
+            self.connect_status_string = self.SERVER_STATUS_ERROR_PROMPT
+            self.log(logging.DEBUG, self.connect_status_string, False)
+            return False
+        if self.shell_prompt and self.check_prompt_profile() is not False:
+            # Variable output not used, but may be in the future
+            prompt_set, output = self.set_prompt()
+            self.learn_prompt_profile(prompt_set)
+            if not prompt_set:
+                # Continue with old prompt for now and not fail
+                self.connect_status_string = self.SERVER_STATUS_CONNECTED
+        return True
+
+    def check_prompt_profile(self):
+        """
+        Check the prompt profile learned in previous runs (host cache) against the initial prompt detected.
+        A profile not matching the prompt is stale (e.g. device replaced) and is discarded.
+        :return: True if the personalized prompt can be set, False if it can't (no need to try), None if unknown
+        """
+        if not self.host_cache:
+            return None
+        key = self.cache_key()
+        prompt_regex = self.host_cache.get(key, 'prompt_regex')
+        if prompt_regex is None:
+            return None
+        if not re.search(prompt_regex, self.initial_prompt):
+            self.log(logging.DEBUG, "Prompt profile discarded, prompt changed: " + self.initial_prompt, False)
+            self.host_cache.discard(key, 'prompt_regex', 'ps1', 'device_type')
+            return None
+        self.device_type = self.host_cache.get(key, 'device_type')
+        ps1 = self.host_cache.get(key, 'ps1')
+        if ps1 is False:
+            self.log(logging.DEBUG, "Known prompt profile, personalized prompt not supported", False)
+        return ps1
+
+    def learn_prompt_profile(self, prompt_set):
+        """
+        Remember the prompt profile of the host (host cache) for the next runs.
+        :param prompt_set: True if the personalized prompt was set, False otherwise
+        :return: None
+        """
+        self.device_type = self.DEVICE_TYPE_SHELL if prompt_set else self.DEVICE_TYPE_OTHER
+        if self.host_cache and self.initial_prompt:
+            self.host_cache.update(self.cache_key(), prompt_regex=re.escape(self.initial_prompt) + '$',
+                                   ps1=prompt_set, device_type=self.device_type)
+
+    @classmethod
+    def prompt_line(cls, output):
+        """
+        Get the prompt (last line) of shell output.
+        :param output: Output ending with a prompt
+        :return: Prompt string
+        """
+        return output.replace('\r', '').split('\n')[-1]
+
+    def cache_key(self):
+        """
+        Key of this host in the host cache.
+        :return: Key string
+        """
+        return str(self.usr) + '@' + self.host
+
+    def __connect(self, timeout, trust_hosts):
         """
-        Helper method to facilitate various authentication methods and handling exceptions accordingly.
-        :param msg: message to display to screen
-        :param host: host or ip
-        :param username:
-        :param password:
+        Open the SSH connection (transport) to the host and negotiate keys, without authenticating.
         :param timeout: connection timeout
-        :param private_key_file: location of private key
-        :param allow_agent:
-        :param look_for_keys:
+        :param trust_hosts: True to blindly trust hosts, False to use system known_hosts
         :return: True if successfully connected, False otherwise.
         """
-        connected = False
+        self.client = None
         try:
-            self.log(logging.DEBUG, msg, False)
-            if private_key_file:
-                try:
-                    self.log(logging.DEBUG, "Decrypting private key...", False)
-                    if not os.path.isfile(private_key_file):
-                        raise AuthenticationException(self.SERVER_STATUS_SSH_KEY_MISSING)
-                    private_key = paramiko.RSAKey.from_private_key_file(filename=private_key_file, password=password)
-                    self.client.connect(host, username=username, timeout=timeout, pkey=private_key,
-                                        allow_agent=allow_agent, look_for_keys=look_for_keys)
-                    connected = True
-                except Exception as e:
-                    raise AuthenticationException(e)
-            if not connected:
-                self.client.connect(host, username=username, password=password, timeout=timeout,
-                                    allow_agent=allow_agent, look_for_keys=look_for_keys)
-            self.log(logging.DEBUG, "Success", False)
-            connected = True
-            return connected
+            known_keys = None if trust_hosts else self.__known_host_keys()
+            sock = socket.create_connection((self.host, self.SSH_PORT), timeout=timeout)
+            transport = paramiko.Transport(sock)
+            transport.banner_timeout = timeout
+            if known_keys:
+                self.__prefer_key_types(transport, known_keys)
+            self.client = transport
+            transport.start_client(timeout=timeout)
+            if not trust_hosts:
+                self.__check_host_key(transport.get_remote_server_key(), known_keys)
+            return True
         except KeyboardInterrupt:
             self.util.key_interrupt()
         except BadHostKeyException as e:
             self.connect_status_string = self.SERVER_STATUS_HOST_CHANGED
             self.log(logging.DEBUG, self.connect_status_string, False)
+        except SSHException as e:
+            err_str = str(e)
+            if 'known_hosts' in err_str:
+                self.connect_status_string = self.SERVER_STATUS_UNKNOWN_HOST
+            elif 'No existing session' in err_str:
+                self.connect_status_string = self.SERVER_STATUS_SSH_BLOCKED
+            else:
+                self.connect_status_string = err_str
+            self.log(logging.DEBUG, self.connect_status_string, False)
+        except Exception as e:
+            self.connect_status_string = self.SERVER_STATUS_UNABLE_TO_REACH
+            self.log(logging.DEBUG, self.connect_status_string, False)
+            self.log(logging.DEBUG, str(e), False)
+        if self.client:
+            self.client.close()
+        return False
+
+    RSA_KEY_TYPES = ('rsa-sha2-512', 'rsa-sha2-256', 'ssh-rsa')
+    """Host key types (signature algorithms) negotiated for a known ssh-rsa key"""
+
+    @classmethod
+    def __prefer_key_types(cls, transport, known_keys):
+        """
+        As SSHClient does: negotiate the host key types already known for the host first, so that a host known
+        by its ssh-rsa key is not rejected for presenting a key of another type (e.g. ed25519) not in known_hosts.
+        :param transport: Transport not started yet
+        :param known_keys: Keys of the host in known_hosts (see __known_host_keys())
+        :return: None
+        """
+        security_options = transport.get_security_options()
+        key_types = list(security_options.key_types)
+        preferred = []
+        for known_type in known_keys.keys():
+            for key_type in cls.RSA_KEY_TYPES if known_type == 'ssh-rsa' else (known_type,):
+                if key_type in key_types and key_type not in preferred:
+                    preferred.append(key_type)
+        security_options.key_types = preferred + [key_type for key_type in key_types if key_type not in preferred]
+
+    def __known_host_keys(self):
+        """
+        Get the keys of the host in the system "known_hosts" file.
+        :return: Dict-like of key type -> key (paramiko.hostkeys.SubDict), None if the host is not known
+        """
+        host_keys = paramiko.HostKeys()
+        try:
+            host_keys.load(os.path.expanduser('~/.ssh/known_hosts'))
+        except IOError:
+            pass
+        return host_keys.lookup(self.host)
+
+    def __check_host_key(self, server_key, known_keys):
+        """
+        Check the host key against the system "known_hosts" file.
+        :param server_key: Key presented by the host
+        :param known_keys: Keys of the host in known_hosts (see __known_host_keys()), None if not known
+        :return: None, an exception is raised if the key is not trusted
+        """
+        if known_keys is None or server_key.get_name() not in known_keys:
+            raise SSHException("Server '%s' not found in known_hosts" % self.host)
+        if known_keys[server_key.get_name()] != server_key:
+            raise BadHostKeyException(self.host, server_key, known_keys[server_key.get_name()])
+
+    def __authenticate(self, msg, auth_method):
+        """
+        Helper method to try an authentication method on the connection and handle exceptions accordingly.
+        :param msg: message to log
+        :param auth_method: Method authenticating on the connection, an exception is raised on failure
+        :return: True if successfully authenticated, False otherwise.
+        """
+        try:
+            self.log(logging.DEBUG, msg, False)
+            auth_method()
+            if self.client.is_authenticated():
+                self.log(logging.DEBUG, "Success", False)
+                return True
+            raise AuthenticationException('Authentication failed.')
+        except KeyboardInterrupt:
+            self.util.key_interrupt()
         except AuthenticationException as e:
             err_str = str(e)
             if self.SERVER_STATUS_SSH_KEY_MISSING in err_str:
@@ -243,9 +439,7 @@ class REORemoteHost(object):
             self.log(logging.DEBUG, err_str, False)
         except SSHException as e:
             err_str = str(e)
-            if 'known_hosts' in err_str:
-                self.connect_status_string = self.SERVER_STATUS_UNKNOWN_HOST
-            elif 'No existing session' in err_str:
+            if 'No existing session' in err_str:
                 self.connect_status_string = self.SERVER_STATUS_SSH_BLOCKED
             else:
                 self.connect_status_string = err_str
@@ -254,6 +448,68 @@ class REORemoteHost(object):
             self.connect_status_string = self.SERVER_STATUS_UNABLE_TO_REACH
             self.log(logging.DEBUG, self.connect_status_string, False)
             self.log(logging.DEBUG, str(e), False)
+        return False
+
+    def __auth_agent(self):
+        """
+        Authenticate with the keys of the SSH agent.
+        :return: None, an exception is raised on failure
+        """
+        agent = paramiko.Agent()
+        try:
+            self.__auth_keys(agent.get_keys())
+        finally:
+            agent.close()
+
+    def __auth_key_file(self):
+        """
+        Authenticate with the private key file (decrypted with the password), or the default key files if none.
+        :return: None, an exception is raised on failure
+        """
+        if self.key_file:
+            self.log(logging.DEBUG, "Key File: " + self.key_file, False)
+            if not os.path.isfile(self.key_file):
+                raise AuthenticationException(self.SERVER_STATUS_SSH_KEY_MISSING)
+            self.log(logging.DEBUG, "Decrypting private key...", False)
+            try:
+                keys = [paramiko.RSAKey.from_private_key_file(filename=self.key_file, password=self.pwd)]
+            except SSHException as e:
+                raise AuthenticationException(e)
+        else:
+            keys = []
+            for file_name, key_class in self.DEFAULT_KEY_FILES:
+                key_file = os.path.expanduser(os.path.join('~', '.ssh', file_name))
+                if os.path.isfile(key_file):
+                    try:
+                        keys.append(key_class.from_private_key_file(filename=key_file, password=self.pwd))
+                    except SSHException as e:
+                        self.log(logging.DEBUG, key_file + ": " + str(e), False)
+        self.__auth_keys(keys)
+        if not self.key_file:
+            self.log(logging.DEBUG, "Used default key.", False)
+
+    def __auth_keys(self, keys):
+        """
+        Authenticate with the first accepted key.
+        :param keys: Keys (paramiko PKey) to try in order
+        :return: None, an exception is raised on failure
+        """
+        for key in keys:
+            try:
+                self.client.auth_publickey(self.usr, key)
+                return
+            except AuthenticationException as e:
+                # Stop trying keys if the server does not accept keys at all
+                if isinstance(e, BadAuthenticationType) and 'publickey' not in e.allowed_types:
+                    raise
+        raise AuthenticationException('No key accepted.')
+
+    def __auth_password(self):
+        """
+        Authenticate with user/password (falls back to keyboard-interactive if that is all the server accepts).
+        :return: None, an exception is raised on failure
+        """
+        self.client.auth_password(self.usr, self.pwd)
 
     def set_password_from_file(self, f):
         """
@@ -283,9 +539,10 @@ class REORemoteHost(object):
         self.shell.settimeout(self.PROMPT_DETECTION_TIMEOUT)
         match = None
         output = ''
+        decoder = self.new_decoder()
         while match is None:
             try:
-                output += self.shell.recv(1024).decode("utf-8")
+                output += decoder.decode(self.recv())
                 match = re.search(self.original_prompt_regex, output)
             except KeyboardInterrupt:
                 self.util.key_interrupt()
@@ -295,6 +552,7 @@ class REORemoteHost(object):
             except:
                 return False
                 # self.util.print_stack()
+        self.initial_prompt = self.prompt_line(output)
         self.shell.settimeout(self.cmd_timeout)
         self.log(logging.DEBUG, "Detect initial prompt success", False)
         return True
@@ -309,10 +567,11 @@ class REORemoteHost(object):
         self.shell.settimeout(self.PROMPT_SET_TIMEOUT)
         self.shell.send("PS1=$PS1'" + self.new_prompt + "'\n")  # In case of sh-style
         output = ''
+        decoder = self.new_decoder()
         matches = []
         while len(matches) != 2:
             try:
-                output += str(self.shell.recv(2048))
+                output += decoder.decode(self.recv())
                 matches = re.findall(self.new_prompt_regex[:-1], output)
             except KeyboardInterrupt:
                 self.util.key_interrupt()
@@ -328,203 +587,184 @@ class REORemoteHost(object):
 
         return True, output
 
+    def recv(self):
+        """
+        Read the next output available from the shell.
+        :return: Bytes received
+        """
+        data = self.shell.recv(self.recv_size)
+        if not data:
+            raise socket.timeout('Shell closed')  # EOF, nothing more will come
+        self.adapt_recv_size(len(data))
+        return data
+
+    def adapt_recv_size(self, received):
+        """
+        Adapt the read size to the output rate: it doubles while reads fill it (large outputs)
+        and shrinks back when output trickles (interactive prompts).
+        :param received: Number of bytes received by the last read
+        :return: None
+        """
+        if received >= self.recv_size:
+            self.recv_size = min(self.recv_size * 2, self.RECV_SIZE_MAX)
+        elif received < self.recv_size // 4:
+            self.recv_size = max(self.recv_size // 2, self.RECV_SIZE_MIN)
+
+    @staticmethod
+    def new_decoder():
+        """
+        Create a decoder of the shell output. It is incremental: a character split between two reads
+        is decoded once complete.
+        :return: codecs.IncrementalDecoder instance
+        """
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
     def send_cmd_wait_respond(self, command, search_string='', wait_string='', response_string='', last_run_log=None):
         """
         This method will send a command to the server and search for a "search" string.
         It can optionally, wait for subsequent strings and send a response string.
+        In exec mode, commands that can are run over an exec channel instead (see use_exec()).
         :param last_run_log: Log file for results of the last run
         :param command: Command to send
         :param search_string: Search string(s)
         :param wait_string: String(s) to expect
         :param response_string: String(s) to use as a response for wait_strings
-        :param cipher_key: 32 character cipher string for decrypting any $CT= values
         :return: Output of command, error_msg (or '')
         """
-        # Check for wait conditions
-        will_wait_respond = False
-        wait_response_pair = {}
-        search_strings = None
-        wait_strings = None
-        response_strings = None
-        response_display = None
-        search_strings_display = None
-        self.console_output_buffer = ''
-        self.search_string_isfound = ''
+        if self.use_exec(command, wait_string):
+            return self.exec_cmd(command, search_string, last_run_log)
+        if self.shell is None and not self.open_shell():
+            return '', self.connect_status_string
 
-        if search_string:
-            search_strings = search_string.split(self.STRINGS_DELIMITER)
-
-            # Remove not found marker from search_strings list
-            if self.NOT_FOUND_MARKER in search_strings:
-                search_strings.remove(self.NOT_FOUND_MARKER)
-
-            search_strings_display = '\'' + "\' or \'".join(search_strings) + '\''
-
-            if self.str_vars_exist:
-                print(("  - Waiting for string(s): " + search_strings_display))
-
-        if wait_string:
-            wait_strings = wait_string.split(self.STRINGS_DELIMITER)
-            wait_strings_display = '\'' + "\',\'".join(wait_strings) + '\''
-            self.log(logging.DEBUG, "Wait String: " + wait_string, False)
-            if self.str_vars_exist:
-                print(("    - Waiting for string(s) in sequence: " + wait_strings_display))
-
-            if response_string:
-                response_strings = response_string.split(self.STRINGS_DELIMITER)
-                # Replace key stroke markers with real chars and create a display-only list
-                response_display = response_strings[:]  # Create a copy of the response list
-                for i, rs in enumerate(response_strings):
-                    for key in self.KEY_STROKE:
-                        response_strings[i] = response_strings[i].replace(key, self.KEY_STROKE[key])
-                        response_display[i] = response_display[i].replace(key, self.KEY_STROKE_DISPLAY[key])
-
-                    # Allow sending password in cipher text (Format: $CT=<cipher text>),
-                    # useful for sudo requiring passwords or Cisco ASA 'enable' passwords
-                    cipher_text = re.search(re.escape(self.CIPHER_TEXT_MARKER) + '([^|]*)', rs)
-                    if cipher_text is not None:
-                        response_strings[i] = response_strings[i].replace(cipher_text.group(0),
-                                                                          REOUtility.decrypt_str(cipher_text.group(1),
-                                                                                                 self.cipher_key))
-                        response_display[i] = response_display[i].replace(cipher_text.group(0), '**********')
-            wait_response_pair = list(zip(wait_strings, response_strings, response_display))
-            if len(wait_response_pair) > 0:
-                will_wait_respond = True
+        pending = self.start_command(command, search_string, wait_string, response_string)
 
         # Send the command to the host
-        self.shell.send(command + "\n")
-
-        command_completed = False
-        error_msg = ''
-        output_last = ''
-        buffer_index = 0
-        if self.__detect_special_commands(command):
-            self.expected_prompt_regex = self.original_prompt_regex
-        if self.__detect_sudo(command):
-            self.expected_prompt_regex = self.original_prompt_regex
+        self.shell.send(pending.command_line + "\n")
 
-        while not command_completed:
+        while not pending.completed:
             # Continuously read output lines until wait strings are found or timeout reached
             try:
                 self.log(logging.DEBUG, "Expected prompt regex: " + self.expected_prompt_regex, False)
-                self.console_output_buffer += self.shell.recv(1024).decode("utf-8")
-                if buffer_index == 0:
-                    temp = self.console_output_buffer.replace(' \r', '').split(command, 1)
-                    if len(temp) < 2:
-                        continue
-                    output_last = temp[1]
-                else:
-                    output_last = self.console_output_buffer[buffer_index:]
-                command_completed = (re.search(self.expected_prompt_regex, output_last) is not None)
-                if command_completed:
-                    break
-
+                response = pending.feed(self.recv())
+                if response is not None:
+                    self.shell.send(response)
             except KeyboardInterrupt:
                 self.util.key_interrupt()
             except socket.timeout:
-                self.util.print_debug("Timeout, console_output_buffer: " +
-                                      self.console_output_buffer)
-                if will_wait_respond:
-                    # If wait_strings not all consumed and the shell timed out,
-                    # it may mean that the wait strings are incorrect
-                    print(("  - Wait string(s) not found and command timeout. Timeout value: " + str(self.cmd_timeout)))
-                    last_run_log.write("Not Found\n")
-                self.log(logging.ERROR, 'Command timeout. No more commands will be sent to this host.', False)
-                error_msg = 'Command timeout. No more commands will be sent to this host.'
+                pending.timeout(last_run_log)
                 break
 
-            # command not completed, check for wait strings
-            if will_wait_respond:
-                # Look for wait_string keywords in the output and send response
-                for (wait, response, response_display) in wait_response_pair:
-                    self.log(logging.DEBUG, "Looking for wait key: " + wait, False)
-                    if wait in output_last:
-                        # Check if wait is a special key stroke character(s)
-                        key_stroke_isfound = True in [self.KEY_STROKE[ks] in response for ks in self.KEY_STROKE]
-
-                        # This is stripping the space when sending
-                        # $SPACE_KEY (or any other special char keystroke)
-                        if key_stroke_isfound:
-                            rstring = response
-                        else:
-                            rstring = response.strip()
-
-                        self.log(logging.DEBUG, "Found wait key: " + wait, False)
-                        print(("    - Found \'" + wait + "\'"))
-                        self.log(logging.DEBUG, "Sending response: " + rstring, False)
-                        print(("    - Sent response \'" + response_display + "\'"))
-
-                        if key_stroke_isfound:
-                            self.shell.send(rstring)
-                        else:
-                            self.shell.send(rstring + "\n")
-
-                        wait_response_pair.remove((wait, response, response_display))
-                        buffer_index = len(self.console_output_buffer)
-                        break  # Found a match in output
-
-        # end of while not command_completed
-
-        if search_strings:
-            # Look for search strings
-            for search_key in search_strings:
-                if search_key == self.NOT_FOUND_MARKER: continue  # Ignore "not found" marker
-                self.log(logging.DEBUG, "Looking for search key: " + search_key, False)
-                self.util.print_debug("Current output: " + self.console_output_buffer)
-                if search_key in self.console_output_buffer.replace(' \r', '').split(command, 1)[1]:
-                    self.log(logging.DEBUG, "Found search key: " + search_key, False)
-                    self.search_string_isfound = search_key
-                    break
-            else:  # if for loop terminates without breaking (ie, no search_string found)
-                if self.NOT_FOUND_MARKER not in search_string:
-                    print(("  - Search string(s) " + search_strings_display + " not found."))
-                    last_run_log.write("Not Found: " + search_strings_display + "\n")
-                if self.NOT_FOUND_MARKER in search_string:
-                    self.search_string_isfound = self.NOT_FOUND_MARKER
-                else:
-                    self.search_string_isfound = ''  # Exited on timeout, not a wait keyword
-        if len(wait_response_pair) > 0:
-            keys_not_found = ", ".join(
-                ["'" + pair[0] + "'" for pair in wait_response_pair if pair[0] not in self.console_output_buffer])
-            keys_found = ", ".join(
-                ["'" + pair[0] + "'" for pair in wait_response_pair if pair[0] in self.console_output_buffer])
-            if keys_not_found != '':
-                self.log(logging.DEBUG, "Wait keys not found: " + keys_not_found, False)
-                print(("  - Wait strings not found: " + keys_not_found + ""))
-            if keys_found != '':
-                self.log(logging.DEBUG,
-                         "Wait keys found but response not sent because prompt immediately returned: " + keys_found,
-                         False)
-                print((
-                        "  - Wait strings found but response not sent because prompt immediately returned: " + keys_found + ""))
+        pending.finish(last_run_log)
 
-        if self.__detect_sudo(command):
+        if pending.is_sudo:
             prompt_set, output = self.set_prompt()
-            # self.console_buffer += output
             if not prompt_set:
                 # error_msg = "Unable to set personalized prompt in su mode"
                 pass
 
-        self.util.print_debug("Output:\n" + self.console_output_buffer.replace(' \r', ''))
+        return pending.output(), pending.error_msg
+
+    def exec_cmd(self, command, search_string='', last_run_log=None):
+        """
+        Run a command over an exec channel: no echo, no prompt, the output (stdout and stderr) is read to the end
+        and the exit status is kept (see exit_status). Search strings are evaluated as in send_cmd_wait_respond().
+        :param command: Command to run
+        :param search_string: Search string(s)
+        :param last_run_log: Log file for results of the last run
+        :return: Output of command, error_msg (or '')
+        """
+        pending = self.start_command(command, search_string, interactive=False)
+        channel = self.client.open_session()
+        try:
+            channel.settimeout(self.cmd_timeout)
+            channel.set_combine_stderr(True)  # In order, as in a terminal
+            channel.exec_command(command)
+            while not pending.completed:
+                data = channel.recv(self.recv_size)
+                if data:
+                    self.adapt_recv_size(len(data))
+                    pending.feed(data)
+                else:
+                    pending.completed = True  # EOF
+            self.exit_status = channel.recv_exit_status()
+        except KeyboardInterrupt:
+            self.util.key_interrupt()
+        except socket.timeout:
+            pending.timeout(last_run_log)
+        finally:
+            channel.close()
 
-        return re.sub(self.new_prompt_regex, '', self.console_output_buffer).replace(' \r', ''), error_msg
+        pending.finish(last_run_log)
+        return pending.output(), pending.error_msg
 
-    def __detect_special_commands(self, command):
+    def send_cmds_pipelined(self, commands):
         """
-        Detect if a special command is used
-        :param command: Command to test
+        Send commands at once, on a single command line where each command is followed by a sentinel delimiting
+        its output (see can_pipeline()), so that they cost a single round trip. Search strings are evaluated per
+        command as in send_cmd_wait_respond(). Commands after one that timed out may still run.
+        :param commands: List of tuples of: command, search string(s)
+        :return: List of tuples of: output, error_msg (or ''), search string found, exit status, last run log output
+            for each command processed (up to the one that timed out)
         """
-        # TODO: Better detect special commands (use devices.ini)
-        return re.match('conf$', command) is not None
+        pipeline = _PendingPipeline(self, commands)
+
+        # Send the commands to the host
+        self.shell.send(pipeline.command_line + "\n")
+
+        while not pipeline.completed:
+            try:
+                pipeline.feed(self.recv())
+            except KeyboardInterrupt:
+                self.util.key_interrupt()
+            except socket.timeout:
+                pipeline.timeout()
+                break
+
+        return pipeline.results()
 
-    def __detect_sudo(self, command):
+    def can_pipeline(self, commands):
         """
-        Detect if command is using sudo
-        :param command: Command to test
-        :return: True if command contains sudo, False otherwise
+        Check if commands can be sent at once (see send_cmds_pipelined()): they run in an sh-style shell, need no
+        interaction and can be chained on a command line not too long.
+        :param commands: List of commands
+        :return: True if the commands can be pipelined, False otherwise
         """
-        # TODO: Better detect sudo root equivalent commands
-        return re.match('(sudo (root|su).*)$', command) is not None
+        if self.shell is None or self.device_type != self.DEVICE_TYPE_SHELL:
+            return False
+        for command in commands:
+            if (_PendingCommand.is_special_command(command) or _PendingCommand.is_sudo_command(command) or
+                    '#' in command or '\n' in command):
+                return False  # A comment would hide the commands after
+        return sum(len(command) + 64 for command in commands) <= self.PIPELINE_MAX_LINE
+
+    def use_exec(self, command, wait_string=''):
+        """
+        Check if a command can run over an exec channel: exec mode is on, the command needs no interaction
+        (wait strings, sudo) and the interactive shell isn't used yet (commands run in it from then on, so that
+        they share its state, e.g. the user switched to).
+        :param command: Command to run
+        :param wait_string: String(s) to expect
+        :return: True to use an exec channel, False to use the shell
+        """
+        return (self.exec_mode and self.shell is None and not wait_string and
+                not _PendingCommand.is_special_command(command) and not _PendingCommand.is_sudo_command(command))
+
+    def start_command(self, command, search_string='', wait_string='', response_string='', interactive=True,
+                      pipelined=False):
+        """
+        Prepare the processing of a command's output (see send_cmd_wait_respond() for parameters).
+        Host drivers share everything but the actual I/O through the returned object.
+        :param interactive: True if the command is sent to the shell, False if run over an exec channel
+        :param pipelined: True if sent along with other commands (see send_cmds_pipelined())
+        :return: _PendingCommand instance
+        """
+        self.console_output_buffer = ''
+        self.search_string_isfound = ''
+        self.exit_status = None
+        pending = _PendingCommand(self, command, search_string, wait_string, response_string, interactive, pipelined)
+        if pending.is_special or pending.is_sudo:
+            self.expected_prompt_regex = self.original_prompt_regex
+        return pending
 
     def log(self, level, message, print_to_screen=False):
         """
@@ -561,3 +801,433 @@ class REORemoteHost(object):
             closed = True
         if closed:
             self.log(logging.DEBUG, 'Connection to ' + self.host + ' closed', False)
+
+
+class _PendingCommand(object):
+    """
+    Output processing of a command sent to a host: wait/response handling, prompt (completion)
+    detection and search strings evaluation. It does no I/O, host drivers feed it what they receive
+    and send what it returns.
+    Output is scanned as it streams: each chunk received is scanned once, along with the end of the
+    previous output (overlap) for matches spanning chunks. Search results therefore don't depend on how much
+    of the output is kept (see REOOutputCapture).
+    """
+    SCAN_OVERLAP = 256
+    """Minimum number of characters of previous output scanned again with new output"""
+
+    def __init__(self, rhost, command, search_string='', wait_string='', response_string='', interactive=True,
+                 pipelined=False):
+        """
+        Class constructor
+        :param rhost: Remote host the command is sent to
+        :param command: Command sent
+        :param search_string: Search string(s)
+        :param wait_string: String(s) to expect
+        :param response_string: String(s) to use as a response for wait_strings
+        :param interactive: True if sent to the shell, False if run over an exec channel (no echo, no prompt:
+            the driver sets completed at the end of the output)
+        :param pipelined: True if sent along with other commands (see _PendingPipeline), a sentinel is then
+            always used and the strings waited for are not displayed
+        """
+        self.rhost = rhost
+        """Remote host the command is sent to"""
+
+        self.command = command
+        """Command sent"""
+
+        self.search_string = search_string
+        """Search string(s) delimited"""
+
+        self.interactive = interactive
+        """True if sent to the shell, False if run over an exec channel"""
+
+        self.command_line = command
+        """Command line sent to the shell (with the sentinel if any)"""
+
+        self.exit_status = None
+        """Exit status of the command (None if unknown)"""
+
+        self.sentinel = None
+        """Compiled regex of the sentinel printed once the command completed, None to detect the prompt"""
+
+        self.search_strings = None
+        """Search strings list (without not found marker)"""
+
+        self.search_strings_display = None
+        """Search strings for screen display"""
+
+        self.wait_response_pair = []
+        """Remaining (wait string, response, response display) tuples"""
+
+        self.will_wait_respond = False
+        """True if wait strings are expected"""
+
+        self.received = REOOutputCapture(rhost.output_head_size, rhost.output_tail_size, rhost.output_spill_file)
+        """Output received (bounded capture of the raw bytes)"""
+
+        self.decoder = rhost.new_decoder()
+        """Incremental decoder of the output received"""
+
+        self.echoed = not interactive
+        """True once the command echo is received"""
+
+        self.tail = ''
+        """End of the output scanned so far (overlap with the next chunk)"""
+
+        self.since_response = 0
+        """Number of output characters since the command echo or the last response sent"""
+
+        self.found_search_strings = set()
+        """Search strings found in the output"""
+
+        self.found_wait_strings = set()
+        """Wait strings found in the output"""
+
+        self.prompt = re.compile(rhost.expected_prompt_regex) if interactive else None
+        """Compiled regex of the prompt (command completion), None if there is no prompt"""
+
+        self.completed = False
+        """Command completion flag"""
+
+        self.error_msg = ''
+        """Error message (or '')"""
+
+        self.is_special = self.is_special_command(command)
+        """True if a special command is used"""
+
+        self.is_sudo = self.is_sudo_command(command)
+        """True if command is using sudo"""
+
+        # Sentinel (sh-style shells only): a token unique to the command, printed after it with its exit status.
+        # The token is split in the command line so that its echo doesn't match, and the sentinel only matches
+        # with its final newline, so that an exit status split between reads isn't taken in part.
+        if pipelined or (interactive and rhost.sentinel_mode and rhost.device_type == rhost.DEVICE_TYPE_SHELL and
+                         not wait_string and not self.is_special and not self.is_sudo):
+            token = os.urandom(6).hex()
+            separator = ' ' if command.rstrip().endswith(('&', ';')) else '; '
+            self.command_line = (command + separator + "printf '\\n%s%s:%s\\n' '" + rhost.SENTINEL_PREFIX + "' '" +
+                                 token + "' \"$?\"")
+            self.sentinel = re.compile('\r?\n?' + re.escape(rhost.SENTINEL_PREFIX + token) + ':([0-9]+)\r?\n')
+
+        self.echo = self.command_line
+        """Echo of the command line expected before the output"""
+
+        if search_string:
+            self.search_strings = search_string.split(rhost.STRINGS_DELIMITER)
+
+            # Remove not found marker from search_strings list
+            if rhost.NOT_FOUND_MARKER in self.search_strings:
+                self.search_strings.remove(rhost.NOT_FOUND_MARKER)
+
+            self.search_strings_display = '\'' + "\' or \'".join(self.search_strings) + '\''
+
+            if rhost.str_vars_exist and not pipelined:
+                print(("  - Waiting for string(s): " + self.search_strings_display))
+
+        if wait_string:
+            wait_strings = wait_string.split(rhost.STRINGS_DELIMITER)
+            wait_strings_display = '\'' + "\',\'".join(wait_strings) + '\''
+            rhost.log(logging.DEBUG, "Wait String: " + wait_string, False)
+            if rhost.str_vars_exist:
+                print(("    - Waiting for string(s) in sequence: " + wait_strings_display))
+
+            response_strings = []
+            response_display = []
+            if response_string:
+                response_strings = response_string.split(rhost.STRINGS_DELIMITER)
+                # Replace key stroke markers with real chars and create a display-only list
+                response_display = response_strings[:]  # Create a copy of the response list
+                for i, rs in enumerate(response_strings):
+                    for key in rhost.KEY_STROKE:
+                        response_strings[i] = response_strings[i].replace(key, rhost.KEY_STROKE[key])
+                        response_display[i] = response_display[i].replace(key, rhost.KEY_STROKE_DISPLAY[key])
+
+                    # Allow sending password in cipher text (Format: $CT=<cipher text>),
+                    # useful for sudo requiring passwords or Cisco ASA 'enable' passwords
+                    cipher_text = re.search(re.escape(rhost.CIPHER_TEXT_MARKER) + '([^|]*)', rs)
+                    if cipher_text is not None:
+                        response_strings[i] = response_strings[i].replace(cipher_text.group(0),
+                                                                          REOUtility.decrypt_str(cipher_text.group(1),
+                                                                                                 rhost.cipher_key))
+                        response_display[i] = response_display[i].replace(cipher_text.group(0), '**********')
+            self.wait_response_pair = list(zip(wait_strings, response_strings, response_display))
+            if len(self.wait_response_pair) > 0:
+                self.will_wait_respond = True
+
+        self.matcher = REOStringMatcher.compile((self.search_strings or []) +
+                                                [pair[0] for pair in self.wait_response_pair])
+        """Matcher of all the search and wait strings"""
+
+        self.overlap = max(self.SCAN_OVERLAP, len(self.command_line), self.matcher.max_length)
+        """Number of characters of previous output scanned again with new output"""
+
+    def feed(self, data):
+        """
+        Process output received from the host.
+        :param data: Output received (bytes)
+        :return: String to send to the host in response to a wait string, None otherwise
+        """
+        rhost = self.rhost
+        self.received.write(data)
+
+        # New output without terminal artifacts (' \r'), including those split between reads
+        output = self.decoder.decode(data)
+        if output.startswith('\r') and self.tail.endswith(' '):
+            output = output[1:]
+            self.tail = self.tail[:-1]
+            self.since_response = max(self.since_response - 1, 0)
+        output = output.replace(' \r', '')
+
+        # Scanned with the end of the previous output
+        window = self.tail + output
+        if not self.echoed:
+            echo_index = window.find(self.echo)
+            if echo_index < 0:
+                self.tail = window[-self.overlap:]
+                return None
+            self.echoed = True
+            window = window[echo_index + len(self.echo):]
+            self.since_response = len(window)
+        else:
+            self.since_response += len(output)
+        self.tail = window[-self.overlap:]
+
+        # The command completed once the sentinel is received, what follows it isn't its output
+        sentinel = self.sentinel.search(window) if self.sentinel is not None else None
+
+        # Search and wait strings in a single pass
+        found = self.matcher.scan(window[:sentinel.start()] if sentinel else window)
+        if self.search_strings:
+            self.found_search_strings.update(key for key in self.search_strings if key in found)
+
+        # Wait strings are only looked for after the last response sent
+        wait_start = len(window) - self.since_response
+        for (wait, response, response_display) in self.wait_response_pair:
+            if wait in found and found[wait] >= wait_start:
+                self.found_wait_strings.add(wait)
+
+        if self.sentinel is not None:
+            self.completed = sentinel is not None
+            if self.completed:
+                self.exit_status = rhost.exit_status = int(sentinel.group(1))
+        else:
+            self.completed = (self.prompt is not None and self.prompt.search(window) is not None)
+        if self.completed:
+            return None
+
+        # command not completed, check for wait strings
+        if self.will_wait_respond:
+            for (wait, response, response_display) in self.wait_response_pair:
+                rhost.log(logging.DEBUG, "Looking for wait key: " + wait, False)
+                if wait in self.found_wait_strings:
+                    # Check if wait is a special key stroke character(s)
+                    key_stroke_isfound = True in [rhost.KEY_STROKE[ks] in response for ks in rhost.KEY_STROKE]
+
+                    # This is stripping the space when sending
+                    # $SPACE_KEY (or any other special char keystroke)
+                    if key_stroke_isfound:
+                        rstring = response
+                    else:
+                        rstring = response.strip()
+
+                    rhost.log(logging.DEBUG, "Found wait key: " + wait, False)
+                    print(("    - Found \'" + wait + "\'"))
+                    rhost.log(logging.DEBUG, "Sending response: " + rstring, False)
+                    print(("    - Sent response \'" + response_display + "\'"))
+
+                    self.wait_response_pair.remove((wait, response, response_display))
+                    self.since_response = 0
+                    self.found_wait_strings.clear()
+
+                    if key_stroke_isfound:
+                        return rstring
+                    return rstring + "\n"
+        return None
+
+    @staticmethod
+    def is_special_command(command):
+        """
+        Check if a command is a special one (changes the prompt).
+        :param command: Command
+        :return: True if special, False otherwise
+        """
+        # TODO: Better detect special commands (use devices.ini)
+        return re.match('conf$', command) is not None
+
+    @staticmethod
+    def is_sudo_command(command):
+        """
+        Check if a command switches to root with sudo.
+        :param command: Command
+        :return: True if using sudo, False otherwise
+        """
+        # TODO: Better detect sudo root equivalent commands
+        return re.match('(sudo (root|su).*)$', command) is not None
+
+    def timeout(self, last_run_log):
+        """
+        Handle a command time-out (the host stopped sending output before completion).
+        :param last_run_log: Log file for results of the last run
+        :return: None
+        """
+        rhost = self.rhost
+        rhost.console_output_buffer = self.received.getvalue()
+        rhost.util.print_debug("Timeout, console_output_buffer: " + rhost.console_output_buffer)
+        if self.will_wait_respond:
+            # If wait_strings not all consumed and the shell timed out,
+            # it may mean that the wait strings are incorrect
+            print(("  - Wait string(s) not found and command timeout. Timeout value: " + str(rhost.cmd_timeout)))
+            last_run_log.write("Not Found\n")
+        rhost.log(logging.ERROR, 'Command timeout. No more commands will be sent to this host.', False)
+        self.error_msg = 'Command timeout. No more commands will be sent to this host.'
+
+    def finish(self, last_run_log):
+        """
+        Evaluate search strings and report wait strings left once the command completed (or timed out).
+        :param last_run_log: Log file for results of the last run
+        :return: None
+        """
+        rhost = self.rhost
+        rhost.console_output_buffer = self.received.getvalue()
+        self.received.close()
+        if self.search_strings:
+            # Look for search strings (in order of preference)
+            for search_key in self.search_strings:
+                if search_key == rhost.NOT_FOUND_MARKER: continue  # Ignore "not found" marker
+                rhost.log(logging.DEBUG, "Looking for search key: " + search_key, False)
+                if search_key in self.found_search_strings:
+                    rhost.log(logging.DEBUG, "Found search key: " + search_key, False)
+                    rhost.search_string_isfound = search_key
+                    break
+            else:  # if for loop terminates without breaking (ie, no search_string found)
+                rhost.util.print_debug("Current output: " + rhost.console_output_buffer)
+                if rhost.NOT_FOUND_MARKER not in self.search_string:
+                    print(("  - Search string(s) " + self.search_strings_display + " not found."))
+                    last_run_log.write("Not Found: " + self.search_strings_display + "\n")
+                if rhost.NOT_FOUND_MARKER in self.search_string:
+                    rhost.search_string_isfound = rhost.NOT_FOUND_MARKER
+                else:
+                    rhost.search_string_isfound = ''  # Exited on timeout, not a wait keyword
+        if len(self.wait_response_pair) > 0:
+            keys_not_found = ", ".join(
+                ["'" + pair[0] + "'" for pair in self.wait_response_pair if pair[0] not in self.found_wait_strings])
+            keys_found = ", ".join(
+                ["'" + pair[0] + "'" for pair in self.wait_response_pair if pair[0] in self.found_wait_strings])
+            if keys_not_found != '':
+                rhost.log(logging.DEBUG, "Wait keys not found: " + keys_not_found, False)
+                print(("  - Wait strings not found: " + keys_not_found + ""))
+            if keys_found != '':
+                rhost.log(logging.DEBUG,
+                          "Wait keys found but response not sent because prompt immediately returned: " + keys_found,
+                          False)
+                print((
+                        "  - Wait strings found but response not sent because prompt immediately returned: " +
+                        keys_found + ""))
+
+    def output(self):
+        """
+        Get the console output of the command (personalized prompt and sentinel removed).
+        :return: Output string
+        """
+        rhost = self.rhost
+        rhost.util.print_debug("Output:\n" + rhost.console_output_buffer.replace(' \r', ''))
+        output = rhost.console_output_buffer
+        if self.interactive:
+            # Drop what was received before the echo (e.g. the prompt following a previous command's sentinel)
+            output = output[max(output.find(self.echo), 0):].replace(self.echo, self.command, 1)
+        if self.sentinel is not None:
+            output = self.sentinel.sub('', output, 1)
+        return re.sub(rhost.new_prompt_regex, '', output).replace(' \r', '')
+
+
+class _PendingPipeline(object):
+    """
+    Output processing of commands sent at once on a single command line, each followed by its sentinel: the output
+    is split at the sentinels and each part processed by the _PendingCommand of its command, in sequence.
+    It does no I/O, host drivers feed it what they receive.
+    """
+    HOLD_BACK = 64
+    """Number of characters held until more output is received, so that a sentinel is not split between commands"""
+
+    def __init__(self, rhost, commands):
+        """
+        Class constructor
+        :param rhost: Remote host the commands are sent to
+        :param commands: List of tuples of: command, search string(s)
+        """
+        self.rhost = rhost
+        """Remote host the commands are sent to"""
+
+        self.pendings = [rhost.start_command(command, search_string, pipelined=True)
+                         for command, search_string in commands]
+        """Processing of each command"""
+
+        self.last_run_logs = [io.StringIO() for pending in self.pendings]
+        """Last run log output of each command"""
+
+        self.command_line = '; '.join(pending.command_line for pending in self.pendings)
+        """Command line sent to the shell"""
+
+        # The command line is echoed once, before the output of the first command
+        self.pendings[0].echo = self.command_line
+        self.pendings[0].overlap = max(self.pendings[0].overlap, len(self.command_line))
+        for pending in self.pendings[1:]:
+            pending.echoed = True
+
+        self.current = 0
+        """Index of the command whose output is being received"""
+
+        self.decoder = rhost.new_decoder()
+        """Incremental decoder of the output received"""
+
+        self.buffer = ''
+        """Output received not processed yet"""
+
+        self.completed = False
+        """Completion flag (all the commands completed)"""
+
+    def feed(self, data):
+        """
+        Process output received from the host.
+        :param data: Output received (bytes)
+        :return: None
+        """
+        self.buffer += self.decoder.decode(data)
+        while not self.completed:
+            pending = self.pendings[self.current]
+            sentinel = pending.sentinel.search(self.buffer)
+            if sentinel is None:
+                if len(self.buffer) > self.HOLD_BACK:
+                    pending.feed(self.buffer[:-self.HOLD_BACK].encode('utf-8'))
+                    self.buffer = self.buffer[-self.HOLD_BACK:]
+                return
+            pending.feed(self.buffer[:sentinel.end()].encode('utf-8'))
+            pending.received.close()  # Spilled in order
+            self.buffer = self.buffer[sentinel.end():]
+            self.current += 1
+            self.completed = self.current == len(self.pendings)
+
+    def timeout(self):
+        """
+        Handle a time-out of the command whose output is being received.
+        :return: None
+        """
+        if self.buffer:
+            self.pendings[self.current].feed(self.buffer.encode('utf-8'))
+        self.pendings[self.current].timeout(self.last_run_logs[self.current])
+
+    def results(self):
+        """
+        Evaluate the commands processed.
+        :return: List of tuples of: output, error_msg (or ''), search string found, exit status, last run log output
+        """
+        results = []
+        for pending, last_run_log in zip(self.pendings[:self.current + 1], self.last_run_logs):
+            self.rhost.search_string_isfound = ''
+            pending.finish(last_run_log)
+            output = pending.output()
+            if pending is not self.pendings[0]:
+                output = pending.command + '\n' + output  # Echoed with the first command
+            results.append((output, pending.error_msg, self.rhost.search_string_isfound, pending.exit_status,
+                            last_run_log.getvalue()))
+        return results
@@ -0,0 +1,63 @@
+class REOReorderBuffer(object):
+    """
+    Stream writer for items completed out of order (e.g. hosts processed concurrently). Items are indexed by
+    their position in the original order and written as soon as all items before them were written.
+    Only items completed ahead of the oldest missing one are held: producers use accepts() to bound how far
+    ahead they go, which bounds the memory used.
+    """
+
+    def __init__(self, stream, first_index=1, limit=1000):
+        """
+        Class constructor
+        :param stream: File-like object to write to
+        :param first_index: Index of the first item
+        :param limit: Maximum number of items held, ie. how far ahead of the next item to write items can be
+        """
+        self.stream = stream
+        """File-like object written to"""
+
+        self.next_index = first_index
+        """Index of the next item to write"""
+
+        self.limit = limit
+        """Maximum number of items held"""
+
+        self.pending = {}
+        """Items held, by index"""
+
+    def accepts(self, index):
+        """
+        Check if an item can be started without exceeding the items held limit.
+        :param index: Item index
+        :return: True if the item can be started, False to wait for the items before it.
+        """
+        return index < self.next_index + self.limit
+
+    def put(self, index, data):
+        """
+        Add a completed item and write all items now in order.
+        :param index: Item index
+        :param data: Item string
+        :return: Number of items written
+        """
+        self.pending[index] = data
+        written = 0
+        while self.next_index in self.pending:
+            self.stream.write(self.pending.pop(self.next_index))
+            self.next_index += 1
+            written += 1
+        if written:
+            self.stream.flush()
+        return written
+
+    def close(self):
+        """
+        Write the items still held, in order, skipping missing ones (e.g. processing halted).
+        :return: None
+        """
+        for index in sorted(self.pending):
+            self.stream.write(self.pending[index])
+        if self.pending:
+            self.next_index = max(self.pending) + 1
+            self.pending.clear()
+        self.stream.flush()
@@ -0,0 +1,294 @@
+import itertools
+import logging
+import pathlib
+import re
+import sqlite3
+import sys
+
+
+class REOSqliteInventory(object):
+    """
+    Hosts inventory kept in a table of a SQLite database, with the interface of REODelimitedFile (header,
+    iteration of rows as dicts, get_row_val()) and of the column oriented inventories (see HostFilter.select()):
+    conditions are turned into SQL expressions combined into a single WHERE clause, so that the database
+    selects the rows (using the indexes of the columns for equality) and only the matching rows are read.
+    Values are read as strings, NULL as an empty string. The database is opened read-only.
+    Rows are identified by their rowid, in rowid order. Tables created WITHOUT ROWID are read in primary key order,
+    a selection reading the values of its rows directly (used as row ids).
+    """
+    FETCH_SIZE = 500
+    """Number of rows read per query when reading rows by row id"""
+
+    def __init__(self, file_src, table='', logger=None):
+        """
+        Class constructor
+        :param file_src: SQLite database file
+        :param table: Table of the hosts (the first table of the database if empty)
+        :param logger: Optional logger (from logging module)
+        """
+        self.file_name = file_src
+        """SQLite database file"""
+
+        self.logger = logger
+        """Optional logger (from logging module) for this class"""
+
+        self.connection = None
+        """Database connection (opened when first needed)"""
+
+        self.current_row = None
+        """Current row (dict) being processed"""
+
+        self.row_count = None
+        """Number of rows in the table (None until counted)"""
+
+        if not table:
+            tables = self.connect().execute("SELECT name FROM sqlite_master WHERE type = 'table' AND "
+                                            "name NOT LIKE 'sqlite_%' ORDER BY rowid").fetchall()
+            if not tables:
+                self.log(logging.ERROR, "Aborting...No table found in " + self.file_name + ".", True)
+                sys.exit(1)
+            table = tables[0][0]
+
+        self.table = table
+        """Table of the hosts"""
+
+        columns = self.connect().execute('PRAGMA table_info(' + self.quote(table) + ')').fetchall()
+
+        self.header_list = [column[1] for column in columns]
+        """Header row (column names) as a list"""
+        if not self.header_list:
+            self.log(logging.ERROR, "Aborting...Table: " + table + " not found in " + self.file_name + ".", True)
+            sys.exit(1)
+
+        self.columns_sql = ', '.join(self.quote(name) for name in self.header_list)
+        """Columns of the header, for SELECT statements"""
+
+        table_sql = self.connect().execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                           (table,)).fetchone()
+
+        self.has_rowid = not (table_sql and table_sql[0] and
+                              re.search(r'\bWITHOUT\s+ROWID\s*;?\s*$', table_sql[0], re.IGNORECASE))
+        """False if the table was created WITHOUT ROWID"""
+
+        self.order_sql = 'rowid'
+        """ORDER BY clause of the table order"""
+        if not self.has_rowid:
+            self.order_sql = ', '.join(self.quote(column[1]) for column in sorted(columns, key=lambda c: c[5])
+                                       if column[5])
+
+    def connect(self):
+        """
+        Get the database connection, opened read-only if not done yet.
+        :return: sqlite3 connection
+        """
+        if self.connection is None:
+            try:
+                # Rows may be read by the thread of a hosts worker, one at a time
+                self.connection = sqlite3.connect(pathlib.Path(self.file_name).resolve().as_uri() + '?mode=ro',
+                                                  uri=True, check_same_thread=False)
+            except sqlite3.Error as e:
+                self.log(logging.ERROR, "Aborting...Unable to open " + self.file_name + ": " + str(e), True)
+                sys.exit(1)
+        return self.connection
+
+    @classmethod
+    def text(cls, name):
+        """
+        Get the SQL expression of a column value as compared by the other inventories: a string, empty if NULL.
+        :param name: Column name
+        :return: SQL expression
+        """
+        return 'IFNULL(CAST(' + cls.quote(name) + " AS TEXT), '')"
+
+    @staticmethod
+    def quote(name):
+        """
+        Quote an identifier (table or column name) for SQL.
+        :param name: Identifier
+        :return: Quoted identifier
+        """
+        return '"' + name.replace('"', '""') + '"'
+
+    def query(self, where='', params=(), row_ids=False):
+        """
+        Generator of the rows of the table meeting a WHERE clause, in table order.
+        :param where: SQL expression (all rows if empty)
+        :param params: Parameters of the expression
+        :param row_ids: True to get the row ids only (the rows of a table without rowid)
+        :return: Lists of values (strings), or row ids
+        """
+        row_ids = row_ids and self.has_rowid
+        sql = 'SELECT ' + ('rowid' if row_ids else self.columns_sql) + ' FROM ' + self.quote(self.table)
+        if where:
+            sql += ' WHERE ' + where
+        sql += ' ORDER BY ' + self.order_sql
+        self.log(logging.DEBUG, "Inventory query: " + sql + " " + str(list(params)))
+        cursor = self.connect().execute(sql, list(params))
+        if row_ids:
+            for row in cursor:
+                yield row[0]
+        else:
+            for row in cursor:
+                yield ['' if value is None else str(value) for value in row]
+
+    def rows_values(self):
+        """
+        Generator of the rows as lists of values, in the column order of the header (no dict created).
+        :return: Lists of values
+        """
+        return self.query()
+
+    def __iter__(self):
+        """
+        Iterator over rows in the table
+        :return: Rows as dicts
+        """
+        for values in self.query():
+            self.current_row = dict(zip(self.header_list, values))
+            yield self.current_row
+
+    def __len__(self):
+        """
+        Return the number of rows (counted once)
+        :return: Number of rows
+        """
+        if self.row_count is None:
+            self.row_count = self.connect().execute('SELECT COUNT(*) FROM ' + self.quote(self.table)).fetchone()[0]
+        return self.row_count
+
+    def get_row_val(self, row=None, col_idx=0, name=''):
+        """
+        Get host row value by index or name
+        :param row: Row being affected
+        :param col_idx: index
+        :param name: column name
+        :return: row value
+        """
+        col_name = ''
+
+        try:
+            if name == '':
+                col_name = self.header_list[col_idx]
+            else:
+                col_name = name
+            if not row:
+                row = self.current_row
+        except:
+            self.log(logging.ERROR, "Invalid file key column: \'" + col_name + "\' or column index: " + str(
+                col_idx) + ". Check input file.", True)
+            sys.exit(2)
+
+        return row[col_name]
+
+    def row(self, row_id):
+        """
+        Get a row.
+        :param row_id: Row id
+        :return: Row as a dict keyed by column name
+        """
+        for row in self.rows([row_id]):
+            return row
+
+    def rows(self, row_ids):
+        """
+        Generator of rows, read by batches of FETCH_SIZE.
+        :param row_ids: Row ids, in the order rows are wanted
+        :return: Rows as dicts keyed by column name
+        """
+        if not self.has_rowid:
+            for values in row_ids:
+                yield dict(zip(self.header_list, values))
+            return
+
+        row_ids = iter(row_ids)
+        while True:
+            batch = list(itertools.islice(row_ids, self.FETCH_SIZE))
+            if not batch:
+                return
+            sql = ('SELECT rowid, ' + self.columns_sql + ' FROM ' + self.quote(self.table) + ' WHERE rowid IN (' +
+                   ', '.join('?' * len(batch)) + ')')
+            rows = dict((row[0], row[1:]) for row in self.connect().execute(sql, batch))
+            for row_id in batch:
+                yield dict(zip(self.header_list, ['' if value is None else str(value) for value in rows[row_id]]))
+
+    def equal(self, name, value):
+        """
+        Get the rows with a column equal to a value: compared as is first, so that an index of the column is used,
+        then as text (e.g. '1' equals 1 in an INTEGER column, but not in a REAL column where it is '1.0').
+        :param name: Column name
+        :param value: Value
+        :return: Selection: tuple of SQL expression, parameters
+        """
+        if value == '':
+            return self.text(name) + " = ''", ()
+        return '(' + self.quote(name) + ' = ? AND ' + self.text(name) + ' = ?)', (value, value)
+
+    def not_equal(self, name, value):
+        """
+        Get the rows with a column not equal to a value.
+        :param name: Column name
+        :param value: Value
+        :return: Selection: tuple of SQL expression, parameters
+        """
+        return self.text(name) + ' != ?', (value,)
+
+    def contains(self, name, value):
+        """
+        Get the rows with a column containing a value (case sensitive, as the other inventories).
+        :param name: Column name
+        :param value: Value
+        :return: Selection: tuple of SQL expression, parameters
+        """
+        return 'INSTR(' + self.text(name) + ', ?) > 0', (value,)
+
+    @staticmethod
+    def intersection(selections):
+        """
+        Get the rows in all selections.
+        :param selections: List of selections
+        :return: Selection: tuple of SQL expression, parameters
+        """
+        return ('(' + ' AND '.join(where for where, params in selections) + ')',
+                tuple(param for where, params in selections for param in params))
+
+    @staticmethod
+    def union(selections):
+        """
+        Get the rows in any selection.
+        :param selections: List of selections
+        :return: Selection: tuple of SQL expression, parameters
+        """
+        return ('(' + ' OR '.join(where for where, params in selections) + ')',
+                tuple(param for where, params in selections for param in params))
+
+    def row_ids(self, selection):
+        """
+        Generator of the row ids of a selection in table order, selected by the database.
+        :param selection: Selection: tuple of SQL expression, parameters
+        :return: Row ids
+        """
+        where, params = selection
+        return self.query(where, params, row_ids=True)
+
+    def __getstate__(self):
+        """
+        Pickle support (e.g. sent to another process): the connection is opened again when needed.
+        :return: State dict
+        """
+        state = self.__dict__.copy()
+        state['connection'] = None
+        state['current_row'] = None
+        return state
+
+    def log(self, level, message, print_to_screen=False):
+        """
+        Logging mechanism if defined.
+        :param print_to_screen: True to print message to screen as well
+        :param level: Log level
+        :param message: Message
+        :return:
+        """
+        if print_to_screen:
+            print(message)
+        if self.logger:
+            self.logger.log(level, message)
@@ -0,0 +1,46 @@
+import sys
+
+from .REOProviderInventory import REOProviderInventory
+
+
+class REOStdinInventory(REOProviderInventory):
+    """
+    Hosts inventory read from the standard input (e.g. piped from another tool), in the formats printed by
+    inventory providers (see REOProviderInventory): CSV, JSON lines or a JSON array. Rows are read as they
+    come, so that hosts are processed while the input is still being written. The input can only be read once:
+    it is never cached and the number of rows is the number read so far (the whole input once iterated).
+    """
+
+    def __init__(self, stream=None, logger=None):
+        """
+        Class constructor
+        :param stream: Text stream of the inventory (stdin if None)
+        :param logger: Optional logger (from logging module)
+        """
+        self.stream = stream or sys.stdin
+        """Text stream of the inventory"""
+
+        super(self.__class__, self).__init__('<stdin>', logger=logger)
+
+    def read_records(self):
+        """
+        Generator reading the input as it comes.
+        :return: Lists of values (strings): the header first, then the rows
+        """
+        return self.read_output(self.stream)
+
+    def __len__(self):
+        """
+        Return the number of rows read so far (the input is not read further)
+        :return: Number of rows
+        """
+        return len(self.rows or ())
+
+    def __getstate__(self):
+        """
+        Pickle support (e.g. sent to another process): the input is not carried over, the rows read are.
+        :return: State dict
+        """
+        state = super(self.__class__, self).__getstate__()
+        state['stream'] = None
+        return state
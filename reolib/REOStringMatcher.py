@@ -0,0 +1,97 @@
+import re
+
+
+class REOStringMatcher(object):
+    """
+    Finds all of a set of strings (and optionally regular expressions, prefixed with REGEX_PREFIX) in a text
+    in a single pass. Literal strings are compiled into one regex alternation tried at every position
+    (longest first), strings contained in a longer one found are reported too. A literal string starting
+    with a prefix is escaped with LITERAL_PREFIX (e.g. 'lit:re:' finds 're:'). Use compile() to share
+    matchers built for the same strings.
+    """
+    REGEX_PREFIX = 're:'
+    """Prefix marking a string as a regular expression"""
+
+    LITERAL_PREFIX = 'lit:'
+    """Prefix marking a string as literal (removed), for strings starting with a prefix"""
+
+    MAX_COMPILED = 256
+    """Maximum number of matchers kept by compile()"""
+
+    __compiled = {}
+    """Matchers already built, by strings tuple"""
+
+    def __init__(self, patterns):
+        """
+        Class constructor
+        :param patterns: Strings to find (REGEX_PREFIX for regular expressions, LITERAL_PREFIX to escape)
+        """
+        self.patterns = tuple(patterns)
+        """Strings to find"""
+
+        self.escaped = {}
+        """Strings escaped with LITERAL_PREFIX, by literal string"""
+        for p in self.patterns:
+            if p.startswith(self.LITERAL_PREFIX):
+                self.escaped.setdefault(p[len(self.LITERAL_PREFIX):], set()).add(p)
+
+        literals = sorted(set(p for p in self.patterns if not p.startswith((self.REGEX_PREFIX, self.LITERAL_PREFIX))) |
+                          set(self.escaped), key=len, reverse=True)
+
+        self.literals_regex = None
+        """Compiled alternation of the literal strings (None if none)"""
+        if [p for p in literals if p]:
+            self.literals_regex = re.compile('(?=(' + '|'.join(re.escape(p) for p in literals if p) + '))')
+
+        self.contained = dict((p, [c for c in literals if c != p and c and c in p]) for p in literals)
+        """Literal strings contained in each literal string"""
+
+        self.always_found = '' in literals
+        """True if the empty string is one of the strings"""
+
+        self.regexes = [(p, re.compile(p[len(self.REGEX_PREFIX):])) for p in self.patterns
+                        if p.startswith(self.REGEX_PREFIX)]
+        """Compiled regular expressions"""
+
+        self.max_length = max([len(p) for p in literals] + [0])
+        """Length of the longest literal string"""
+
+    @classmethod
+    def compile(cls, patterns):
+        """
+        Get a matcher for strings, built once for the same strings.
+        :param patterns: Strings to find (REGEX_PREFIX for regular expressions, LITERAL_PREFIX to escape)
+        :return: REOStringMatcher instance
+        """
+        patterns = tuple(patterns)
+        matcher = cls.__compiled.get(patterns)
+        if matcher is None:
+            if len(cls.__compiled) >= cls.MAX_COMPILED:
+                cls.__compiled.clear()  # e.g. strings with host variables, different for each host
+            matcher = cls.__compiled[patterns] = REOStringMatcher(patterns)
+        return matcher
+
+    def scan(self, text):
+        """
+        Find the strings in a text.
+        :param text: Text to scan
+        :return: Dict of the strings found with the start position of their last occurrence
+        """
+        found = {}
+        if self.literals_regex:
+            for match in self.literals_regex.finditer(text):
+                key = match.group(1)
+                start = match.start()
+                found[key] = max(found.get(key, 0), start)
+                for contained in self.contained[key]:
+                    found[contained] = max(found.get(contained, 0), start + key.rindex(contained))
+        if self.always_found:
+            found[''] = len(text)
+        for literal, patterns in self.escaped.items():
+            if literal in found:
+                for pattern in patterns:
+                    found[pattern] = found[literal]
+        for pattern, regex in self.regexes:
+            for match in regex.finditer(text):
+                found[pattern] = match.start()
+        return found
@@ -1,4 +1,5 @@
 import base64
+import contextvars
 import datetime
 import getpass
 import json
@@ -6,6 +7,7 @@ import logging
 import re
 import socket
 import subprocess
+import sys
 import traceback
 from logging.handlers import RotatingFileHandler
 import random
@@ -46,6 +48,37 @@ class PasswordBlur:
         return s[:-ord(s[len(s) - 1:])]
 
 
+class ContextStdout(object):
+    """
+    Stand-in for sys.stdout that sends writes to a buffer redirected for the current context (thread or
+    asyncio task), or to the wrapped stream otherwise. Used to keep per-host output together when
+    hosts are processed concurrently.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = contextvars.ContextVar('buffer', default=None)
+
+    def redirect(self, buffer):
+        """
+        Send the current context's writes to a buffer (None to go back to the wrapped stream).
+        :param buffer: File-like object
+        :return: None
+        """
+        self.buffer.set(buffer)
+
+    def write(self, s):
+        buffer = self.buffer.get()
+        return (buffer if buffer is not None else self.stream).write(s)
+
+    def flush(self):
+        if self.buffer.get() is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
 class REOUtility:
     """
     This class is a collection of utility methods static and otherwise.
@@ -53,6 +86,9 @@ class REOUtility:
 
     CIPHER_KEY = '#$a%9_(1fsa!@WxfjZU<><!@#$W^_;-!'
 
+    prompt_input = None
+    """Stream prompts are answered from, None for stdin (e.g. the terminal when stdin is the hosts inventory)"""
+
     def __init__(self, d=False):
         """
         Class constructor
@@ -252,7 +288,7 @@ class REOUtility:
 
         while True:
             print(question + prompt, end=' ')
-            choice = input().lower()
+            choice = cls.read_input().lower()
             if default is not None and choice == '':
                 print("")  # Display blank line
                 return valid[default]
@@ -353,6 +389,21 @@ class REOUtility:
                 retval = retval[:-1]  # Remove last character
         return retval
 
+    @classmethod
+    def read_input(cls):
+        """
+        Read the answer to a prompt, from stdin or prompt_input if set.
+        :return: Line read (without line break)
+        """
+        if cls.prompt_input is None:
+            return input()
+        sys.stdout.flush()
+        line = cls.prompt_input.readline()
+        if not line:
+            print("\nAborting...No input available to answer the prompt.")
+            sys.exit(2)
+        return line.rstrip('\r\n')
+
     @classmethod
     def prompt_user_password(cls, user_prompt=True, password_prompt=True, desc=''):
         """
@@ -364,7 +415,7 @@ class REOUtility:
         if user_prompt:
             while not username:
                 print(desc + " User Name: ", end=' ')
-                username = input()
+                username = cls.read_input()
 
         if password_prompt:
             pwdprompt = lambda: (getpass.getpass(prompt=desc + ' Password: '), getpass.getpass('Retype password: '))
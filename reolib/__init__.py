@@ -1,4 +1,15 @@
+from .REOAsyncRemoteHost import REOAsyncRemoteHost
+from .REOColumnarInventory import REOColumnarInventory
 from .REODelimitedFile import REODelimitedFile
+from .REOHostCache import REOHostCache
+from .REOInventoryCache import REOInventoryCache
+from .REONumpyInventory import REONumpyInventory
+from .REOOutputCapture import REOOutputCapture
+from .REOProviderInventory import REOProviderInventory
 from .REORemoteHost import REORemoteHost
+from .REOReorderBuffer import REOReorderBuffer
 from .REOScript import REOScript
+from .REOSqliteInventory import REOSqliteInventory
+from .REOStdinInventory import REOStdinInventory
+from .REOStringMatcher import REOStringMatcher
 from .REOUtility import REOUtility
@@ -0,0 +1,61 @@
+import asyncio
+import io
+
+from reolib.REOAsyncRemoteHost import REOAsyncRemoteHost
+
+
+def run_host(commands):
+    """Connect to the test server and run a coroutine function given the connected host"""
+    async def main():
+        rhost = REOAsyncRemoteHost('127.0.0.1')
+        connected = await rhost.connect_host(u='user', trust_hosts=True, agent_only=True)
+        try:
+            return connected, rhost, await commands(rhost)
+        finally:
+            rhost.close()
+
+    return asyncio.run(main())
+
+
+def test_send_cmd_wait_respond(ssh_server):
+    async def commands(rhost):
+        return await rhost.send_cmd_wait_respond('echo hello', 'hello|nothing', last_run_log=io.StringIO())
+
+    connected, rhost, (output, error_msg) = run_host(commands)
+    assert connected
+    assert rhost.connect_status_string == rhost.SERVER_STATUS_CONNECTED
+    assert rhost.expected_prompt_regex == rhost.new_prompt_regex
+    assert error_msg == ''
+    assert 'hello' in output
+    assert rhost.search_string_isfound == 'hello'
+
+
+def test_command_timeout(ssh_server):
+    async def commands(rhost):
+        rhost.cmd_timeout = 0.5
+        return await rhost.send_cmd_wait_respond('sleep 5', last_run_log=io.StringIO())
+
+    output, error_msg = run_host(commands)[2]
+    assert error_msg.startswith('Command timeout')
+
+
+def test_exec_cmd(ssh_server):
+    async def commands(rhost):
+        return await rhost.exec_cmd('echo out; exit 3', 'out')
+
+    connected, rhost, (output, error_msg) = run_host(commands)
+    assert output.strip() == 'out'
+    assert rhost.exit_status == 3
+    assert rhost.search_string_isfound == 'out'
+
+
+def test_unreachable(ssh_server, monkeypatch):
+    monkeypatch.setattr(REOAsyncRemoteHost, 'SSH_PORT', 1)
+
+    async def main():
+        rhost = REOAsyncRemoteHost('127.0.0.1')
+        return await rhost.connect_host(u='user', trust_hosts=True, agent_only=True), rhost
+
+    connected, rhost = asyncio.run(main())
+    assert not connected
+    assert rhost.connect_status_string == rhost.SERVER_STATUS_UNABLE_TO_REACH
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from reolib.REOColumnarInventory import REOColumnarInventory
+from reolib.REODelimitedFile import REODelimitedFile
+from reolib.REOInventoryCache import REOInventoryCache
+
+HEADER = ['Name', 'Site']
+ROWS = [['app1', 'DAL'], ['db1', 'NYC'], ['app2'], ['web1', 'DAL'], ['app10', 'SIN'], ['db2', 'NYC']]
+
+
+def values(row):
+    return dict(zip(HEADER, row + [''] * (len(HEADER) - len(row))))
+
+
+def scanned(condition):
+    return set(i for i, row in enumerate(ROWS) if condition(values(row)))
+
+
+@pytest.mark.parametrize('name, value', [('Name', 'app1'), ('Site', 'DAL'), ('Site', ''), ('Name', 'missing')])
+def test_equal(name, value):
+    inventory = REOColumnarInventory(HEADER, ROWS)
+    assert inventory.equal(name, value) == scanned(lambda row: row[name] == value)
+    assert inventory.not_equal(name, value) == scanned(lambda row: row[name] != value)
+
+
+@pytest.mark.parametrize('name, value', [('Name', 'app1'), ('Name', 'pp'), ('Name', 'app'), ('Name', 'b1'),
+                                         ('Name', 'pp10'), ('Name', 'xyz'), ('Site', ''), ('Site', 'DALL')])
+def test_contains(name, value):
+    inventory = REOColumnarInventory(HEADER, ROWS)
+    assert inventory.contains(name, value) == scanned(lambda row: value in row[name])
+
+
+def test_rows():
+    inventory = REOColumnarInventory(HEADER, ROWS)
+    assert len(inventory) == 6
+    assert list(inventory.rows([2, 0])) == [values(ROWS[2]), values(ROWS[0])]
+    assert inventory.row_ids(inventory.equal('Site', 'NYC')) == [1, 5]
+
+
+def test_cache(tmp_path, monkeypatch):
+    hosts_file = tmp_path / 'hosts.csv'
+    hosts_file.write_text('Name,Site\n' + ''.join(','.join(row) + '\n' for row in ROWS))
+    cache = REOInventoryCache(str(tmp_path / 'cache'))
+    built = REOColumnarInventory.from_file(REODelimitedFile(str(hosts_file), ',', has_header=True), cache)
+    assert os.path.isfile(cache.cache_file(str(hosts_file)))
+
+    # Loaded with its indexes, not built again
+    monkeypatch.setattr(REOColumnarInventory, 'build_indexes', None)
+    loaded = REOColumnarInventory.from_file(REODelimitedFile(str(hosts_file), ',', has_header=True), cache)
+    assert list(loaded.rows(range(len(loaded)))) == list(built.rows(range(len(built))))
+    assert loaded.contains('Name', 'app1') == {0, 4}
+    assert loaded.equal('Site', 'NYC') == {1, 5}
+    monkeypatch.undo()
+
+    hosts_file.write_text('Name,Site\napp9,DAL\n')
+    changed = REOColumnarInventory.from_file(REODelimitedFile(str(hosts_file), ',', has_header=True), cache)
+    assert list(changed.rows([0])) == [{'Name': 'app9', 'Site': 'DAL'}]
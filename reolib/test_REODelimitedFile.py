@@ -0,0 +1,27 @@
+from reolib.REODelimitedFile import REODelimitedFile
+
+HOSTS = ('Name, IP, Site\n'
+         'app1, 10.0.0.1, DAL\n'
+         '\n'
+         '"db1, primary", 10.0.0.2, "NYC"\n')
+
+
+def write_hosts(tmp_path, content=HOSTS):
+    hosts_file = tmp_path / 'hosts.csv'
+    hosts_file.write_text(content)
+    return str(hosts_file)
+
+
+def test_parse(tmp_path):
+    hosts = REODelimitedFile(write_hosts(tmp_path), ',', has_header=True)
+    assert hosts.header_list == ['Name', 'IP', 'Site']
+    assert list(hosts) == [{'Name': 'app1', 'IP': '10.0.0.1', 'Site': 'DAL'},
+                           {'Name': 'db1, primary', 'IP': '10.0.0.2', 'Site': 'NYC'}]
+    assert len(hosts) == 2
+    assert hosts.get_row_val(name='Name') == 'db1, primary'
+
+
+def test_without_header(tmp_path):
+    hosts = REODelimitedFile(write_hosts(tmp_path), ',')
+    assert hosts.header_list is None
+    assert list(hosts)[0] == ['Name', 'IP', 'Site']
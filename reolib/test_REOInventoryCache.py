@@ -0,0 +1,49 @@
+import os
+
+from reolib.REODelimitedFile import REODelimitedFile
+from reolib.REOInventoryCache import REOInventoryCache
+
+HOSTS = ('Name, IP, Site\n'
+         'app1, 10.0.0.1, DAL\n'
+         '\n'
+         '"db1, primary", 10.0.0.2, "NYC"\n')
+
+
+def write_hosts(tmp_path, content=HOSTS):
+    hosts_file = tmp_path / 'hosts.csv'
+    hosts_file.write_text(content)
+    return str(hosts_file)
+
+
+def test_cache_round_trip(tmp_path):
+    file_name = write_hosts(tmp_path)
+    cache = REOInventoryCache(str(tmp_path / 'cache'))
+    parsed = list(REODelimitedFile(file_name, ',', has_header=True, cache=cache))
+    assert os.path.isfile(cache.cache_file(file_name))
+
+    key = cache.key(file_name, ',', True)
+    assert cache.load(file_name, key) == [['app1', '10.0.0.1', 'DAL'], ['db1, primary', '10.0.0.2', 'NYC']]
+    assert list(REODelimitedFile(file_name, ',', has_header=True, cache=cache)) == parsed
+
+
+def test_cache_outdated(tmp_path):
+    file_name = write_hosts(tmp_path)
+    cache = REOInventoryCache(str(tmp_path / 'cache'))
+    list(REODelimitedFile(file_name, ',', has_header=True, cache=cache))
+
+    write_hosts(tmp_path, HOSTS + 'web1, 10.0.0.3, SIN\n')
+    assert cache.load(file_name, cache.key(file_name, ',', True)) is None
+    assert cache.load(file_name, cache.key(file_name, ';', True)) is None
+    hosts = REODelimitedFile(file_name, ',', has_header=True, cache=cache)
+    assert [row['Name'] for row in hosts] == ['app1', 'db1, primary', 'web1']
+    assert len(cache.load(file_name, cache.key(file_name, ',', True))) == 3
+
+
+def test_cache_unreadable(tmp_path):
+    file_name = write_hosts(tmp_path)
+    cache = REOInventoryCache(str(tmp_path / 'cache'))
+    key = cache.key(file_name, ',', True)
+    with open(cache.cache_file(file_name), 'wb') as fout:
+        fout.write(b'\x00')
+    assert cache.load(file_name, key) is None
+    assert cache.key(str(tmp_path / 'missing.csv'), ',', True) is None
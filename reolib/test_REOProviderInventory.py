@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from reolib.REOInventoryCache import REOInventoryCache
+from reolib.REOProviderInventory import REOProviderInventory
+
+HOSTS = [{'Name': 'app1', 'IP': '10.0.0.1'}, {'Name': 'db1', 'IP': '10.0.0.2'}]
+
+OUTPUTS = {
+    'csv': 'Name, IP\napp1, 10.0.0.1\n\n"db1", 10.0.0.2\n',
+    'json lines': '{"Name": "app1", "IP": "10.0.0.1"}\n\n{"Name": "db1", "IP": "10.0.0.2"}\n',
+    'json array': '\n[{"Name": "app1", "IP": "10.0.0.1"},\n {"Name": "db1", "IP": "10.0.0.2"}]\n',
+}
+
+
+def write_provider(tmp_path, output, status=0, python=False):
+    """Write a provider printing an output, or running Python code if python is True"""
+    provider = tmp_path / 'provider'
+    if not python:
+        output = 'import sys\nsys.stdout.write(' + repr(output) + ')\nsys.exit(' + str(status) + ')\n'
+    provider.write_text('#!' + sys.executable + '\n' + output)
+    os.chmod(str(provider), 0o755)
+    return str(provider)
+
+
+@pytest.mark.parametrize('output', OUTPUTS.values(), ids=list(OUTPUTS))
+def test_formats(tmp_path, output):
+    inventory = REOProviderInventory(write_provider(tmp_path, output))
+    assert inventory.header_list == ['Name', 'IP']
+    assert list(inventory) == HOSTS
+    assert len(inventory) == 2
+    assert list(inventory) == HOSTS  # Rows kept, the provider isn't run again
+
+
+def test_json_missing_values(tmp_path):
+    inventory = REOProviderInventory(write_provider(tmp_path, '{"Name": "app1", "IP": null}\n{"Name": "db1"}\n'))
+    assert list(inventory) == [{'Name': 'app1', 'IP': ''}, {'Name': 'db1', 'IP': ''}]
+
+
+def test_invalid_json(tmp_path):
+    inventory = REOProviderInventory(write_provider(tmp_path, '{"Name": "app1"}\n{"Name": \n'))
+    assert list(inventory) == [{'Name': 'app1'}]  # Rows read before the error are kept
+    assert len(inventory) == 1
+
+
+def test_exit_status(tmp_path):
+    inventory = REOProviderInventory(write_provider(tmp_path, OUTPUTS['csv'], status=3))
+    assert len(list(inventory)) == 2
+    assert not inventory.parsed
+
+
+def test_cache(tmp_path):
+    provider = write_provider(tmp_path, OUTPUTS['csv'])
+    cache = REOInventoryCache(str(tmp_path / 'cache'))
+    assert list(REOProviderInventory(provider, cache=cache, ttl=60)) == HOSTS
+
+    # Cached output used (the provider can't run), the provider changing invalidates it
+    os.chmod(provider, 0o644)
+    assert list(REOProviderInventory(provider, cache=cache, ttl=60)) == HOSTS
+    write_provider(tmp_path, OUTPUTS['json lines'].replace('app1', 'app9'))
+    assert [row['Name'] for row in REOProviderInventory(provider, cache=cache, ttl=60)] == ['app9', 'db1']
+
+
+def test_cache_refreshed(tmp_path):
+    provider = write_provider(tmp_path, OUTPUTS['csv'])
+    cache = REOInventoryCache(str(tmp_path / 'cache'))
+    list(REOProviderInventory(provider, cache=cache, ttl=60))
+    past = os.path.getmtime(cache.cache_file(provider)) - 120
+    os.utime(cache.cache_file(provider), (past, past))
+
+    inventory = REOProviderInventory(provider, cache=cache, ttl=60)
+    assert list(inventory) == HOSTS  # Outdated output used while refreshed
+    inventory.refresh_thread.join()
+    assert cache.age(provider) < 60
+
+
+def test_no_cache_without_ttl(tmp_path):
+    provider = write_provider(tmp_path, OUTPUTS['csv'])
+    cache = REOInventoryCache(str(tmp_path / 'cache'))
+    assert list(REOProviderInventory(provider, cache=cache, ttl=0)) == HOSTS
+    assert not os.path.exists(cache.cache_file(provider))
+
+
+def test_refresh_not_waited_for(tmp_path):
+    hung = tmp_path / 'hung'
+    provider = write_provider(tmp_path, 'import os, sys, time\n'
+                                        'if os.path.exists(' + repr(str(hung)) + '):\n'
+                                        '    time.sleep(10)\n'
+                                        'sys.stdout.write(' + repr(OUTPUTS['csv']) + ')\n', python=True)
+    cache = REOInventoryCache(str(tmp_path / 'cache'))
+    list(REOProviderInventory(provider, cache=cache, ttl=60))
+    past = os.path.getmtime(cache.cache_file(provider)) - 120
+    os.utime(cache.cache_file(provider), (past, past))
+
+    # The provider hangs when refreshed, the run still ends
+    hung.write_text('')
+    script = ('import sys\n'
+              'from reolib.REOInventoryCache import REOInventoryCache\n'
+              'from reolib.REOProviderInventory import REOProviderInventory\n'
+              'inventory = REOProviderInventory(sys.argv[1], cache=REOInventoryCache(sys.argv[2]), ttl=60)\n'
+              'print(len(list(inventory)))\n')
+    output = subprocess.check_output([sys.executable, '-c', script, provider, str(tmp_path / 'cache')],
+                                     cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), timeout=5)
+    assert output.strip() == b'2'
@@ -0,0 +1,136 @@
+import io
+import re
+
+import pytest
+
+from reolib.REORemoteHost import REORemoteHost, _PendingPipeline
+
+
+def shell_host():
+    rhost = REORemoteHost('host')
+    rhost.sentinel_mode = True
+    rhost.device_type = REORemoteHost.DEVICE_TYPE_SHELL
+    return rhost
+
+
+def sentinel(pending, exit_status):
+    """Sentinel line printed by the shell once the command completed"""
+    token = re.search("' '([0-9a-f]+)' ", pending.command_line).group(1)
+    return '\r\n' + REORemoteHost.SENTINEL_PREFIX + token + ':' + str(exit_status) + '\r\n'
+
+
+def chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_sentinel():
+    pending = shell_host().start_command('echo hi')
+    assert pending.sentinel is not None
+    pending.feed((pending.command_line + '\r\nhi' + sentinel(pending, 0) + '[REACH]# ').encode())
+    assert pending.completed
+    assert pending.exit_status == 0
+    pending.finish(io.StringIO())
+    output = pending.output()
+    assert 'hi' in output
+    assert REORemoteHost.SENTINEL_PREFIX not in output
+
+
+def test_sentinel_split_exit_status():
+    pending = shell_host().start_command('false')
+    line = sentinel(pending, 12)
+    pending.feed((pending.command_line + '\r\n' + line[:line.index(':') + 2]).encode())
+    assert not pending.completed
+    pending.feed(line[line.index(':') + 2:].encode())
+    assert pending.completed
+    assert pending.exit_status == 12
+
+
+def test_sentinel_echo_not_matched():
+    pending = shell_host().start_command('echo hi')
+    pending.feed(pending.command_line.encode())
+    assert not pending.completed
+
+
+@pytest.mark.parametrize('size', [1, 3, 64, 4096])
+def test_search_string_split(size):
+    rhost = shell_host()
+    pending = rhost.start_command('yum update', 'Complete|Nothing')
+    output = pending.command_line + '\r\n' + 'x' * 1000 + 'Complete!' + sentinel(pending, 0)
+    for chunk in chunks(output.encode(), size):
+        pending.feed(chunk)
+    assert pending.completed
+    pending.finish(io.StringIO())
+    assert rhost.search_string_isfound == 'Complete'
+
+
+def test_search_string_after_sentinel_ignored():
+    rhost = shell_host()
+    pending = rhost.start_command('true', 'Complete')
+    pending.feed((pending.command_line + '\r\n' + sentinel(pending, 0) + 'Complete').encode())
+    last_run_log = io.StringIO()
+    pending.finish(last_run_log)
+    assert rhost.search_string_isfound == ''
+    assert last_run_log.getvalue().startswith('Not Found')
+
+
+def test_prompt_completion():
+    rhost = REORemoteHost('host')
+    rhost.expected_prompt_regex = rhost.new_prompt_regex
+    pending = rhost.start_command('uptime')
+    assert pending.sentinel is None
+    pending.feed(b'uptime\r\nup 3 days\r\n[REACH]')
+    assert not pending.completed
+    pending.feed(b'# ')
+    assert pending.completed
+    assert pending.exit_status is None
+
+
+def test_wait_after_artifact_split():
+    rhost = REORemoteHost('host')
+    rhost.expected_prompt_regex = rhost.new_prompt_regex
+    pending = rhost.start_command('passwd', '', 'Password:|Password:', 'old|new')
+    assert pending.feed(b'passwd\r\nPassword: ') == 'old\n'
+    # ' \r' split between the reads, the next wait string right after it
+    assert pending.feed(b'\rPassword:') == 'new\n'
+
+
+@pytest.mark.parametrize('size', [1, 5, 70, 4096])
+def test_pipeline(size):
+    rhost = shell_host()
+    pipeline = _PendingPipeline(rhost, [('echo a', ''), ('false', ''), ('echo c', 'c')])
+    first, second, third = pipeline.pendings
+    output = pipeline.command_line + '\r\na' + sentinel(first, 0) + sentinel(second, 12) + 'c' + sentinel(third, 0)
+    for chunk in chunks(output.encode(), size):
+        assert not pipeline.completed
+        pipeline.feed(chunk)
+    assert pipeline.completed
+
+    results = pipeline.results()
+    assert [result[3] for result in results] == [0, 12, 0]
+    assert results[0][0].strip() == 'echo a\r\na'
+    assert results[1][0].startswith('false\n')
+    assert results[2][2] == 'c'
+    assert not [result for result in results if REORemoteHost.SENTINEL_PREFIX in result[0]]
+
+
+def test_pipeline_split_exit_status():
+    pipeline = _PendingPipeline(shell_host(), [('false', ''), ('true', '')])
+    first, second = pipeline.pendings
+    line = sentinel(first, 12)
+    pipeline.feed((pipeline.command_line + line[:line.index(':') + 2]).encode())
+    pipeline.feed((line[line.index(':') + 2:] + sentinel(second, 0)).encode())
+    assert pipeline.completed
+    assert [result[3] for result in pipeline.results()] == [12, 0]
+
+
+def test_pipeline_timeout():
+    pipeline = _PendingPipeline(shell_host(), [('echo a', ''), ('sleep 100', ''), ('echo c', '')])
+    first = pipeline.pendings[0]
+    pipeline.feed((pipeline.command_line + '\r\na' + sentinel(first, 0) + 'partial').encode())
+    assert pipeline.current == 1
+    pipeline.timeout()
+    results = pipeline.results()
+    assert len(results) == 2
+    assert results[0][1] == ''
+    assert results[1][1].startswith('Command timeout')
+    assert 'partial' in results[1][0]
@@ -0,0 +1,43 @@
+import io
+
+from reolib.REOReorderBuffer import REOReorderBuffer
+
+
+def test_writes_in_order():
+    stream = io.StringIO()
+    buffer = REOReorderBuffer(stream)
+    assert buffer.put(2, 'b') == 0
+    assert buffer.put(3, 'c') == 0
+    assert stream.getvalue() == ''
+    assert buffer.put(1, 'a') == 3
+    assert stream.getvalue() == 'abc'
+    assert buffer.next_index == 4
+    assert buffer.pending == {}
+
+
+def test_accepts_within_limit():
+    buffer = REOReorderBuffer(io.StringIO(), limit=2)
+    assert buffer.accepts(1)
+    assert buffer.accepts(2)
+    assert not buffer.accepts(3)
+    buffer.put(1, 'a')
+    assert buffer.accepts(3)
+
+
+def test_first_index():
+    stream = io.StringIO()
+    buffer = REOReorderBuffer(stream, first_index=5)
+    buffer.put(5, 'e')
+    assert stream.getvalue() == 'e'
+    assert buffer.next_index == 6
+
+
+def test_close_writes_held_items_skipping_missing():
+    stream = io.StringIO()
+    buffer = REOReorderBuffer(stream)
+    buffer.put(4, 'd')
+    buffer.put(2, 'b')
+    buffer.close()
+    assert stream.getvalue() == 'bd'
+    assert buffer.next_index == 5
+    assert buffer.pending == {}
@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+from reachlib.SSHWorkerFilter import HostFilter
+from reolib.REOSqliteInventory import REOSqliteInventory
+
+ROWS = [
+    ('app1', '10.0.0.1', 'DAL', 1),
+    ('db1', '10.0.0.2', 'NYC', 12),
+    ('app2', '10.0.0.3', None, 2),
+    ('web1', '10.0.0.4', 'DAL', None),
+]
+
+
+@pytest.fixture(params=['', ' WITHOUT ROWID'])
+def database(request, tmp_path):
+    file_name = str(tmp_path / 'hosts.db')
+    connection = sqlite3.connect(file_name)
+    connection.execute('CREATE TABLE hosts (Name TEXT PRIMARY KEY, IP TEXT, Site TEXT, Rack INTEGER)' +
+                       request.param)
+    connection.execute('CREATE INDEX hosts_site ON hosts (Site)')
+    connection.executemany('INSERT INTO hosts VALUES (?, ?, ?, ?)', ROWS)
+    connection.commit()
+    connection.close()
+    return file_name
+
+
+def names(inventory, filter_string):
+    host_filter = HostFilter(filter_string, inventory.header_list)
+    return [row['Name'] for row in inventory.rows(inventory.row_ids(host_filter.select(inventory)))]
+
+
+def test_rows(database):
+    inventory = REOSqliteInventory(database)
+    assert inventory.table == 'hosts'
+    assert inventory.header_list == ['Name', 'IP', 'Site', 'Rack']
+    assert len(inventory) == 4
+    rows = list(inventory)
+    assert sorted(row['Name'] for row in rows) == ['app1', 'app2', 'db1', 'web1']
+    app2 = [row for row in rows if row['Name'] == 'app2'][0]
+    assert app2 == {'Name': 'app2', 'IP': '10.0.0.3', 'Site': '', 'Rack': '2'}
+
+
+def test_table_order(database):
+    inventory = REOSqliteInventory(database)
+    if inventory.has_rowid:
+        assert [row['Name'] for row in inventory] == ['app1', 'db1', 'app2', 'web1']  # Insertion order
+    else:
+        assert [row['Name'] for row in inventory] == ['app1', 'app2', 'db1', 'web1']  # Primary key order
+
+
+@pytest.mark.parametrize('filter_string, expected', [
+    ('Site=DAL', ['app1', 'web1']),
+    ('Site=', ['app2']),
+    ('Site!DAL', ['app2', 'db1']),
+    ('Rack=1', ['app1']),
+    ('Rack!1', ['app2', 'db1', 'web1']),
+    ('Rack~1', ['app1', 'db1']),
+    ('Name~app & Site=DAL | Rack=12', ['app1', 'db1']),
+    ('Name~APP', []),
+])
+def test_filter(database, filter_string, expected):
+    assert sorted(names(REOSqliteInventory(database), filter_string)) == expected
+
+
+def test_row_ids_generator(database):
+    inventory = REOSqliteInventory(database)
+    row_ids = inventory.row_ids(inventory.equal('Site', 'DAL'))
+    assert iter(row_ids) is row_ids
+    assert sorted(row['Name'] for row in inventory.rows(row_ids)) == ['app1', 'web1']
+
+
+def test_rows_batches(database, monkeypatch):
+    monkeypatch.setattr(REOSqliteInventory, 'FETCH_SIZE', 3)
+    inventory = REOSqliteInventory(database)
+    assert len(list(inventory.rows(inventory.row_ids(inventory.contains('IP', '10.'))))) == 4
+
+
+def test_table_not_found(database):
+    with pytest.raises(SystemExit):
+        REOSqliteInventory(database, table='missing')
@@ -0,0 +1,28 @@
+import io
+
+from reolib.REOStdinInventory import REOStdinInventory
+
+HOSTS = [{'Name': 'app1', 'IP': '10.0.0.1'}, {'Name': 'db1', 'IP': '10.0.0.2'}]
+
+
+def test_stdin():
+    inventory = REOStdinInventory(io.StringIO('{"Name": "app1", "IP": "10.0.0.1"}\n{"Name": "db1", "IP": "10.0.0.2"}\n'))
+    assert inventory.header_list == ['Name', 'IP']
+    assert len(inventory) == 0  # Nothing read yet
+    assert list(inventory) == HOSTS
+    assert len(inventory) == 2
+
+
+def test_rows_read_as_they_come():
+    read = []
+
+    def lines():
+        for line in ('Name, IP\n', 'app1, 10.0.0.1\n', 'db1, 10.0.0.2\n'):
+            read.append(line)
+            yield line
+
+    inventory = REOStdinInventory(lines())
+    rows = iter(inventory)
+    assert next(rows) == HOSTS[0]
+    assert len(read) == 2
+    assert list(rows) == HOSTS[1:]
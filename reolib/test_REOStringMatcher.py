@@ -0,0 +1,45 @@
+from reolib.REOStringMatcher import REOStringMatcher
+
+
+def test_literals():
+    found = REOStringMatcher(['Complete', 'Nothing']).scan('Nothing to do. Complete!')
+    assert found == {'Nothing': 0, 'Complete': 15}
+
+
+def test_last_occurrence():
+    assert REOStringMatcher(['ok']).scan('ok, ok, ok') == {'ok': 8}
+
+
+def test_contained_literals():
+    found = REOStringMatcher(['Complete', 'Comp', 'let']).scan('Complete')
+    assert found == {'Complete': 0, 'Comp': 0, 'let': 4}
+
+
+def test_not_found():
+    assert REOStringMatcher(['Error']).scan('All good') == {}
+
+
+def test_empty_string_always_found():
+    assert REOStringMatcher(['']).scan('abc') == {'': 3}
+
+
+def test_regular_expressions():
+    found = REOStringMatcher(['re:[0-9]+ packages', 'Complete']).scan('12 packages upgraded. Complete')
+    assert found == {'re:[0-9]+ packages': 0, 'Complete': 22}
+
+
+def test_literal_prefix():
+    matcher = REOStringMatcher(['lit:re:x', 'lit:lit:y', 're:x'])
+    found = matcher.scan('use re:x or lit:y')
+    assert found['lit:re:x'] == 4
+    assert found['lit:lit:y'] == 12
+    assert found['re:x'] == 7
+    assert 'lit:re:x' not in matcher.scan('x only')
+
+
+def test_max_length():
+    assert REOStringMatcher(['ab', 'lit:abcd', 're:.{10}']).max_length == 4
+
+
+def test_compile_shares_matchers():
+    assert REOStringMatcher.compile(['a', 'b']) is REOStringMatcher.compile(('a', 'b'))